@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from chat.models import ChatRoom, Message
+from chat.models import ChatRoom, Message, ReadState
 
 admin.site.register(Message)
 admin.site.register(ChatRoom)
+admin.site.register(ReadState)
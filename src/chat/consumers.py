@@ -1,77 +1,180 @@
+import asyncio
 import json
-from typing import Dict
+from collections import deque
+from time import monotonic
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Set,
+)
+from urllib.parse import parse_qs
 
-from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.layers import InMemoryChannelLayer
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
-from chat.models import ChatRoom
-from chat.selectors import (
-    get_chat_members,
-    get_last_20_messages,
-    get_room,
-    get_user,
-    get_users_channels,
-    is_chat_member,
+from chat import metrics
+from chat.db_executor import db_sync_to_async
+from chat.rate_limits import acheck_rate_limit
+from chat.read_receipts import read_receipts
+from chat.selectors import aget_online_users_ids, ais_chat_member
+from chat.serializers import (
+    ACK_FRAMES_PARAM,
+    BATCH_FRAMES_PARAM,
+    MSGPACK_SUBPROTOCOL,
+    decode_msgpack_frame,
+    encode_json_batch_frame,
+    encode_json_frame,
+    encode_msgpack_batch_frame,
+    encode_msgpack_frame,
+    message_json_cursor,
+    messages_to_json,
+    next_messages_cursor,
+    next_missed_messages_cursor,
+    transcode_json_frame,
 )
-from chat.serializers import message_to_json, messages_to_json
 from chat.services import (
-    create_message,
+    aremove_channel_name,
+    asave_channel_name,
+    post_message,
     read_by,
-    remove_channel_name,
-    save_channel_name,
+    read_last_20_messages,
+    read_messages_after,
+)
+from chat.utils import (
+    construct_room_group_name,
+    construct_user_group_name,
+    normalize_room_id,
 )
 
 
+class OutboundFrame(NamedTuple):
+    """
+    Encoded frame waiting to be sent to WebSocket. Chats list updates can be
+    dropped if client doesn't keep up, the rest of frames can't. Cursors are
+    of the last chat message in the frame from each room.
+    """
+
+    frame: str | bytes
+    droppable: bool = False
+    cursors: Dict[str, str] | None = None
+
+
 class ChatConsumer(AsyncWebsocketConsumer):
     reload_page_data = {"command": "reload_page"}
+    # Client that doesn't keep up with chat messages is disconnected with this
+    # code, after it receives the resume token.
+    slow_consumer_close_code = 4008
+    # Set on connect, if client negotiated MessagePack frames
+    use_msgpack = False
+    # Set on connect, if client accepts batch frames
+    use_batch_frames = False
+    # Set on connect, if client acknowledges received frames
+    use_acks = False
+    # Room of the socket, set on connect
+    room_name: str
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Group messages waiting to be sent in a batch, see
+        # OUTBOUND_COALESCE_WINDOW.
+        self.outbound_frames: List[OutboundFrame] = []
+        self.outbound_flush_handle: asyncio.TimerHandle | None = None
+        self.outbound_flush_task: asyncio.Task | None = None
+        # Frames waiting for client to acknowledge frames it was sent, see
+        # OUTBOUND_UNACKED_FRAMES and OUTBOUND_QUEUE_SIZE.
+        self.outbound_queue: Deque[OutboundFrame] = deque()
+        # Number of frames handed to the server and of those acknowledged by
+        # client
+        self.sent_frames = 0
+        self.acked_frames = 0
+        # Cursors of the last chat message of each room written to WebSocket
+        self.last_sent_cursors: Dict[str, str] = {}
+        self.is_resuming = False
+        # Time the channel was last marked as live, see save_presence
+        self.presence_saved_at = 0.0
 
     async def send_reload_page(self):
         return await self.send_message(self.reload_page_data)
 
     async def fetch_messages(self, data) -> None:
         """
-        Fetches last 20 messages with offset form database and sends to the
-        user.
+        Fetches last 20 messages before cursor, or with offset for clients
+        that don't use cursors yet, form database and sends to the user along
+        with the cursor of the next page. Messages are marked as read by the
+        connected user. Messages are fetched from the room of the command,
+        see get_command_room_id, not from any room client asks for.
         """
+        if "after" in data:
+            return await self.fetch_missed_messages(data)
+
+        room_id = self.get_command_room_id(data)
         offset = data.get("msgs_offset", "0")
-        messages = await sync_to_async(get_last_20_messages)(
-            data["room_id"], data["username"], offset
+        before = data.get("before")
+        messages = await db_sync_to_async(read_last_20_messages)(
+            room_id, self.scope["user"], offset, before
         )
-        if messages is None:
-            return await self.send_reload_page()
+        is_first_page = offset == "0" and before is None
         content = {
-            "command": "messages" if offset == "0" else "old_messages",
-            "messages": await sync_to_async(messages_to_json)(messages),
+            "command": "messages" if is_first_page else "old_messages",
+            "room_id": room_id,
+            "messages": messages_to_json(messages),
+            "next_cursor": next_messages_cursor(messages),
         }
         await self.send_message(content)
 
-    async def new_message(self, data: Dict[str, str]) -> None:
+    async def fetch_missed_messages(self, data) -> None:
         """
-        Saves new message to database and send to room group and to each member
-        if he is online and not in this chat group.
+        Fetches messages after resume token, sent to a client when it was
+        disconnected, and sends them to the user along with the token of the
+        next page.
         """
-
-        author = data["from"]
-        author_obj = await sync_to_async(get_user)(author)
-        room_obj = await sync_to_async(get_room)(data["room_id"])
-        if room_obj is None or author_obj is None:
-            return self.send_reload_page()
-        message = await sync_to_async(create_message)(
-            author_obj, room_obj, data["message"]
+        room_id = self.get_command_room_id(data)
+        messages = await db_sync_to_async(read_messages_after)(
+            room_id, self.scope["user"], data["after"]
+        )
+        await self.send_message(
+            {
+                "command": "missed_messages",
+                "room_id": room_id,
+                "messages": messages_to_json(messages),
+                "resume_token": next_missed_messages_cursor(messages),
+            }
         )
 
-        message_json = await sync_to_async(message_to_json)(message)
+    async def new_message(self, data: Dict[str, str]) -> None:
+        """
+        Saves new message of the connected user to database and sends it to
+        room group and to each online member. Everything that needs database
+        is done by a single service call. Message is posted to the room of the
+        command, see get_command_room_id, whose rate limit was checked.
+        """
+        room_id = self.get_command_room_id(data)
+        if room_id is None:
+            return await self.send_reload_page()
+        posted = await db_sync_to_async(post_message)(
+            self.scope["user"], room_id, data["message"]
+        )
+        if posted is None:
+            return await self.send_reload_page()
+        message_json, members_ids = posted
 
-        await self.send_chat_message(message_json)
-        await self.send_message_to_chats_list(message_json, room_obj)
+        await self.send_chat_message(message_json, room_id)
+        await self.send_message_to_chats_list(
+            message_json, room_id, members_ids
+        )
 
     async def connect(self) -> None:
-        """Joins room group"""
+        """Joins room group and group of all user's channels"""
         self.room_name = self.scope["url_route"]["kwargs"]["room_id"]
 
-        if not await sync_to_async(is_chat_member)(
+        if not await ais_chat_member(
             self.scope["user"].id, self.room_name
         ):
             raise ObjectDoesNotExist(
@@ -79,90 +182,579 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 " exists."
             )
 
-        self.room_group_name = f"chat_{self.room_name}"
+        self.room_group_name = construct_room_group_name(self.room_name)
+        self.user_group_name = construct_user_group_name(
+            self.scope["user"].id
+        )
         self.channel_layer: InMemoryChannelLayer
 
         await self.channel_layer.group_add(
             self.room_group_name, self.channel_name
         )
-        await self.accept()
+        await self.channel_layer.group_add(
+            self.user_group_name, self.channel_name
+        )
+        await self.accept_client()
 
-        save_channel_name(self.scope["user"].id, self.channel_name)
+        await self.save_presence()
+
+    async def accept_client(self) -> None:
+        """
+        Accepts WebSocket. JSON stays the default, MessagePack is used only if
+        client asked for it. The same goes for batch frames and
+        acknowledgements.
+        """
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        self.use_batch_frames = query.get(BATCH_FRAMES_PARAM) == ["1"]
+        self.use_acks = query.get(ACK_FRAMES_PARAM) == ["1"]
+        self.use_msgpack = MSGPACK_SUBPROTOCOL in self.scope.get(
+            "subprotocols", []
+        )
+        await self.accept(
+            subprotocol=MSGPACK_SUBPROTOCOL if self.use_msgpack else None
+        )
 
     async def disconnect(self, _):
-        """Leaves room group"""
+        """Leaves room and user groups"""
+        self.discard_outbound_frames()
+
         await self.channel_layer.group_discard(
             self.room_group_name, self.channel_name
         )
+        await self.channel_layer.group_discard(
+            self.user_group_name, self.channel_name
+        )
+
+        await aremove_channel_name(self.scope["user"].id, self.channel_name)
+
+    def discard_outbound_frames(self) -> None:
+        """
+        Drops buffered and queued frames, socket is closed and they can't be
+        sent.
+        """
+        if self.outbound_flush_handle is not None:
+            self.outbound_flush_handle.cancel()
+            self.outbound_flush_handle = None
+        self.outbound_frames = []
+        self.outbound_queue.clear()
 
-        remove_channel_name(self.scope["user"].id, self.channel_name)
+    async def heartbeat(self, _) -> None:
+        """
+        Marks channel as live, see PRESENCE_TIMEOUT.
+        """
+        await self.save_presence()
+
+    async def save_presence(self) -> None:
+        await asave_channel_name(self.scope["user"].id, self.channel_name)
+        self.presence_saved_at = monotonic()
+
+    async def refresh_presence(self) -> None:
+        """
+        Marks channel as live on any command, at most once per heartbeat
+        interval. Clients loaded before heartbeats were introduced don't send
+        them, but stay live as long as they send other commands.
+        """
+        if (
+            monotonic() - self.presence_saved_at
+            >= settings.PRESENCE_HEARTBEAT_INTERVAL
+        ):
+            await self.save_presence()
+
+    async def ack(self, data: Dict) -> None:
+        """
+        Receives number of frames client received so far and sends frames
+        that waited for it, see OUTBOUND_UNACKED_FRAMES.
+        """
+        self.acked_frames = max(
+            self.acked_frames, min(int(data["frames"]), self.sent_frames)
+        )
+        while self.outbound_queue and self.can_send_frame():
+            await self.write_frame(self.outbound_queue.popleft())
 
-    async def receive(self, text_data: str) -> None:
-        """Receives message from WebSocket"""
-        data = json.loads(text_data)
+    async def receive(
+        self, text_data: str | None = None, bytes_data: bytes | None = None
+    ) -> None:
+        """
+        Receives message from WebSocket. Commands over the rate limit, see
+        WEBSOCKET_RATE_LIMITS, are refused with the time after which client can
+        retry them.
+        """
+        if bytes_data is not None:
+            data = decode_msgpack_frame(bytes_data)
+        elif text_data is not None:
+            data = json.loads(text_data)
+        else:
+            return None
         command = data["command"]
+        func = self.get_command_handler(command)
+        if command != "heartbeat":
+            await self.refresh_presence()
+
+        room_id = self.get_command_room_id(data)
+        retry_after = await acheck_rate_limit(
+            command, self.scope["user"].id, room_id
+        )
+        if retry_after:
+            return await self.send_message(
+                {
+                    "command": "throttled",
+                    "room_id": room_id,
+                    "throttled_command": command,
+                    "retry_after": retry_after,
+                }
+            )
+        await func(data)
+
+    def get_command_handler(
+        self, command: str
+    ) -> Callable[[Dict], Awaitable[None]]:
+        """
+        Returns method that handles command received from WebSocket.
+        """
         match command:
             case "fetch_messages":
-                func = self.fetch_messages
+                return self.fetch_messages
             case "new_message":
-                func = self.new_message
+                return self.new_message
+            case "heartbeat":
+                return self.heartbeat
+            case "ack":
+                return self.ack
+            case _:
+                raise ValueError(f"Unknown command: {command}.")
 
-        await func(data)
+    def get_command_room_id(self, data: Dict) -> str | None:
+        """
+        Returns id of the room that command is sent to, the room of the
+        socket.
+        """
+        return self.room_name
+
+    def get_event_room_id(self, event: Dict) -> str:
+        """
+        Returns id of the room that group event is sent to. Events sent before
+        they were tagged with room, are of the room of the socket.
+        """
+        return event["room_id"] if "room_id" in event else self.room_name
 
-    async def send_chat_message(self, message_json: Dict[str, str]) -> None:
-        """Sends message to room group"""
+    async def send_chat_message(
+        self, message_json: Dict[str, Any], room_id: str
+    ) -> None:
+        """
+        Sends message to room group. JSON frame is encoded once here,
+        receivers forward it as is, see get_event_frame.
+        """
         await self.channel_layer.group_send(
-            self.room_group_name,
+            construct_room_group_name(room_id),
             {
                 "type": "chat_message",
-                "message": {
-                    "command": "new_message",
-                    "message": message_json,
-                },
+                "room_id": room_id,
+                "message_id": message_json["id"],
+                "cursor": message_json_cursor(message_json),
+                "text": encode_json_frame(
+                    {
+                        "command": "new_message",
+                        "room_id": room_id,
+                        "message": message_json,
+                    }
+                ),
             },
         )
 
     async def send_message_to_chats_list(
-        self, message_json: Dict[str, str], room_obj: ChatRoom
+        self,
+        message_json: Dict[str, Any],
+        room_id: str,
+        members_ids: List[int],
     ) -> None:
         """
-        Sends message to each channel that belongs to user.
+        Sends message to each online chat member, to all channels of the
+        member at once through the member's group. Messages to members are
+        sent concurrently, frame is encoded once for all of them.
         """
-        chat_members = await sync_to_async(get_chat_members)(room_obj)
-        channels_names = await sync_to_async(get_users_channels)(chat_members)
+        online_members_ids = await aget_online_users_ids(members_ids)
 
         content = {
             "type": "chat_list_message",
-            "message": {
-                "command": "chats_list_message",
-                "room_id": str(room_obj.id),
-                "message": message_json,
-            },
+            "text": encode_json_frame(
+                {
+                    "command": "chats_list_message",
+                    "room_id": room_id,
+                    "message": message_json,
+                }
+            ),
         }
-        for user_channels in channels_names:
-            for channel_name in user_channels:
-                await self.channel_layer.send(
-                    channel_name.decode(),
-                    content,
+        await asyncio.gather(
+            *(
+                self.channel_layer.group_send(
+                    construct_user_group_name(member_id), content
                 )
+                for member_id in online_members_ids
+            )
+        )
+
+    def get_event_frame(self, event: Dict) -> str | bytes:
+        """
+        Returns frame of group event in encoding of the socket. Senders encode
+        only JSON frame, so MessagePack isn't encoded for groups without
+        MessagePack receivers. These receivers transcode it, once per worker,
+        see transcode_json_frame.
+        """
+        if not self.use_msgpack:
+            return event["text"]
+        # Senders deployed before, encoded MessagePack frame as well
+        if "bytes" in event:
+            return event["bytes"]
+        return transcode_json_frame(event["text"])
 
     async def send_message(self, message: Dict) -> None:
         """
-        Sends message to a current user (WebSocket).
+        Sends message to a current user (WebSocket). Buffered group messages
+        are sent first, so messages are received in order.
+        """
+        await self.flush_outbound_frames()
+        frame: str | bytes
+        if self.use_msgpack:
+            frame = encode_msgpack_frame(message)
+        else:
+            frame = encode_json_frame(message)
+        await self.enqueue_frame(OutboundFrame(frame))
+
+    async def send_encoded_message(
+        self, event: Dict, droppable: bool = False
+    ) -> None:
+        """
+        Sends message encoded by the group sender to a current user. Messages
+        that arrive within OUTBOUND_COALESCE_WINDOW from the first buffered
+        one are sent in a single batch frame, so a burst of messages doesn't
+        cost a frame and a client update per message. Only clients that
+        accept batch frames get them.
+        """
+        frame = OutboundFrame(
+            self.get_event_frame(event),
+            droppable,
+            {self.get_event_room_id(event): event["cursor"]}
+            if "cursor" in event
+            else None,
+        )
+        if not self.use_batch_frames or not settings.OUTBOUND_COALESCE_WINDOW:
+            return await self.enqueue_frame(frame)
+
+        self.outbound_frames.append(frame)
+        if len(self.outbound_frames) >= settings.OUTBOUND_COALESCE_MAX_FRAMES:
+            await self.flush_outbound_frames()
+        elif self.outbound_flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.outbound_flush_handle = loop.call_later(
+                settings.OUTBOUND_COALESCE_WINDOW, self.start_outbound_flush
+            )
+
+    def start_outbound_flush(self) -> None:
+        self.outbound_flush_handle = None
+        self.outbound_flush_task = asyncio.get_running_loop().create_task(
+            self.flush_outbound_frames()
+        )
+
+    async def flush_outbound_frames(self) -> None:
+        """
+        Sends buffered group messages, a single one as is, more of them in a
+        batch frame. Batch can be dropped only if all its messages can.
         """
-        await self.send(text_data=json.dumps(message))
+        if self.outbound_flush_handle is not None:
+            self.outbound_flush_handle.cancel()
+            self.outbound_flush_handle = None
+
+        frames, self.outbound_frames = self.outbound_frames, []
+        if not frames:
+            return None
+        metrics.observe("outbound.batch_size", len(frames))
+        if len(frames) == 1:
+            return await self.enqueue_frame(frames[0])
+
+        # Frames of a socket are all bytes or all str, by its encoding
+        encoded_frames: List[Any] = [frame.frame for frame in frames]
+        cursors: Dict[str, str] = {}
+        for frame in frames:
+            cursors.update(frame.cursors or {})
+        await self.enqueue_frame(
+            OutboundFrame(
+                encode_msgpack_batch_frame(encoded_frames)
+                if self.use_msgpack
+                else encode_json_batch_frame(encoded_frames),
+                all(frame.droppable for frame in frames),
+                cursors or None,
+            )
+        )
+
+    async def enqueue_frame(self, frame: OutboundFrame) -> None:
+        """
+        Sends frame to WebSocket, or queues it if client hasn't acknowledged
+        enough of the sent frames. If the queue is full, the oldest droppable
+        frame is dropped to make room. If there is none, a droppable frame is
+        dropped itself, otherwise the client is too slow and is disconnected
+        with a resume token.
+        """
+        if self.is_resuming:
+            return None
+        if not self.outbound_queue and self.can_send_frame():
+            return await self.write_frame(frame)
+
+        if len(self.outbound_queue) >= settings.OUTBOUND_QUEUE_SIZE:
+            dropped = next(
+                (queued for queued in self.outbound_queue if queued.droppable),
+                None,
+            )
+            if dropped is None and not frame.droppable:
+                return await self.resume_later()
+            metrics.increment("outbound.dropped_frames")
+            if dropped is None:
+                # Frame is the oldest chats list update itself
+                return None
+            self.outbound_queue.remove(dropped)
+
+        self.outbound_queue.append(frame)
+        metrics.observe("outbound.queue_depth", len(self.outbound_queue))
+
+    def can_send_frame(self) -> bool:
+        """
+        Returns whether frame can be handed to the server. Server takes frames
+        without backpressure, so it's based on client's acknowledgements.
+        Frames of clients that don't acknowledge them are always sent.
+        """
+        return (
+            not self.use_acks
+            or self.sent_frames - self.acked_frames
+            < settings.OUTBOUND_UNACKED_FRAMES
+        )
+
+    async def write_frame(self, frame: OutboundFrame) -> None:
+        """
+        Hands frame to the server and keeps cursors of its chat messages.
+        """
+        await self.send_frame(frame.frame)
+        self.sent_frames += 1
+        if frame.cursors:
+            self.last_sent_cursors.update(frame.cursors)
+
+    async def resume_later(self) -> None:
+        """
+        Drops queued frames, sends the resume token and closes WebSocket, so
+        client can fetch messages it missed after it reconnects.
+        """
+        metrics.increment("outbound.slow_consumer_disconnects")
+        # Queued frames and the one that didn't fit
+        metrics.increment(
+            "outbound.dropped_frames", len(self.outbound_queue) + 1
+        )
+        self.outbound_queue.clear()
+        self.is_resuming = True
+
+        content = self.get_resume_content()
+        if self.use_msgpack:
+            await self.send_frame(encode_msgpack_frame(content))
+        else:
+            await self.send_frame(encode_json_frame(content))
+        await self.close(code=self.slow_consumer_close_code)
+
+    def get_resume_content(self) -> Dict:
+        """
+        Returns message with the resume token, the cursor of the last chat
+        message of the socket's room written to WebSocket.
+        """
+        return {
+            "command": "resume",
+            "resume_token": self.last_sent_cursors.get(self.room_name),
+        }
+
+    async def send_frame(self, frame: str | bytes) -> None:
+        """
+        Sends encoded frame to WebSocket.
+        """
+        metrics.increment("outbound.frames")
+        if isinstance(frame, bytes):
+            await self.send(bytes_data=frame)
+        else:
+            await self.send(text_data=frame)
 
     async def chat_message(self, event: Dict):
         """
         Receives message from a room group.
         """
+        if "text" in event:
+            read_receipts.add(
+                self.scope["user"].id,
+                self.get_event_room_id(event),
+                event["message_id"],
+            )
+            return await self.send_encoded_message(event)
+
+        # Events sent before frames were encoded by the sender, can be still
+        # delivered during deployment.
         message = event["message"]
 
-        await sync_to_async(read_by)(message["message"], self.scope["user"])
+        if "id" in message["message"]:
+            read_receipts.add(
+                self.scope["user"].id, self.room_name, message["message"]["id"]
+            )
+        else:
+            await db_sync_to_async(read_by)(
+                message["message"], self.scope["user"], self.room_name
+            )
 
         await self.send_message(message)
 
-    async def chat_list_message(self, message: dict) -> None:
-        message = message["message"]
+    async def chat_list_message(self, event: Dict) -> None:
+        """
+        Receives message from the user group.
+        """
+        if "text" in event:
+            return await self.send_encoded_message(event, droppable=True)
 
-        await self.send_message(message)
+        await self.send_message(event["message"])
+
+
+class UserChatConsumer(ChatConsumer):
+    """
+    Single WebSocket of the user for all rooms. Client subscribes to rooms it
+    shows and every room frame is tagged with its room id. Chats list updates
+    are received through the user group, as in ChatConsumer.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.rooms_ids: Set[str] = set()
+
+    async def connect(self) -> None:
+        """Joins group of all user's channels"""
+        if not self.scope["user"].is_authenticated:
+            return await self.close()
+
+        self.user_group_name = construct_user_group_name(
+            self.scope["user"].id
+        )
+        self.channel_layer: InMemoryChannelLayer
+
+        await self.channel_layer.group_add(
+            self.user_group_name, self.channel_name
+        )
+        await self.accept_client()
+
+        await self.save_presence()
+
+    async def disconnect(self, _):
+        """Leaves groups of subscribed rooms and user group"""
+        # Socket was rejected on connect, it didn't join any group
+        if not self.scope["user"].is_authenticated:
+            return None
+
+        self.discard_outbound_frames()
+
+        for room_id in self.rooms_ids:
+            await self.channel_layer.group_discard(
+                construct_room_group_name(room_id), self.channel_name
+            )
+        self.rooms_ids.clear()
+        await self.channel_layer.group_discard(
+            self.user_group_name, self.channel_name
+        )
+
+        await aremove_channel_name(self.scope["user"].id, self.channel_name)
+
+    async def subscribe(self, data: Dict[str, str]) -> None:
+        """
+        Joins room group, if user is a member of the room. Room id is
+        normalized, see get_command_room_id, so every spelling of it joins the
+        same group.
+        """
+        room_id = self.get_command_room_id(data)
+        if room_id is None or not await ais_chat_member(
+            self.scope["user"].id, room_id
+        ):
+            return await self.send_message(
+                {
+                    "command": "subscription_refused",
+                    "room_id": data.get("room_id"),
+                }
+            )
+
+        await self.channel_layer.group_add(
+            construct_room_group_name(room_id), self.channel_name
+        )
+        self.rooms_ids.add(room_id)
+        await self.send_message({"command": "subscribed", "room_id": room_id})
+
+    async def unsubscribe(self, data: Dict[str, str]) -> None:
+        """
+        Leaves room group.
+        """
+        room_id = self.get_command_room_id(data)
+        if room_id in self.rooms_ids:
+            await self.channel_layer.group_discard(
+                construct_room_group_name(room_id), self.channel_name
+            )
+            self.rooms_ids.discard(room_id)
+        await self.send_message(
+            {
+                "command": "unsubscribed",
+                "room_id": room_id or data.get("room_id"),
+            }
+        )
+
+    async def fetch_messages(self, data) -> None:
+        """
+        Fetches messages of a subscribed room, see ChatConsumer.fetch_messages.
+        """
+        if self.get_command_room_id(data) not in self.rooms_ids:
+            return await self.send_not_subscribed(data["room_id"])
+        await super().fetch_messages(data)
+
+    async def new_message(self, data: Dict[str, str]) -> None:
+        """
+        Posts message to a subscribed room, see ChatConsumer.new_message.
+        """
+        if self.get_command_room_id(data) not in self.rooms_ids:
+            return await self.send_not_subscribed(data["room_id"])
+        await super().new_message(data)
+
+    async def send_not_subscribed(self, room_id: str) -> None:
+        await self.send_message(
+            {"command": "not_subscribed", "room_id": room_id}
+        )
+
+    def get_command_handler(
+        self, command: str
+    ) -> Callable[[Dict], Awaitable[None]]:
+        match command:
+            case "subscribe":
+                return self.subscribe
+            case "unsubscribe":
+                return self.unsubscribe
+        return super().get_command_handler(command)
+
+    def get_command_room_id(self, data: Dict) -> str | None:
+        """
+        Returns id of the room that command is sent to, given by client, in
+        its canonical form, see normalize_room_id. Group names, subscribed
+        rooms and rate limit buckets are keyed by it.
+        """
+        return normalize_room_id(data.get("room_id"))
+
+    def get_resume_content(self) -> Dict:
+        """
+        Returns message with resume tokens of all rooms, for which chat
+        messages were written to WebSocket.
+        """
+        return {
+            "command": "resume",
+            "resume_tokens": self.last_sent_cursors,
+        }
+
+    async def chat_message(self, event: Dict):
+        """
+        Receives message from a subscribed room group.
+        """
+        # Events of senders deployed before room frames were tagged with room
+        # can't be told apart.
+        if "room_id" not in event:
+            return None
+        await super().chat_message(event)
@@ -0,0 +1,65 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import lru_cache, wraps
+from time import perf_counter
+from typing import Any, Awaitable, Callable, TypeVar
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from chat import metrics
+
+R = TypeVar("R")
+
+# sync_to_async runs all thread sensitive calls in one thread per process,
+# so database work of all sockets is done one call at a time. Consumers run
+# their database calls in a pool of threads instead, each thread with its own
+# database connection, so calls of independent consumers run in parallel.
+
+
+@lru_cache(maxsize=1)
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Creates pool of threads for database calls during first call and returns
+    it. During next call cached value will be returned.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.DB_EXECUTOR_POOL_SIZE,
+        thread_name_prefix="chat-db",
+    )
+
+
+def _run(
+    func: Callable[..., R], submitted_at: float, *args: Any, **kwargs: Any
+) -> R:
+    started_at = perf_counter()
+    metrics.observe("db_executor.queue_wait", started_at - submitted_at)
+    # Same as at the start of a request, connection of the thread is closed if
+    # it's broken or older than CONN_MAX_AGE. It's not closed after the call,
+    # so the next call of the thread reuses it.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        metrics.observe(
+            "db_executor.execution_time", perf_counter() - started_at
+        )
+
+
+def db_sync_to_async(func: Callable[..., R]) -> Callable[..., Awaitable[R]]:
+    """
+    Turns sync function that uses database into async one, that runs it in
+    the database threads pool. Use like sync_to_async.
+    """
+
+    @wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> R:
+        context = copy_context()
+        submitted_at = perf_counter()
+        return await asyncio.get_running_loop().run_in_executor(
+            get_db_executor(),
+            lambda: context.run(_run, func, submitted_at, *args, **kwargs),
+        )
+
+    return wrapper
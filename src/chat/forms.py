@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
 from chat.models import ChatRoom
+from chat.room_members import invalidate_room_members
+from chat.services import create_read_states
 
 
 class ChatRoomForm(forms.ModelForm):
@@ -27,6 +29,8 @@ class ChatRoomForm(forms.ModelForm):
             instance.save()
 
             instance.members.add(self.request.user)
+            invalidate_room_members(instance.id)
+            create_read_states(instance, [self.request.user])
 
         return instance
 
@@ -51,3 +55,5 @@ class ChatRoomMembersForm(forms.Form):
             )
             for user in users_to_add:
                 chat_room_instance.members.add(user)
+            invalidate_room_members(chat_room_instance.id)
+            create_read_states(chat_room_instance, users_to_add)
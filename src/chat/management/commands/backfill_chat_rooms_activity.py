@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from chat.models import ChatRoom, Message
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills last message and last activity date of chat rooms created "
+        "before these fields were introduced. Rooms are processed in chunks, "
+        "so the command can be interrupted and started again."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of chat rooms updated in a single transaction.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        chunk_size = options["chunk_size"]
+        last_messages = Message.objects.filter(room=OuterRef("pk")).order_by(
+            "-timestamp"
+        )
+        # Filled rooms no longer match the filter, so each iteration takes
+        # the next chunk.
+        rooms_to_fill = ChatRoom.objects.filter(last_activity_at__isnull=True)
+
+        num_filled = 0
+        while chunk := list(
+            rooms_to_fill.order_by("pk").values_list("pk", flat=True)[
+                :chunk_size
+            ]
+        ):
+            # Last message is read by the update itself and rooms filled by a
+            # new message in the meantime are skipped, so a newer last
+            # message isn't overwritten.
+            num_filled += rooms_to_fill.filter(pk__in=chunk).update(
+                last_message=Subquery(last_messages.values("id")[:1]),
+                last_activity_at=Coalesce(
+                    Subquery(last_messages.values("timestamp")[:1]),
+                    F("created"),
+                ),
+            )
+            self.stdout.write(f"Filled {num_filled} chat rooms.")
+
+        self.stdout.write(self.style.SUCCESS("Backfill finished."))
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Case, Exists, OuterRef, Subquery, When
+from django.db.transaction import atomic
+
+from chat.models import ChatRoom, Message, ReadState
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates read cursors of chat rooms members from the deprecated "
+        "Message.unread_by table. Cursor is placed right before the oldest "
+        "unread message of the member, or at the last room message if "
+        "everything is read. Members are processed in chunks and members that "
+        "already have cursor are skipped, so the command can be interrupted "
+        "and started again."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of read cursors created in a single transaction.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        chunk_size = options["chunk_size"]
+        room_messages = Message.objects.filter(room=OuterRef("chatroom_id"))
+        first_unread_message = (
+            room_messages.filter(unread_by=OuterRef("user_id"))
+            .order_by("id")
+            .values("id")[:1]
+        )
+        Membership = ChatRoom.members.through
+        # Processed memberships no longer match the filter, so each iteration
+        # takes the next chunk.
+        memberships = (
+            Membership.objects.filter(  # type: ignore[attr-defined]
+                ~Exists(
+                    ReadState.objects.filter(
+                        user=OuterRef("user_id"), room=OuterRef("chatroom_id")
+                    )
+                )
+            )
+            .annotate(first_unread_msg_id=Subquery(first_unread_message))
+            .annotate(
+                last_read_msg_id=Case(
+                    When(
+                        first_unread_msg_id__isnull=True,
+                        then=Subquery(
+                            room_messages.order_by("-id").values("id")[:1]
+                        ),
+                    ),
+                    default=Subquery(
+                        room_messages.filter(
+                            id__lt=OuterRef("first_unread_msg_id")
+                        )
+                        .order_by("-id")
+                        .values("id")[:1]
+                    ),
+                )
+            )
+            .order_by("id")
+            .values_list("user_id", "chatroom_id", "last_read_msg_id")
+        )
+
+        num_migrated = 0
+        while chunk := list(memberships[:chunk_size]):
+            with atomic():
+                ReadState.objects.bulk_create(
+                    [
+                        ReadState(
+                            user_id=user_id,
+                            room_id=room_id,
+                            last_read_message_id=last_read_msg_id,
+                        )
+                        for user_id, room_id, last_read_msg_id in chunk
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            num_migrated += len(chunk)
+            self.stdout.write(f"Migrated {num_migrated} chat rooms members.")
+
+        self.stdout.write(self.style.SUCCESS("Migration finished."))
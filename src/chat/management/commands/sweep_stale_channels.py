@@ -0,0 +1,31 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from chat.services import sweep_stale_channels
+
+
+class Command(BaseCommand):
+    help = (
+        "Removes channels that didn't send heartbeat within presence timeout "
+        "from users' channels and users' groups. Runs once, or periodically "
+        "if interval is given."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Number of seconds between sweeps.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        interval = options["interval"]
+        while True:
+            num_removed = sweep_stale_channels()
+            self.stdout.write(f"Removed {num_removed} stale channels.")
+
+            if interval is None:
+                break
+            sleep(interval)
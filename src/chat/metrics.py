@@ -0,0 +1,64 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict
+
+# In-process metrics of the worker. Updated from the event loop and from
+# threads running database code, hence the lock.
+_lock = Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_gauges: Dict[str, float] = {}
+_summaries: Dict[str, Dict[str, float]] = {}
+
+
+def increment(name: str, value: float = 1) -> None:
+    """
+    Increases counter by value.
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """
+    Sets gauge to the current value.
+    """
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    """
+    Records observation, e.g. duration or size, in summary with count, sum and
+    max of observed values.
+    """
+    with _lock:
+        summary = _summaries.setdefault(
+            name, {"count": 0, "sum": 0, "max": value}
+        )
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["max"] = max(summary["max"], value)
+
+
+def get_metrics() -> Dict[str, Dict]:
+    """
+    Returns snapshot of all metrics.
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "summaries": {
+                name: dict(summary) for name, summary in _summaries.items()
+            },
+        }
+
+
+def reset_metrics() -> None:
+    """
+    Removes all metrics.
+    """
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _summaries.clear()
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.5 on 2026-10-18 19:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0008_message_room_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='readstate',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='chat.message'),
+        ),
+    ]
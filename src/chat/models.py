@@ -2,6 +2,7 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class ChatRoom(models.Model):
@@ -18,6 +19,20 @@ class ChatRoom(models.Model):
     room_name = models.CharField(max_length=255, null=True, blank=True)
     created = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized, maintained by create_message and, when the last message
+    # is deleted, by signals. Rooms created before these fields were
+    # introduced are filled by the backfill_chat_rooms_activity command. Last
+    # activity date has no default, so migration leaves it empty for existing
+    # rooms, new rooms get it on save.
+    last_message = models.ForeignKey(
+        "Message",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    last_activity_at = models.DateTimeField(null=True, db_index=True)
+
     class Meta:
         verbose_name = "Chat room"
         verbose_name_plural = "Chat rooms"
@@ -25,6 +40,11 @@ class ChatRoom(models.Model):
     def __str__(self) -> str:
         return self.room_name or str(self.id)
 
+    def save(self, *args, **kwargs) -> None:
+        if self._state.adding and self.last_activity_at is None:
+            self.last_activity_at = timezone.now()
+        super().save(*args, **kwargs)
+
 
 class Message(models.Model):
     author = models.ForeignKey(
@@ -32,9 +52,15 @@ class Message(models.Model):
         related_name="author",
         on_delete=models.CASCADE,
     )
+    # Indexed by composite indexes below, which all start with room.
     room = models.ForeignKey(
-        ChatRoom, related_name="message", on_delete=models.CASCADE
+        ChatRoom,
+        related_name="message",
+        on_delete=models.CASCADE,
+        db_index=False,
     )
+    # Deprecated, replaced by ReadState. Kept until existing rows are moved by
+    # the migrate_unread_to_read_states command.
     unread_by = models.ManyToManyField(
         settings.AUTH_USER_MODEL, related_name="unread_messages"
     )
@@ -45,6 +71,53 @@ class Message(models.Model):
     class Meta:
         verbose_name = "Message"
         verbose_name_plural = "Messages"
+        indexes = [
+            # Keyset pagination of room history.
+            models.Index(
+                fields=("room", "timestamp", "id"),
+                name="chat_msg_room_ts_id_idx",
+            ),
+            # Unread messages after read cursor of the room.
+            models.Index(fields=("room", "id"), name="chat_msg_room_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.author.username}: {self.content[:100]}"
+
+
+class ReadState(models.Model):
+    """
+    Read cursor of the user in the chat room. All room messages up to and
+    including last read message are read by the user.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="read_states",
+        on_delete=models.CASCADE,
+    )
+    room = models.ForeignKey(
+        ChatRoom, related_name="read_states", on_delete=models.CASCADE
+    )
+    # Cursor is kept when the message is deleted, messages after it are still
+    # compared by id.
+    last_read_message = models.ForeignKey(
+        Message,
+        related_name="+",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = "Read state"
+        verbose_name_plural = "Read states"
+        constraints = [
+            models.UniqueConstraint(
+                fields=("user", "room"), name="unique_read_state_user_room"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user}: {self.room} ({self.last_read_message_id})"
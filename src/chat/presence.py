@@ -0,0 +1,63 @@
+# Channels of each user are kept in a sorted set, scored with time of the
+# channel's last heartbeat. Channel is live if it sent heartbeat within
+# PRESENCE_TIMEOUT. Sets are read and modified by scripts, so each operation
+# is atomic and takes a single round trip, and stale channels are pruned
+# whenever a set is written.
+
+# Saves channel with its heartbeat, prunes stale channels, refreshes TTL and
+# returns live channels.
+#
+# KEYS: user's channels
+# ARGV: channel name, heartbeat, alive since, TTL
+SAVE_CHANNEL_SCRIPT = """
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return redis.call('ZRANGE', KEYS[1], 0, -1)
+"""
+
+# Removes channel, prunes stale channels and returns live channels.
+#
+# KEYS: user's channels
+# ARGV: channel name, alive since
+REMOVE_CHANNEL_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[2])
+return redis.call('ZRANGE', KEYS[1], 0, -1)
+"""
+
+# Removes stale channels and returns them.
+#
+# KEYS: user's channels
+# ARGV: alive since
+PRUNE_CHANNELS_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+if #stale > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+end
+return stale
+"""
+
+# Returns live channels of each user.
+#
+# KEYS: channels of each user
+# ARGV: alive since
+GET_CHANNELS_SCRIPT = """
+local channels = {}
+for i, key in ipairs(KEYS) do
+    channels[i] = redis.call('ZRANGEBYSCORE', key, ARGV[1], '+inf')
+end
+return channels
+"""
+
+# Returns number of live channels of each user.
+#
+# KEYS: channels of each user
+# ARGV: alive since
+COUNT_CHANNELS_SCRIPT = """
+local num_channels = {}
+for i, key in ipairs(KEYS) do
+    num_channels[i] = redis.call('ZCOUNT', key, ARGV[1], '+inf')
+end
+return num_channels
+"""
@@ -0,0 +1,102 @@
+import logging
+from time import time
+
+from django.conf import settings
+from redis import RedisError
+
+from chat import metrics
+from chat.redis import arun_script, get_async_redis_connection
+from chat.utils import (
+    construct_name_of_redis_hash_for_room_rate_limit,
+    construct_name_of_redis_hash_for_user_rate_limit,
+)
+
+logger = logging.getLogger(__name__)
+
+# Token bucket of each key is a hash with number of tokens and time of the
+# last update, in milliseconds. Tokens are refilled lazily, when bucket is
+# checked. Token is taken from all buckets or from none of them, so a command
+# refused by the room bucket doesn't use up the user's one. Returns 0 if
+# tokens were taken, otherwise number of milliseconds after which all buckets
+# have a token. Bucket expires when it's full again.
+#
+# KEYS: buckets
+# ARGV: now, then capacity and rate (tokens per second) of each bucket
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated_at')
+    local bucket_tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    bucket_tokens = math.min(
+        capacity, bucket_tokens + math.max(0, now - updated_at) * rate / 1000
+    )
+    if bucket_tokens < 1 then
+        retry_after = math.max(
+            retry_after, math.ceil((1 - bucket_tokens) * 1000 / rate)
+        )
+    end
+    tokens[i] = bucket_tokens
+end
+if retry_after > 0 then
+    return retry_after
+end
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'updated_at', now)
+    redis.call(
+        'PEXPIRE', key, math.ceil((capacity - tokens[i] + 1) * 1000 / rate)
+    )
+end
+return 0
+"""
+
+
+async def acheck_rate_limit(
+    command: str, user_id: int, room_id: str | None
+) -> int:
+    """
+    Takes a token from the user's and the room's buckets of the command, see
+    WEBSOCKET_RATE_LIMITS, in a single round trip. Returns 0 if command is
+    allowed, otherwise number of milliseconds after which it can be retried.
+    Commands are allowed if limits can't be checked. Commands without room
+    are limited by the user's bucket only.
+    """
+    limits = settings.WEBSOCKET_RATE_LIMITS.get(command)
+    if not limits:
+        return 0
+
+    buckets = {
+        "user": construct_name_of_redis_hash_for_user_rate_limit(
+            command, user_id
+        )
+    }
+    if room_id is not None:
+        buckets["room"] = construct_name_of_redis_hash_for_room_rate_limit(
+            command, room_id
+        )
+    keys = []
+    args = [round(time() * 1000)]
+    for scope, key in buckets.items():
+        if scope in limits:
+            keys.append(key)
+            args.extend((limits[scope]["capacity"], limits[scope]["rate"]))
+
+    try:
+        retry_after = await arun_script(
+            get_async_redis_connection(), TOKEN_BUCKET_SCRIPT, keys, args
+        )
+    except RedisError:
+        logger.exception("Failed to check rate limit of %s.", command)
+        metrics.increment("rate_limits.errors")
+        return 0
+
+    if retry_after:
+        metrics.increment(f"rate_limits.throttled.{command}")
+    return retry_after
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from time import perf_counter
+from typing import Dict, Set, Tuple
+
+from django.conf import settings
+
+from chat import metrics
+from chat.db_executor import db_sync_to_async
+from chat.services import mark_messages_read_bulk
+
+logger = logging.getLogger(__name__)
+
+
+class ReadReceiptBuffer:
+    """
+    Collects "user read message" events from consumers and writes them to
+    database in batches, so delivering a message doesn't wait for a database
+    write. Only the newest message per user and room is kept, since read
+    cursor covers all previous messages. Buffer is flushed after flush
+    interval from the first buffered receipt, or right away when it holds
+    batch size receipts. Receipts added before the flush runs can grow the
+    buffer past batch size, so it's written in chunks of batch size, which
+    keeps the number of user and room pairs in a single query bounded.
+
+    Receipts are buffered in process memory, so up to flush interval of them
+    can be lost if the worker crashes. Read cursor is moved again with the
+    next fetched page, so this only delays unread counters.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Dict[Tuple[int, str], int] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Keeps references to running flushes, so they aren't garbage
+        # collected.
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def add(self, user_id: int, room_id: str, message_id: int) -> None:
+        """
+        Buffers receipt and schedules flush.
+        """
+        key = (user_id, room_id)
+        if message_id > self._pending.get(key, 0):
+            self._pending[key] = message_id
+        metrics.set_gauge("read_receipts.queue_depth", self.queue_depth)
+
+        if self.queue_depth >= self.batch_size:
+            self._schedule_flush(0)
+        elif self._flush_handle is None:
+            self._schedule_flush(self.flush_interval)
+
+    async def flush(self) -> None:
+        """
+        Writes all buffered receipts to database, in chunks of batch size.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = list(self._pending.items()), {}
+        metrics.set_gauge("read_receipts.queue_depth", 0)
+        for offset in range(0, len(pending), self.batch_size):
+            await self._write_batch(
+                dict(pending[offset : offset + self.batch_size])
+            )
+
+    async def _write_batch(self, batch: Dict[Tuple[int, str], int]) -> None:
+        start = perf_counter()
+        try:
+            await db_sync_to_async(mark_messages_read_bulk)(batch)
+        except Exception:
+            metrics.increment("read_receipts.dropped", len(batch))
+            logger.exception("Failed to write %s read receipts.", len(batch))
+            return None
+        metrics.observe("read_receipts.flush_latency", perf_counter() - start)
+        metrics.observe("read_receipts.batch_size", len(batch))
+
+    def _schedule_flush(self, delay: float) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_handle = asyncio.get_running_loop().call_later(
+            delay, self._start_flush
+        )
+
+    def _start_flush(self) -> None:
+        self._flush_handle = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+
+read_receipts = ReadReceiptBuffer(
+    flush_interval=settings.READ_RECEIPTS_FLUSH_INTERVAL,
+    batch_size=settings.READ_RECEIPTS_BATCH_SIZE,
+)
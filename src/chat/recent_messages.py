@@ -0,0 +1,190 @@
+import json
+import logging
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from redis import RedisError, WatchError
+
+from chat import metrics
+from chat.models import Message
+from chat.redis import get_redis_connection
+from chat.selectors import (
+    MESSAGES_PAGE_SIZE,
+    get_last_20_messages,
+    get_last_messages,
+)
+from chat.utils import (
+    construct_name_of_redis_key_for_recent_messages_version,
+    construct_name_of_redis_list_for_recent_messages,
+)
+
+logger = logging.getLogger(__name__)
+
+# Last messages of each room are kept in a capped redis list, the newest
+# message first. List always holds exactly the newest messages of the room,
+# so it's either complete or missing. New messages are pushed only to existing
+# lists, missing list is rebuilt from database on read. Every change
+# increments room version, so rebuild that raced with a new message is
+# discarded instead of caching history without it.
+
+
+def _dumps(message: Dict[str, Any]) -> str:
+    return json.dumps(
+        {**message, "timestamp": message["timestamp"].isoformat()}
+    )
+
+
+def _loads(raw_message: bytes) -> Dict[str, Any]:
+    message = json.loads(raw_message)
+    message["timestamp"] = parse_datetime(message["timestamp"])
+    return message
+
+
+def get_recent_messages(room_id_str: str) -> List[Dict[str, Any]]:
+    """
+    Returns last 20 messages in room, in the same form as
+    get_last_20_messages. Messages are read from redis, or from database if
+    they aren't cached, in which case cache is rebuilt.
+    """
+    try:
+        raw_messages = get_redis_connection().lrange(
+            construct_name_of_redis_list_for_recent_messages(room_id_str),
+            0,
+            MESSAGES_PAGE_SIZE - 1,
+        )
+    except RedisError:
+        logger.exception("Failed to read recent messages of %s.", room_id_str)
+        metrics.increment("recent_messages.errors")
+        return get_last_20_messages(room_id_str, "0")
+
+    if raw_messages:
+        metrics.increment("recent_messages.hits")
+        return [
+            _loads(raw_message)
+            for raw_message in reversed(raw_messages)  # type: ignore[arg-type]
+        ]
+
+    metrics.increment("recent_messages.misses")
+    return rebuild_recent_messages(room_id_str)[-MESSAGES_PAGE_SIZE:]
+
+
+def rebuild_recent_messages(room_id_str: str) -> List[Dict[str, Any]]:
+    """
+    Fetches last messages of the room from database, caches and returns them.
+    """
+    redis_connection = get_redis_connection()
+    messages_key = construct_name_of_redis_list_for_recent_messages(
+        room_id_str
+    )
+    with redis_connection.pipeline() as redis_pipeline:
+        try:
+            redis_pipeline.watch(
+                construct_name_of_redis_key_for_recent_messages_version(
+                    room_id_str
+                )
+            )
+        except RedisError:
+            logger.exception(
+                "Failed to rebuild recent messages of %s.", room_id_str
+            )
+            metrics.increment("recent_messages.errors")
+            return get_last_messages(
+                room_id_str, settings.RECENT_MESSAGES_CACHE_SIZE
+            )
+
+        messages = get_last_messages(
+            room_id_str, settings.RECENT_MESSAGES_CACHE_SIZE
+        )
+        # Redis doesn't store empty lists.
+        if not messages:
+            return messages
+
+        try:
+            redis_pipeline.multi()
+            redis_pipeline.delete(messages_key)
+            redis_pipeline.rpush(
+                messages_key,
+                *(_dumps(message) for message in reversed(messages)),
+            )
+            redis_pipeline.expire(
+                messages_key, settings.RECENT_MESSAGES_CACHE_TTL
+            )
+            redis_pipeline.execute()
+        except WatchError:
+            # Room changed during rebuild, the next read will rebuild again.
+            pass
+        except RedisError:
+            logger.exception(
+                "Failed to rebuild recent messages of %s.", room_id_str
+            )
+            metrics.increment("recent_messages.errors")
+
+    return messages
+
+
+def cache_recent_message(message: Message) -> None:
+    """
+    Pushes new message to the room last messages, if they are cached.
+    """
+    room_id_str = str(message.room_id)
+    messages_key = construct_name_of_redis_list_for_recent_messages(
+        room_id_str
+    )
+    version_key = construct_name_of_redis_key_for_recent_messages_version(
+        room_id_str
+    )
+    try:
+        with get_redis_connection().pipeline() as redis_pipeline:
+            redis_pipeline.incr(version_key)
+            redis_pipeline.expire(
+                version_key, settings.RECENT_MESSAGES_CACHE_TTL
+            )
+            redis_pipeline.lpushx(
+                messages_key,
+                _dumps(
+                    {
+                        "id": message.id,
+                        "author__username": message.author.username,
+                        "content": message.content,
+                        "timestamp": message.timestamp,
+                    }
+                ),
+            )
+            redis_pipeline.ltrim(
+                messages_key, 0, settings.RECENT_MESSAGES_CACHE_SIZE - 1
+            )
+            redis_pipeline.expire(
+                messages_key, settings.RECENT_MESSAGES_CACHE_TTL
+            )
+            redis_pipeline.execute()
+    except RedisError:
+        logger.exception("Failed to cache message %s.", message.id)
+        metrics.increment("recent_messages.errors")
+        # Cached messages would be missing this one.
+        invalidate_recent_messages(room_id_str)
+
+
+def invalidate_recent_messages(room_id_str: str) -> None:
+    """
+    Removes cached last messages of the room, e.g. after a message was edited
+    or deleted. They will be rebuilt on next read.
+    """
+    version_key = construct_name_of_redis_key_for_recent_messages_version(
+        room_id_str
+    )
+    try:
+        with get_redis_connection().pipeline() as redis_pipeline:
+            redis_pipeline.incr(version_key)
+            redis_pipeline.expire(
+                version_key, settings.RECENT_MESSAGES_CACHE_TTL
+            )
+            redis_pipeline.delete(
+                construct_name_of_redis_list_for_recent_messages(room_id_str)
+            )
+            redis_pipeline.execute()
+    except RedisError:
+        logger.exception(
+            "Failed to invalidate recent messages of %s.", room_id_str
+        )
+        metrics.increment("recent_messages.errors")
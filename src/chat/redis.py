@@ -1,7 +1,13 @@
 from functools import lru_cache
+from hashlib import sha1
 from os import getenv
+from typing import Any, Dict, List
 
+from django.conf import settings
 from redis import Redis, from_url
+from redis.exceptions import NoScriptError
+from redis.asyncio import BlockingConnectionPool
+from redis.asyncio import Redis as AsyncRedis
 
 
 @lru_cache(maxsize=1)
@@ -12,4 +18,69 @@ def get_redis_connection() -> Redis:
     """
     if getenv("REDIS_URL", "").split("://")[0] == "rediss":
         return from_url(getenv("REDIS_URL", ""), ssl_cert_reqs=None)
-    return from_url(getenv("REDIS_URL", ""))
\ No newline at end of file
+    return from_url(getenv("REDIS_URL", ""))
+
+
+@lru_cache(maxsize=1)
+def get_async_redis_connection() -> AsyncRedis:
+    """
+    Creates asyncio redis client during first call and returns it. During next
+    call cached value will be returned. Client uses bounded pool, so when all
+    connections are in use, callers wait for a free one instead of opening
+    new, and connections idle for longer than health check interval are
+    checked before use.
+    """
+    connection_kwargs: Dict[str, Any] = {
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "timeout": settings.REDIS_POOL_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+    if getenv("REDIS_URL", "").split("://")[0] == "rediss":
+        connection_kwargs["ssl_cert_reqs"] = None
+
+    return AsyncRedis(
+        connection_pool=BlockingConnectionPool.from_url(
+            getenv("REDIS_URL", ""), **connection_kwargs
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_script_sha(script: str) -> str:
+    return sha1(script.encode()).hexdigest()
+
+
+def run_script(
+    redis_connection: Redis, script: str, keys: List[str], args: List[Any]
+) -> Any:
+    """
+    Runs Lua script by its SHA1 digest, so script itself is sent only when
+    server doesn't have it cached yet, e.g. after restart.
+    """
+    keys_and_args: List[Any] = [*keys, *args]
+    try:
+        return redis_connection.evalsha(
+            _get_script_sha(script), len(keys), *keys_and_args
+        )
+    except NoScriptError:
+        return redis_connection.eval(script, len(keys), *keys_and_args)
+
+
+async def arun_script(
+    redis_connection: AsyncRedis,
+    script: str,
+    keys: List[str],
+    args: List[Any],
+) -> Any:
+    """
+    Async version of run_script.
+    """
+    keys_and_args: List[Any] = [*keys, *args]
+    try:
+        return await redis_connection.evalsha(  # type: ignore[misc]
+            _get_script_sha(script), len(keys), *keys_and_args
+        )
+    except NoScriptError:
+        return await redis_connection.eval(  # type: ignore[misc]
+            script, len(keys), *keys_and_args
+        )
@@ -0,0 +1,147 @@
+import logging
+from typing import Any, Set
+from uuid import UUID
+
+from django.conf import settings
+from redis import RedisError, WatchError
+
+from chat import metrics
+from chat.db_executor import db_sync_to_async
+from chat.models import ChatRoom
+from chat.redis import get_async_redis_connection, get_redis_connection
+from chat.utils import (
+    construct_name_of_redis_key_for_room_members_version,
+    construct_name_of_redis_set_for_room_members,
+)
+
+logger = logging.getLogger(__name__)
+
+# Auto-created model of ChatRoom.members, django-stubs types it as a plain
+# model without manager.
+Membership: Any = ChatRoom.members.through
+
+# Ids of room members are kept in a redis set, filled on the first membership
+# check. Set is removed whenever members change and every change increments
+# room members version, so filling that raced with a change is discarded
+# instead of caching members without the new one.
+
+
+def _get_members_ids(room_id: UUID) -> Set[int]:
+    return set(
+        Membership.objects.filter(chatroom_id=room_id).values_list(
+            "user_id", flat=True
+        )
+    )
+
+
+def is_room_member(user_id: int, room_id: UUID) -> bool:
+    """
+    Returns True if user is a member of the room. Uses cached members ids, or
+    database if they aren't cached, in which case cache is filled.
+    """
+    members_key = construct_name_of_redis_set_for_room_members(room_id)
+    try:
+        with get_redis_connection().pipeline() as redis_pipeline:
+            redis_pipeline.exists(members_key)
+            redis_pipeline.sismember(members_key, str(user_id))
+            is_cached, is_member = redis_pipeline.execute()
+    except RedisError:
+        logger.exception("Failed to read members of %s.", room_id)
+        metrics.increment("room_members.errors")
+        return Membership.objects.filter(
+            chatroom_id=room_id, user_id=user_id
+        ).exists()
+
+    if is_cached:
+        metrics.increment("room_members.hits")
+        return bool(is_member)
+
+    metrics.increment("room_members.misses")
+    return user_id in cache_room_members(room_id)
+
+
+async def ais_room_member(user_id: int, room_id: UUID) -> bool:
+    """
+    Async version of is_room_member. Filling cache runs in database threads
+    pool, cache hits are served without leaving the event loop.
+    """
+    members_key = construct_name_of_redis_set_for_room_members(room_id)
+    try:
+        async with get_async_redis_connection().pipeline() as redis_pipeline:
+            redis_pipeline.exists(members_key)
+            redis_pipeline.sismember(members_key, str(user_id))
+            is_cached, is_member = await redis_pipeline.execute()
+    except RedisError:
+        logger.exception("Failed to read members of %s.", room_id)
+        metrics.increment("room_members.errors")
+        return await Membership.objects.filter(
+            chatroom_id=room_id, user_id=user_id
+        ).aexists()
+
+    if is_cached:
+        metrics.increment("room_members.hits")
+        return bool(is_member)
+
+    metrics.increment("room_members.misses")
+    return user_id in await db_sync_to_async(cache_room_members)(room_id)
+
+
+def cache_room_members(room_id: UUID) -> Set[int]:
+    """
+    Fetches ids of room members from database, caches and returns them.
+    """
+    redis_connection = get_redis_connection()
+    members_key = construct_name_of_redis_set_for_room_members(room_id)
+    with redis_connection.pipeline() as redis_pipeline:
+        try:
+            redis_pipeline.watch(
+                construct_name_of_redis_key_for_room_members_version(room_id)
+            )
+        except RedisError:
+            logger.exception("Failed to cache members of %s.", room_id)
+            metrics.increment("room_members.errors")
+            return _get_members_ids(room_id)
+
+        members_ids = _get_members_ids(room_id)
+        # Redis doesn't store empty sets, room without members doesn't exist
+        # or is about to get its first member.
+        if not members_ids:
+            return members_ids
+
+        try:
+            redis_pipeline.multi()
+            redis_pipeline.delete(members_key)
+            redis_pipeline.sadd(members_key, *members_ids)
+            redis_pipeline.expire(
+                members_key, settings.ROOM_MEMBERS_CACHE_TTL
+            )
+            redis_pipeline.execute()
+        except WatchError:
+            # Members changed during filling, the next check will fill again.
+            pass
+        except RedisError:
+            logger.exception("Failed to cache members of %s.", room_id)
+            metrics.increment("room_members.errors")
+
+    return members_ids
+
+
+def invalidate_room_members(room_id: UUID) -> None:
+    """
+    Removes cached members ids of the room. Has to be called whenever room
+    members change.
+    """
+    version_key = construct_name_of_redis_key_for_room_members_version(
+        room_id
+    )
+    try:
+        with get_redis_connection().pipeline() as redis_pipeline:
+            redis_pipeline.incr(version_key)
+            redis_pipeline.expire(version_key, settings.ROOM_MEMBERS_CACHE_TTL)
+            redis_pipeline.delete(
+                construct_name_of_redis_set_for_room_members(room_id)
+            )
+            redis_pipeline.execute()
+    except RedisError:
+        logger.exception("Failed to invalidate members of %s.", room_id)
+        metrics.increment("room_members.errors")
@@ -6,4 +6,6 @@ websocket_urlpatterns = [
     re_path(
         r"ws/chat/(?P<room_id>(\w|-)+)/$", consumers.ChatConsumer.as_asgi()
     ),
+    # Single socket of the user for all rooms
+    re_path(r"ws/chat/$", consumers.UserChatConsumer.as_asgi()),
 ]
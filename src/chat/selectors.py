@@ -1,36 +1,101 @@
-from typing import Any, List
+from time import time
+from typing import Any, Dict, Iterable, List
 from uuid import UUID
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
-from django.db.models import QuerySet
-from django.db.transaction import atomic
+from django.db.models import (
+    BigIntegerField,
+    Count,
+    F,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    Window,
+)
+from django.db.models.functions import Coalesce, RowNumber
 
-from chat.models import ChatRoom, Message
-from chat.redis import get_redis_connection
-from chat.utils import construct_name_of_redis_list_for_channel_name
+from chat.models import ChatRoom, Message, ReadState
+from chat.presence import COUNT_CHANNELS_SCRIPT, GET_CHANNELS_SCRIPT
+from chat.redis import (
+    arun_script,
+    get_async_redis_connection,
+    get_redis_connection,
+    run_script,
+)
+from chat.room_members import Membership, ais_room_member, is_room_member
+from chat.utils import (
+    construct_name_of_redis_sorted_set_for_channels_names,
+    decode_messages_cursor,
+)
+
+
+MESSAGES_PAGE_SIZE = 20
 
 
 def get_last_20_messages(
-    room_id_str: str, username: str, offset: str
-) -> List[Message] | None:
+    room_id_str: str, offset: str, before: str | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Returns last 20 messages in room as dicts with id, author username, content
+    and timestamp, so no model instances are built and no author is fetched
+    per message. Messages are taken before the cursor if it's given, otherwise
+    with offset. Offset is kept for clients that don't use cursors yet.
+    """
+    room_messages = _room_messages_values(room_id_str)
+    if before is None:
+        page = room_messages[int(offset) : int(offset) + MESSAGES_PAGE_SIZE]
+    elif cursor := decode_messages_cursor(before):
+        timestamp, message_id = cursor
+        page = room_messages.filter(
+            Q(timestamp__lt=timestamp)
+            | Q(timestamp=timestamp, id__lt=message_id)
+        )[:MESSAGES_PAGE_SIZE]
+    else:
+        page = room_messages.none()
+
+    return list(page[::-1])
+
+
+def get_messages_after(room_id_str: str, after: str) -> List[Dict[str, Any]]:
     """
-    Returns last 20 messages with offset in room and removes them from unread table.
+    Returns first 20 messages in room after the cursor, oldest first, in the
+    same form as get_last_20_messages. Returns empty list if cursor is invalid.
     """
-    room_id_UUID = UUID(room_id_str)
-    with atomic():
-        messages = list(
-            Message.objects.filter(room=room_id_UUID).order_by("-timestamp")[
-                int(offset) : int(offset) + 20
-            ][::-1]
+    cursor = decode_messages_cursor(after)
+    if cursor is None:
+        return []
+
+    timestamp, message_id = cursor
+    return list(
+        _room_messages_values(room_id_str)
+        .filter(
+            Q(timestamp__gt=timestamp)
+            | Q(timestamp=timestamp, id__gt=message_id)
         )
+        .order_by("timestamp", "id")[:MESSAGES_PAGE_SIZE]
+    )
+
+
+def get_last_messages(
+    room_id_str: str, num_messages: int
+) -> List[Dict[str, Any]]:
+    """
+    Returns given number of last messages in room, in the same form as
+    get_last_20_messages.
+    """
+    return list(_room_messages_values(room_id_str)[:num_messages][::-1])
 
-        user = get_user(username)
-        if user is not None:
-            for message in messages:
-                message.unread_by.remove(user)
 
-    return None if user is None else messages
+def _room_messages_values(room_id_str: str) -> QuerySet:
+    return (
+        Message.objects.filter(room=UUID(room_id_str))
+        .order_by("-timestamp", "-id")
+        .values("id", "author__username", "content", "timestamp")
+    )
 
 
 def get_user(username: str) -> User | None:
@@ -47,6 +112,22 @@ def get_room(room_id: str) -> ChatRoom | None:
     return ChatRoom.objects.filter(id=room_id).first()
 
 
+async def aget_user(username: str) -> User | None:
+    """
+    Async version of get_user.
+    Public API, it has no caller in the app yet.
+    """
+    return await get_user_model().objects.filter(username=username).afirst()
+
+
+async def aget_room(room_id: str) -> ChatRoom | None:
+    """
+    Async version of get_room.
+    Public API, it has no caller in the app yet.
+    """
+    return await ChatRoom.objects.filter(id=room_id).afirst()
+
+
 def get_user_chats(user: User) -> QuerySet[ChatRoom]:
     """
     Returns all chats in which the user is a member.
@@ -68,22 +149,178 @@ def get_last_message(chat_room: ChatRoom) -> Message | None:
     return chat_room.message.order_by("-timestamp").first()
 
 
+def last_read_message_id(user: User, room: ChatRoom | OuterRef) -> Coalesce:
+    """
+    Returns expression with id of the last message read by user in the room,
+    0 if user hasn't read any message.
+    """
+    return Coalesce(
+        Subquery(
+            ReadState.objects.filter(
+                user=user, room=room  # type: ignore[misc]
+            ).values("last_read_message_id")[:1]
+        ),
+        Value(0),
+        output_field=BigIntegerField(),
+    )
+
+
+def annotate_chats_list(
+    chat_rooms: QuerySet[ChatRoom], user: User
+) -> QuerySet[ChatRoom]:
+    """
+    Joins chat rooms with their last message, annotates them with amount of
+    unread messages, and orders them by last activity. Everything is computed
+    by the database in a single query.
+    """
+    unread_messages = (
+        Message.objects.filter(
+            room=OuterRef("pk"), id__gt=OuterRef("last_read_msg_id")
+        )
+        .exclude(author=user)
+        .values("room")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+
+    return (
+        chat_rooms.select_related("last_message")
+        .annotate(last_read_msg_id=last_read_message_id(user, OuterRef("pk")))
+        .annotate(num_unread_msgs=Coalesce(Subquery(unread_messages), 0))
+        .order_by(F("last_activity_at").desc(nulls_last=True), "-created")
+    )
+
+
+def get_rooms_3_members(room_ids: Iterable[UUID]) -> Dict[UUID, str]:
+    """
+    Returns mapping of room id to its first 3 or less members as a string. All
+    rooms are handled by a single query.
+    """
+    ranked_members = (
+        Membership.objects.filter(chatroom_id__in=room_ids)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("chatroom_id"),
+                order_by=F("id").asc(),
+            )
+        )
+        .filter(position__lte=3)
+        .order_by("chatroom_id", "position")
+        .values_list("chatroom_id", "user__username")
+    )
+
+    members: Dict[UUID, List[str]] = {}
+    for room_id, username in ranked_members:
+        members.setdefault(room_id, []).append(username)
+
+    return {
+        room_id: ", ".join(usernames) for room_id, usernames in members.items()
+    }
+
+
 def get_users_channels(
     chat_members: list[User] | QuerySet[User],
 ) -> list[list[Any | bytes]]:
     """
-    Retrieves all channels names for user in one transaction and returns them.
+    Retrieves live channels names, that sent heartbeat within presence
+    timeout, of all users in a single script call and returns them.
+    Public API, it has no caller in the app yet.
     """
-    redis_connection = get_redis_connection()
-    with redis_connection.pipeline() as redis_pipeline:
-        for user_obj in chat_members:
-            redis_pipeline.lrange(
-                construct_name_of_redis_list_for_channel_name(user_obj.pk),
-                0,
-                -1,
-            )
+    keys = [
+        construct_name_of_redis_sorted_set_for_channels_names(user_obj.pk)
+        for user_obj in chat_members
+    ]
+    if not keys:
+        return []
+
+    return run_script(
+        get_redis_connection(),
+        GET_CHANNELS_SCRIPT,
+        keys,
+        [time() - settings.PRESENCE_TIMEOUT],
+    )
 
-        return redis_pipeline.execute()
+
+async def aget_users_channels(
+    chat_members: list[User] | QuerySet[User],
+) -> list[list[Any | bytes]]:
+    """
+    Async version of get_users_channels.
+    Public API, it has no caller in the app yet.
+    """
+    keys = [
+        construct_name_of_redis_sorted_set_for_channels_names(user_obj.pk)
+        for user_obj in chat_members
+    ]
+    if not keys:
+        return []
+
+    return await arun_script(
+        get_async_redis_connection(),
+        GET_CHANNELS_SCRIPT,
+        keys,
+        [time() - settings.PRESENCE_TIMEOUT],
+    )
+
+
+def get_online_users_ids(users_ids: Iterable[int]) -> List[int]:
+    """
+    Returns ids of users that have at least one live channel. Channels of all
+    users are counted in a single script call.
+    """
+    users_ids = list(users_ids)
+    if not users_ids:
+        return []
+
+    num_channels = run_script(
+        get_redis_connection(),
+        COUNT_CHANNELS_SCRIPT,
+        [
+            construct_name_of_redis_sorted_set_for_channels_names(user_id)
+            for user_id in users_ids
+        ],
+        [time() - settings.PRESENCE_TIMEOUT],
+    )
+
+    return [
+        user_id
+        for user_id, user_num_channels in zip(users_ids, num_channels)
+        if user_num_channels
+    ]
+
+
+async def aget_online_users_ids(users_ids: Iterable[int]) -> List[int]:
+    """
+    Async version of get_online_users_ids.
+    """
+    users_ids = list(users_ids)
+    if not users_ids:
+        return []
+
+    num_channels = await arun_script(
+        get_async_redis_connection(),
+        COUNT_CHANNELS_SCRIPT,
+        [
+            construct_name_of_redis_sorted_set_for_channels_names(user_id)
+            for user_id in users_ids
+        ],
+        [time() - settings.PRESENCE_TIMEOUT],
+    )
+
+    return [
+        user_id
+        for user_id, user_num_channels in zip(users_ids, num_channels)
+        if user_num_channels
+    ]
+
+
+def get_online_members(room_obj: ChatRoom) -> List[str]:
+    """
+    Returns usernames of chat members that are online.
+    """
+    members = dict(room_obj.members.values_list("id", "username"))
+    return sorted(members[user_id] for user_id in get_online_users_ids(members))
 
 
 def get_chat_members(room_obj: ChatRoom) -> QuerySet[User]:
@@ -93,13 +330,61 @@ def get_chat_members(room_obj: ChatRoom) -> QuerySet[User]:
     return room_obj.members.all()
 
 
-def is_chat_member(user_id: int, room_id: str) -> bool:
+def get_chat_members_ids(room_id: UUID | str) -> QuerySet:
+    """
+    Returns ids of all chat members. Room isn't fetched, ids are read from
+    members table only.
+    """
+    return Membership.objects.filter(chatroom_id=room_id).values_list(
+        "user_id", flat=True
+    )
+
+
+async def aget_chat_members(room_obj: ChatRoom) -> List[User]:
+    """
+    Async version of get_chat_members.
+    Public API, it has no caller in the app yet.
+    """
+    return [user async for user in room_obj.members.all()]
+
+
+async def aget_chat_members_ids(room_id: UUID | str) -> List[int]:
     """
-    Returns True if user is a member of chat room, False otherwise.
+    Async version of get_chat_members_ids.
+    Public API, it has no caller in the app yet.
     """
-    if room := get_room(room_id):
-        return room.members.filter(id=user_id).exists()
-    return False
+    return [user_id async for user_id in get_chat_members_ids(room_id)]
+
+
+def is_chat_member(user_id: int | None, room_id: str | UUID) -> bool:
+    """
+    Returns True if user is a member of chat room, False otherwise. Room
+    members are cached, see is_room_member.
+    """
+    if user_id is None:
+        return False
+    try:
+        room_uuid = UUID(str(room_id))
+    except ValueError:
+        return False
+
+    return is_room_member(user_id, room_uuid)
+
+
+async def ais_chat_member(user_id: int | None, room_id: str | UUID) -> bool:
+    """
+    Async version of is_chat_member. Cached members are read with asyncio
+    redis client, so checking membership doesn't leave the event loop unless
+    members aren't cached yet.
+    """
+    if user_id is None:
+        return False
+    try:
+        room_uuid = UUID(str(room_id))
+    except ValueError:
+        return False
+
+    return await ais_room_member(user_id, room_uuid)
 
 
 def count_unread_msgs(room: ChatRoom, user: User, current_room_id: str) -> int:
@@ -110,11 +395,11 @@ def count_unread_msgs(room: ChatRoom, user: User, current_room_id: str) -> int:
     # Since messages are being retrieved after page is loaded, unread counter
     # isn't updated yet. That's why you need to check if room is the current
     # page room.
-    if room.id == current_room_id:
+    if str(room.id) == str(current_room_id):
         return 0
 
-    messages_ids = room.message.values_list("id", flat=True)
-    return Message.objects.filter(
-        id__in=messages_ids,
-        unread_by=user,
-    ).count()
+    return (
+        room.message.exclude(author=user)
+        .filter(id__gt=last_read_message_id(user, room))
+        .count()
+    )
@@ -1,21 +1,193 @@
-from typing import Dict, List
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import msgpack
 
 from chat.models import Message
+from chat.selectors import MESSAGES_PAGE_SIZE
+from chat.utils import encode_messages_cursor
 
 
-def messages_to_json(messages: List[Message]) -> List[Dict[str, str]]:
+def messages_to_json(
+    messages: List[Dict[str, Any]],
+) -> List[Dict[str, str | int]]:
     """
-    Serializes messages to JSON.
+    Serializes messages fetched as dicts, see get_last_20_messages, to JSON.
     """
-    return [message_to_json(message) for message in messages]
+    return [
+        {
+            "id": message["id"],
+            "author": message["author__username"],
+            "content": message["content"],
+            "timestamp": str(message["timestamp"]),
+        }
+        for message in messages
+    ]
 
 
-def message_to_json(message: Message) -> Dict[str, str]:
+def message_to_json(message: Message) -> Dict[str, str | int]:
     """
     Serializes a message to JSON.
     """
     return {
+        "id": message.id,
         "author": message.author.username,
         "content": message.content,
         "timestamp": str(message.timestamp),
     }
+
+
+def next_messages_cursor(messages: List[Dict[str, Any]]) -> str | None:
+    """
+    Returns cursor of the page preceding messages or None if there are no
+    older messages.
+    """
+    if len(messages) < MESSAGES_PAGE_SIZE:
+        return None
+    return encode_messages_cursor(messages[0]["timestamp"], messages[0]["id"])
+
+
+def next_missed_messages_cursor(
+    messages: List[Dict[str, Any]],
+) -> str | None:
+    """
+    Returns cursor after which the next page of missed messages starts, see
+    get_messages_after, or None if there are no newer messages.
+    """
+    if len(messages) < MESSAGES_PAGE_SIZE:
+        return None
+    return encode_messages_cursor(
+        messages[-1]["timestamp"], messages[-1]["id"]
+    )
+
+
+def message_json_cursor(message_json: Dict[str, Any]) -> str:
+    """
+    Returns cursor of the message serialized by message_to_json.
+    """
+    return encode_messages_cursor(
+        datetime.fromisoformat(message_json["timestamp"]), message_json["id"]
+    )
+
+
+# Query string parameter of clients that accept batch frames, e.g.
+# /ws/chat/?batch=1. Group messages to other clients aren't coalesced, see
+# OUTBOUND_COALESCE_WINDOW.
+BATCH_FRAMES_PARAM = "batch"
+
+# Query string parameter of clients that acknowledge received frames with
+# the ack command, e.g. /ws/chat/?ack=1. Only outbound frames of these clients
+# are bounded, see OUTBOUND_UNACKED_FRAMES.
+ACK_FRAMES_PARAM = "ack"
+
+# WebSocket subprotocol of clients that exchange MessagePack frames instead
+# of JSON. Keys of these frames are shortened and timestamps are numbers of
+# milliseconds since epoch.
+MSGPACK_SUBPROTOCOL = "chat.msgpack.v1"
+MSGPACK_KEYS = {
+    "after": "af",
+    "author": "a",
+    "before": "b",
+    "command": "c",
+    "content": "t",
+    "frames": "fs",
+    "from": "f",
+    "id": "i",
+    "message": "m",
+    "messages": "ms",
+    "msgs_offset": "o",
+    "next_cursor": "n",
+    "resume_token": "rt",
+    "resume_tokens": "rts",
+    "retry_after": "ra",
+    "room_id": "r",
+    "throttled_command": "tc",
+    "timestamp": "ts",
+    "username": "u",
+}
+MSGPACK_KEYS_EXPANDED = {
+    short_key: key for key, short_key in MSGPACK_KEYS.items()
+}
+
+
+def _to_msgpack_value(value: Any, key: str | None = None) -> Any:
+    if key == "timestamp" and isinstance(value, str):
+        return round(datetime.fromisoformat(value).timestamp() * 1000)
+    if isinstance(value, dict):
+        return {
+            MSGPACK_KEYS.get(item_key, item_key): _to_msgpack_value(
+                item, item_key
+            )
+            for item_key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_to_msgpack_value(item) for item in value]
+    return value
+
+
+def encode_json_frame(content: Dict[str, Any]) -> str:
+    """
+    Encodes content sent to WebSocket as JSON text frame.
+    """
+    return json.dumps(content)
+
+
+def encode_msgpack_frame(content: Dict[str, Any]) -> bytes:
+    """
+    Encodes content sent to WebSocket as MessagePack binary frame, with short
+    keys and timestamps in milliseconds since epoch.
+    """
+    return msgpack.packb(_to_msgpack_value(content))
+
+
+# Number of last JSON frames transcoded to MessagePack kept in the worker
+TRANSCODED_FRAMES_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=TRANSCODED_FRAMES_CACHE_SIZE)
+def transcode_json_frame(frame: str) -> bytes:
+    """
+    Encodes JSON frame as MessagePack frame, see encode_msgpack_frame. Group
+    messages are encoded as JSON only, each MessagePack receiver transcodes
+    it, so the frame is transcoded once per worker and reused by the rest of
+    them.
+    """
+    return encode_msgpack_frame(json.loads(frame))
+
+
+def decode_msgpack_frame(frame: bytes) -> Dict[str, Any]:
+    """
+    Decodes MessagePack binary frame received from WebSocket and expands its
+    keys, so it's the same as JSON frame.
+    """
+    return {
+        MSGPACK_KEYS_EXPANDED.get(key, key): value
+        for key, value in msgpack.unpackb(frame).items()
+    }
+
+
+def encode_json_batch_frame(frames: List[str]) -> str:
+    """
+    Joins JSON frames into a single batch frame, without decoding them.
+    """
+    return '{"command": "batch", "frames": [' + ", ".join(frames) + "]}"
+
+
+def encode_msgpack_batch_frame(frames: List[bytes]) -> bytes:
+    """
+    Joins MessagePack frames into a single batch frame, without decoding
+    them.
+    """
+    packer = msgpack.Packer()
+    return b"".join(
+        (
+            packer.pack_map_header(2),
+            packer.pack(MSGPACK_KEYS["command"]),
+            packer.pack("batch"),
+            packer.pack(MSGPACK_KEYS["frames"]),
+            packer.pack_array_header(len(frames)),
+            *frames,
+        )
+    )
@@ -1,16 +1,42 @@
-from typing import List, Tuple
+from time import time
+from typing import Any, Dict, Iterable, List, Tuple
 from uuid import UUID
 
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import QuerySet
-from django.db.transaction import atomic
+from django.db.models import BigIntegerField, Case, Q, QuerySet, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.transaction import atomic, on_commit
 from django.utils.dateparse import parse_datetime
 
-from chat.models import ChatRoom, Message
-from chat.redis import get_redis_connection
-from chat.selectors import count_unread_msgs, get_3_members, get_last_message
-from chat.utils import construct_name_of_redis_list_for_channel_name
+from chat.models import ChatRoom, Message, ReadState
+from chat.presence import (
+    PRUNE_CHANNELS_SCRIPT,
+    REMOVE_CHANNEL_SCRIPT,
+    SAVE_CHANNEL_SCRIPT,
+)
+from chat.recent_messages import cache_recent_message, get_recent_messages
+from chat.redis import (
+    arun_script,
+    get_async_redis_connection,
+    get_redis_connection,
+    run_script,
+)
+from chat.selectors import (
+    annotate_chats_list,
+    get_chat_members_ids,
+    get_last_20_messages,
+    get_messages_after,
+    get_rooms_3_members,
+)
+from chat.serializers import message_to_json
+from chat.utils import (
+    construct_name_of_redis_sorted_set_for_channels_names,
+    construct_user_group_name,
+    parse_user_id_from_redis_sorted_set_for_channels_names,
+)
 
 
 def chats_list(
@@ -19,80 +45,312 @@ def chats_list(
     """
     Retrieves chat rooms id, name, last message object, amount of unread
     messages, mappers it together, sorts by last message or chat creation and
-    returns.
-    """
-    chats_and_msgs = []
-    for chat_room in chat_rooms:
-        room_id = chat_room.id
-        room_name = chat_room.room_name or get_3_members(chat_room)
-        room_last_msg = get_last_message(chat_room)
-        num_unread_messages = count_unread_msgs(
-            chat_room, user, current_room_id
-        )
+    returns. Number of queries doesn't depend on number of chat rooms.
+    """
+    chat_rooms = annotate_chats_list(chat_rooms, user)
 
-        chats_and_msgs.append(
-            (room_id, room_name, room_last_msg, num_unread_messages)
+    rooms_members = get_rooms_3_members(
+        [room.id for room in chat_rooms if not room.room_name]
+    )
+
+    return [
+        (
+            room.id,
+            room.room_name or rooms_members.get(room.id) or "",
+            room.last_message,
+            # Since messages are being retrieved after page is loaded, unread
+            # counter isn't updated yet. That's why current page room is
+            # always shown as read.
+            0
+            if str(room.id) == str(current_room_id)
+            else room.num_unread_msgs,  # type: ignore[attr-defined]
         )
+        for room in chat_rooms
+    ]
+
 
-    return sorted(
-        chats_and_msgs,
-        key=lambda el: (
-            el[2].timestamp
-            if el[2] is not None
-            else chat_rooms[chats_and_msgs.index(el)].created
-        ),
-        reverse=True,
+def save_channel_name(user_id: str, channel_name: str) -> List[bytes]:
+    """
+    Saves channel name with current time as its last heartbeat, removes stale
+    channels and updates TTL in a single script call. Returns live channels
+    names of the user. Called when channel connects and on each heartbeat.
+    """
+    now = time()
+    return run_script(
+        get_redis_connection(),
+        SAVE_CHANNEL_SCRIPT,
+        [construct_name_of_redis_sorted_set_for_channels_names(user_id)],
+        [
+            channel_name,
+            now,
+            now - settings.PRESENCE_TIMEOUT,
+            settings.USERS_CHANNELS_NAMES_TTL,
+        ],
     )
 
 
-def save_channel_name(user_id: str, channel_name: str) -> None:
+def remove_channel_name(user_id: str, channel_name: str) -> List[bytes]:
     """
-    Appends redis list from the head with channel name and updates TTL.
+    Removes channel name and stale channels from user's channels. Returns live
+    channels names of the user.
     """
-    redis_connection = get_redis_connection()
-    redis_key_name = construct_name_of_redis_list_for_channel_name(user_id)
-    with redis_connection.pipeline() as redis_pipeline:
-        redis_pipeline.lpush(
-            redis_key_name,
+    return run_script(
+        get_redis_connection(),
+        REMOVE_CHANNEL_SCRIPT,
+        [construct_name_of_redis_sorted_set_for_channels_names(user_id)],
+        [channel_name, time() - settings.PRESENCE_TIMEOUT],
+    )
+
+
+async def asave_channel_name(user_id: str, channel_name: str) -> List[bytes]:
+    """
+    Async version of save_channel_name.
+    """
+    now = time()
+    return await arun_script(
+        get_async_redis_connection(),
+        SAVE_CHANNEL_SCRIPT,
+        [construct_name_of_redis_sorted_set_for_channels_names(user_id)],
+        [
             channel_name,
+            now,
+            now - settings.PRESENCE_TIMEOUT,
+            settings.USERS_CHANNELS_NAMES_TTL,
+        ],
+    )
+
+
+async def aremove_channel_name(
+    user_id: str, channel_name: str
+) -> List[bytes]:
+    """
+    Async version of remove_channel_name.
+    """
+    return await arun_script(
+        get_async_redis_connection(),
+        REMOVE_CHANNEL_SCRIPT,
+        [construct_name_of_redis_sorted_set_for_channels_names(user_id)],
+        [channel_name, time() - settings.PRESENCE_TIMEOUT],
+    )
+
+
+def sweep_stale_channels() -> int:
+    """
+    Removes channels that didn't send heartbeat within presence timeout, e.g.
+    because the server that handled them crashed and they were never
+    disconnected, from users' channels and users' groups. Returns number of
+    removed channels.
+    """
+    redis_connection = get_redis_connection()
+    channel_layer = get_channel_layer()
+    alive_since = time() - settings.PRESENCE_TIMEOUT
+    num_removed = 0
+    for redis_key_name in redis_connection.scan_iter(
+        match=construct_name_of_redis_sorted_set_for_channels_names("*")
+    ):
+        stale_channels_names = run_script(
+            redis_connection,
+            PRUNE_CHANNELS_SCRIPT,
+            [redis_key_name],
+            [alive_since],
         )
-        redis_pipeline.expire(
-            redis_key_name, settings.USERS_CHANNELS_NAMES_TTL
+
+        user_group_name = construct_user_group_name(
+            parse_user_id_from_redis_sorted_set_for_channels_names(
+                redis_key_name.decode()
+            )
         )
+        for channel_name in stale_channels_names:
+            async_to_sync(channel_layer.group_discard)(
+                user_group_name, channel_name.decode()
+            )
+        num_removed += len(stale_channels_names)
 
-        redis_pipeline.execute()
+    return num_removed
 
 
-def remove_channel_name(user_id: str, channel_name: str) -> None:
+def create_read_states(room_obj: ChatRoom, users: Iterable[User]) -> None:
     """
-    Removes specified element from redis list.
+    Creates read cursors of new room members. Messages sent before user joined
+    the room are treated as read. Existing cursors are left untouched.
     """
-    redis_connection = get_redis_connection()
-    redis_connection.lrem(
-        construct_name_of_redis_list_for_channel_name(user_id),
-        -1,
-        channel_name,
+    ReadState.objects.bulk_create(
+        [
+            ReadState(
+                user=user,
+                room=room_obj,
+                last_read_message_id=room_obj.last_message_id,
+            )
+            for user in users
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def mark_messages_read(user: User, room_id: UUID, message_id: int) -> None:
+    """
+    Marks all room messages up to the message as read by user with a single
+    conditional update of user read cursor. Cursor is never moved back. Second
+    statement is only needed if user has no cursor in this room yet.
+    """
+    cursor_moved = (
+        ReadState.objects.filter(user=user, room_id=room_id)
+        .filter(
+            Q(last_read_message__isnull=True)
+            | Q(last_read_message_id__lt=message_id)
+        )
+        .update(last_read_message_id=message_id)
     )
+    if not cursor_moved:
+        # Either cursor is already ahead or doesn't exist. In the first case
+        # insert is ignored.
+        ReadState.objects.bulk_create(
+            [
+                ReadState(
+                    user=user,
+                    room_id=room_id,
+                    last_read_message_id=message_id,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def mark_messages_read_bulk(
+    read_messages: Dict[Tuple[int, str], int]
+) -> None:
+    """
+    Marks messages as read for many users and rooms at once. Takes mapping of
+    (user id, room id) to the newest read message id. Cursors are moved
+    forward with a single update and missing cursors are created with a
+    single insert.
+    """
+    if not read_messages:
+        return None
+
+    pairs_filter = Q()
+    new_cursors = []
+    for (user_id, room_id), message_id in read_messages.items():
+        pairs_filter |= Q(user_id=user_id, room_id=room_id)
+        new_cursors.append(
+            When(user_id=user_id, room_id=room_id, then=Value(message_id))
+        )
+
+    with atomic():
+        ReadState.objects.filter(pairs_filter).update(
+            last_read_message_id=Greatest(
+                Coalesce("last_read_message_id", Value(0)),
+                Case(*new_cursors),
+                output_field=BigIntegerField(),
+            )
+        )
+        ReadState.objects.bulk_create(
+            [
+                ReadState(
+                    user_id=user_id,
+                    room_id=room_id,
+                    last_read_message_id=message_id,
+                )
+                for (user_id, room_id), message_id in read_messages.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def read_last_20_messages(
+    room_id_str: str, user: User, offset: str, before: str | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Returns last 20 messages in room, see get_last_20_messages. The first page
+    is served from recent messages cache and marked as read by user. Older
+    pages are behind the read cursor already, so nothing is written for them.
+    """
+    if offset != "0" or before is not None:
+        return get_last_20_messages(room_id_str, offset, before)
+
+    messages = get_recent_messages(room_id_str)
+    if messages:
+        mark_messages_read(user, UUID(room_id_str), messages[-1]["id"])
+
+    return messages
+
+
+def read_messages_after(
+    room_id_str: str, user: User, after: str
+) -> List[Dict[str, Any]]:
+    """
+    Returns messages in room after the cursor, see get_messages_after, and
+    marks them as read by user. Used by clients that resume after they were
+    disconnected.
+    """
+    messages = get_messages_after(room_id_str, after)
+    if messages:
+        mark_messages_read(user, UUID(room_id_str), messages[-1]["id"])
+
+    return messages
+
+
+def _save_message(
+    author_obj: User, room_id: UUID, msg_content: str
+) -> Message:
+    message = Message.objects.create(
+        author=author_obj, content=msg_content, room_id=room_id
+    )
+
+    # Condition on activity date prevents concurrent, older message from
+    # overwriting the newer one.
+    ChatRoom.objects.filter(
+        Q(last_activity_at__isnull=True)
+        | Q(last_activity_at__lte=message.timestamp),
+        pk=room_id,
+    ).update(last_message=message, last_activity_at=message.timestamp)
+    on_commit(lambda: cache_recent_message(message))
+
+    return message
 
 
 def create_message(
     author_obj: User, room_obj: ChatRoom, msg_content: str
 ) -> Message:
     """
-    Creates message, adds all members, with author as exception, to unread_by
-    table, and returns message.
+    Creates message, updates room last message and returns message. Members
+    unread counters are derived from their read cursors, so no per member rows
+    are written. Message is added to the room recent messages cache after
+    commit.
     """
     with atomic():
-        message = Message.objects.create(
-            author=author_obj, content=msg_content, room=room_obj
-        )
-        unread_by_users = room_obj.members.exclude(id=author_obj.id)
-        message.unread_by.add(*unread_by_users)
+        message = _save_message(author_obj, room_obj.pk, msg_content)
+        room_obj.last_message = message
+        room_obj.last_activity_at = message.timestamp
 
     return message
 
 
-def read_by(message: dict, user: User) -> None:
+def post_message(
+    author_obj: User, room_id_str: str, msg_content: str
+) -> Tuple[Dict[str, str | int], List[int]] | None:
+    """
+    Handles new message of the user in a single transaction: checks that
+    author is a room member, creates message, see create_message, and returns
+    it serialized along with ids of room members to send it to. Room isn't
+    fetched, members ids are enough to check membership. Returns None if room
+    doesn't exist or author isn't its member.
+    """
+    try:
+        room_id = UUID(room_id_str)
+    except ValueError:
+        return None
+
+    with atomic():
+        members_ids = list(get_chat_members_ids(room_id))
+        if author_obj.id not in members_ids:
+            return None
+        message = _save_message(author_obj, room_id, msg_content)
+
+    return message_to_json(message), members_ids
+
+
+def read_by(message: dict, user: User, room_id: str) -> None:
     """
     Marks message as read by user.
     """
@@ -100,11 +358,17 @@ def read_by(message: dict, user: User) -> None:
     if message["author"] == user.username:
         return None
 
+    if "id" in message:
+        return mark_messages_read(user, UUID(room_id), message["id"])
+
+    # Messages serialized before ids were added to the protocol, can be still
+    # delivered during deployment.
     date = parse_datetime(message["timestamp"])
     if not date:
         return None
     if message_obj := Message.objects.filter(
+        room_id=UUID(room_id),
         timestamp=date,
         content=message["content"],
     ).first():
-        message_obj.unread_by.remove(user)
+        mark_messages_read(user, message_obj.room_id, message_obj.id)
@@ -0,0 +1,47 @@
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.db.transaction import on_commit
+from django.dispatch import receiver
+
+from chat.models import ChatRoom, Message
+from chat.recent_messages import invalidate_recent_messages
+
+
+@receiver(post_save, sender=Message)
+def invalidate_recent_messages_on_edit(
+    sender, instance: Message, created: bool, **kwargs
+) -> None:
+    """
+    Invalidates room recent messages cache when message is edited. New
+    messages are cached by create_message.
+    """
+    if not created:
+        room_id_str = str(instance.room_id)
+        on_commit(lambda: invalidate_recent_messages(room_id_str))
+
+
+@receiver(post_delete, sender=Message)
+def invalidate_recent_messages_on_delete(
+    sender, instance: Message, **kwargs
+) -> None:
+    """
+    Invalidates room recent messages cache when message is deleted.
+    """
+    room_id_str = str(instance.room_id)
+    on_commit(lambda: invalidate_recent_messages(room_id_str))
+
+
+@receiver(post_delete, sender=Message)
+def update_room_last_message_on_delete(
+    sender, instance: Message, **kwargs
+) -> None:
+    """
+    Points last message of the room at the previous message, when the last
+    message is deleted. Room last message is already cleared by the delete.
+    """
+    previous_messages = Message.objects.filter(room=OuterRef("pk")).order_by(
+        "-timestamp", "-id"
+    )
+    ChatRoom.objects.filter(
+        pk=instance.room_id, last_message__isnull=True
+    ).update(last_message=Subquery(previous_messages.values("id")[:1]))
@@ -0,0 +1,121 @@
+import asyncio
+import gc
+import json
+from time import process_time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from chat.consumers import ChatConsumer
+from chat.read_receipts import read_receipts
+from chat.serializers import transcode_json_frame
+
+MESSAGE_JSON = {
+    "id": 1,
+    "author": "author",
+    "content": "Message content " * 20,
+    "timestamp": "2023-10-17 01:01:01.000001+00:00",
+}
+
+
+async def _send(self, text_data=None, bytes_data=None, close=False):
+    """
+    Replaces sending to WebSocket. Mock would record calls, which takes more
+    time than encoding.
+    """
+
+
+@pytest.fixture
+def no_gc():
+    """
+    Disables garbage collection, which could collect objects left by other
+    tests during measurement.
+    """
+    gc.collect()
+    gc.disable()
+    yield
+    gc.enable()
+
+
+def _consumers(num_receivers: int, use_msgpack: bool) -> List[ChatConsumer]:
+    consumers = []
+    for user_id in range(num_receivers):
+        consumer = ChatConsumer()
+        consumer.scope = {"user": SimpleNamespace(id=user_id)}
+        consumer.room_name = "room"
+        consumer.use_msgpack = use_msgpack
+        consumers.append(consumer)
+
+    return consumers
+
+
+async def _deliver(consumers: List[ChatConsumer], event: Dict) -> float:
+    """
+    Delivers event to each consumer and returns used CPU time.
+    """
+    start = process_time()
+    for consumer in consumers:
+        await consumer.chat_message(event)
+    # Lets consumers write queued frames
+    await asyncio.sleep(0)
+
+    return process_time() - start
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_msgpack", (False, True))
+@pytest.mark.parametrize("num_receivers", (100, 1_000, 10_000))
+async def test_broadcast_encoding(
+    mocker: MockerFixture,
+    settings,
+    no_gc,
+    num_receivers: int,
+    use_msgpack: bool,
+):
+    """
+    Compares CPU time used by receivers of a room message, when each of them
+    encodes the frame, and when they forward frame encoded by the sender.
+    MessagePack receivers transcode the JSON frame of the sender, once per
+    worker, its cost per receiver is measured too.
+    """
+    # Measures encoding only, frames are sent without coalescing.
+    settings.OUTBOUND_COALESCE_WINDOW = 0
+    mocker.patch.object(read_receipts, "add", lambda *args: None)
+    mocker.patch.object(ChatConsumer, "send", _send)
+    consumers = _consumers(num_receivers, use_msgpack)
+    frame = {"command": "new_message", "message": MESSAGE_JSON}
+
+    legacy_cpu_time = await _deliver(
+        consumers, {"type": "chat_message", "message": frame}
+    )
+    start = process_time()
+    event = {
+        "type": "chat_message",
+        "message_id": MESSAGE_JSON["id"],
+        "text": json.dumps(frame),
+    }
+    encoding_cpu_time = process_time() - start
+    transcode_json_frame.cache_clear()
+    cpu_time = encoding_cpu_time + await _deliver(consumers, event)
+
+    results = (
+        f"\n{num_receivers} {'MessagePack' if use_msgpack else 'JSON'}"
+        " receivers:"
+        f"\n  encoded by each receiver: {legacy_cpu_time * 1000:.2f} ms CPU"
+        f"\n  encoded once by sender: {cpu_time * 1000:.2f} ms CPU"
+    )
+    if use_msgpack:
+        mocker.patch(
+            "chat.consumers.transcode_json_frame",
+            transcode_json_frame.__wrapped__,
+        )
+        transcoded_cpu_time = await _deliver(consumers, event)
+        results += (
+            "\n  transcoded by each receiver:"
+            f" {transcoded_cpu_time * 1000:.2f} ms CPU"
+        )
+    print(results)
+    assert cpu_time < legacy_cpu_time
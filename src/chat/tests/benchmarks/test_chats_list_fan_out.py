@@ -0,0 +1,163 @@
+import asyncio
+from time import perf_counter, time
+from typing import Any, Dict
+from uuid import uuid4
+
+import pytest
+from asgiref.sync import sync_to_async
+from channels.layers import InMemoryChannelLayer
+from django.contrib.auth import get_user_model
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from pytest_mock import MockerFixture
+from redis.asyncio import Redis
+
+from chat.consumers import ChatConsumer
+from chat.models import ChatRoom
+from chat.utils import (
+    construct_name_of_redis_sorted_set_for_channels_names,
+    construct_user_group_name,
+)
+
+NUM_CHANNELS_PER_MEMBER = 2
+# Approximate round trip to Redis in the same data center
+REDIS_ROUND_TRIP = 0.0002
+
+
+class RoundTripChannelLayer(InMemoryChannelLayer):
+    """
+    In-memory layer that waits for Redis round trip on each send, like
+    channels_redis layer does.
+    """
+
+    async def send(self, channel, message):
+        await asyncio.sleep(REDIS_ROUND_TRIP)
+        await super().send(channel, message)
+
+    async def group_send(self, group, message):
+        await asyncio.sleep(REDIS_ROUND_TRIP)
+        await super().group_send(group, message)
+
+
+def _construct_name_of_redis_list_for_channel_name(user_id: int) -> str:
+    """
+    Name of redis list with channels names, used before users groups.
+    """
+    return f"asgi:users_channels_names:{user_id}"
+
+
+def _create_room(num_members: int) -> ChatRoom:
+    prefix = uuid4()
+    users = get_user_model().objects.bulk_create(
+        [
+            get_user_model()(
+                username=f"{prefix}-{i}", password="test-password"
+            )
+            for i in range(num_members)
+        ]
+    )
+    room = ChatRoom.objects.create(admin=users[0])
+    Membership = ChatRoom.members.through
+    Membership.objects.bulk_create(  # type: ignore[attr-defined]
+        [Membership(chatroom=room, user=user) for user in users]
+    )
+
+    return room
+
+
+async def _legacy_send_message_to_chats_list(
+    redis_connection: Redis,
+    channel_layer: InMemoryChannelLayer,
+    message_json: Dict[str, Any],
+    room_obj: ChatRoom,
+) -> None:
+    """
+    Fan-out before users groups, channels names of each member are read from
+    redis lists and message is sent to them one by one.
+    """
+    chat_members = [member async for member in room_obj.members.all()]
+    async with redis_connection.pipeline() as redis_pipeline:
+        for user_obj in chat_members:
+            redis_pipeline.lrange(
+                _construct_name_of_redis_list_for_channel_name(user_obj.pk),
+                0,
+                -1,
+            )
+        channels_names = await redis_pipeline.execute()
+
+    content = {
+        "type": "chat_list_message",
+        "message": {
+            "command": "chats_list_message",
+            "room_id": str(room_obj.id),
+            "message": message_json,
+        },
+    }
+    for user_channels in channels_names:
+        for channel_name in user_channels:
+            await channel_layer.send(channel_name.decode(), content)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.asyncio
+@pytest.mark.parametrize("num_members", (10, 100, 500))
+async def test_chats_list_fan_out(mocker: MockerFixture, num_members: int):
+    """
+    Compares chats list fan-out through redis lists of channels names with
+    fan-out through groups of online users. Channels names lists and presence
+    are kept in fakeredis. fakeredis can't run Lua scripts of channels_redis
+    layer, so layer is in-memory one with simulated Redis round trip.
+    """
+    room = await sync_to_async(_create_room)(num_members)
+    member_ids = [
+        member_id
+        async for member_id in room.members.values_list("id", flat=True)
+    ]
+    redis_connection = FakeRedis(server=FakeServer())
+    mocker.patch(
+        "chat.selectors.get_async_redis_connection",
+        return_value=redis_connection,
+    )
+    channel_layer = RoundTripChannelLayer()
+    for member_id in member_ids:
+        for _ in range(NUM_CHANNELS_PER_MEMBER):
+            channel_name = await channel_layer.new_channel()
+            await redis_connection.rpush(  # type: ignore[misc]
+                _construct_name_of_redis_list_for_channel_name(member_id),
+                channel_name,
+            )
+            await redis_connection.zadd(
+                construct_name_of_redis_sorted_set_for_channels_names(
+                    member_id
+                ),
+                {channel_name: time()},
+            )
+            await channel_layer.group_add(
+                construct_user_group_name(member_id), channel_name
+            )
+    consumer = ChatConsumer()
+    consumer.channel_layer = channel_layer
+    message_json = {"id": 1, "author": "author", "content": "content"}
+
+    start = perf_counter()
+    await _legacy_send_message_to_chats_list(
+        redis_connection, channel_layer, message_json, room
+    )
+    legacy_duration = perf_counter() - start
+
+    start = perf_counter()
+    await consumer.send_message_to_chats_list(
+        message_json, str(room.id), member_ids
+    )
+    duration = perf_counter() - start
+
+    print(
+        f"\n{num_members} members, {NUM_CHANNELS_PER_MEMBER} channels each:"
+        f"\n  channels names lists: {num_members * NUM_CHANNELS_PER_MEMBER}"
+        f" sequential sends, {legacy_duration * 1000:.2f} ms"
+        f"\n  users groups: {num_members} concurrent group sends,"
+        f" {duration * 1000:.2f} ms"
+    )
+    assert duration < legacy_duration
+    await channel_layer.flush()
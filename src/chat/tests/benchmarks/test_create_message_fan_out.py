@@ -0,0 +1,65 @@
+from time import perf_counter
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.transaction import atomic
+from django.test.utils import CaptureQueriesContext
+
+from chat.models import ChatRoom, Message
+from chat.services import create_message
+
+
+def _create_room(admin: User, num_members: int) -> ChatRoom:
+    room = ChatRoom.objects.create(admin=admin)
+    users = get_user_model().objects.bulk_create(
+        [
+            get_user_model()(username=f"member-{i}", password="test-password")
+            for i in range(num_members - 1)
+        ]
+    )
+    Membership = ChatRoom.members.through
+    Membership.objects.bulk_create(  # type: ignore[attr-defined]
+        [Membership(chatroom=room, user=user) for user in [admin, *users]]
+    )
+
+    return room
+
+
+def _legacy_create_message(author: User, room: ChatRoom) -> None:
+    """
+    Message creation before read cursors, one unread row per member.
+    """
+    with atomic():
+        message = Message.objects.create(
+            author=author, content="content", room=room
+        )
+        message.unread_by.add(*room.members.exclude(id=author.id))
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_members", (10, 1_000, 10_000))
+def test_create_message_fan_out(user: User, num_members: int):
+    room = _create_room(user, num_members)
+
+    start = perf_counter()
+    with CaptureQueriesContext(connection) as legacy_queries:
+        _legacy_create_message(user, room)
+    legacy_duration = perf_counter() - start
+
+    start = perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        create_message(user, room, "content")
+    duration = perf_counter() - start
+
+    print(
+        f"\n{num_members} members:"
+        f"\n  unread_by rows: {len(legacy_queries)} statements,"
+        f" {legacy_duration * 1000:.2f} ms"
+        f"\n  read cursors: {len(queries)} statements,"
+        f" {duration * 1000:.2f} ms"
+    )
+    # Savepoint, message insert, room update, release
+    assert len(queries) == 4
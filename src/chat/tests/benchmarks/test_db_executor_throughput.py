@@ -0,0 +1,75 @@
+import asyncio
+from time import perf_counter, sleep
+from typing import Awaitable, Callable
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+
+from chat.db_executor import db_sync_to_async, get_db_executor
+from chat.selectors import get_user
+
+NUM_CONSUMERS = 50
+NUM_MESSAGES_PER_CONSUMER = 10
+# Approximate round trip to database server in the same data center
+DB_ROUND_TRIP = 0.001
+
+
+def _handle_message(username: str) -> None:
+    """
+    Database work of a single message, query and wait for the round trip to
+    database server, which SQLite in memory doesn't have.
+    """
+    get_user(username)
+    sleep(DB_ROUND_TRIP)
+
+
+async def _messages_per_second(
+    to_async: Callable[[Callable], Callable[..., Awaitable]], username: str
+) -> float:
+    async def consumer() -> None:
+        for _ in range(NUM_MESSAGES_PER_CONSUMER):
+            await to_async(_handle_message)(username)
+
+    start = perf_counter()
+    await asyncio.gather(*(consumer() for _ in range(NUM_CONSUMERS)))
+
+    return NUM_CONSUMERS * NUM_MESSAGES_PER_CONSUMER / (
+        perf_counter() - start
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_db_executor_throughput(settings):
+    """
+    Compares throughput of consumers database calls through thread sensitive
+    sync_to_async with database threads pool of growing size.
+    """
+    user = await User.objects.acreate(
+        username="test-throughput-user", password="test-password"
+    )
+
+    thread_sensitive_rate = await _messages_per_second(
+        sync_to_async, user.username
+    )
+    print(
+        f"\n{NUM_CONSUMERS} consumers, {NUM_MESSAGES_PER_CONSUMER} messages"
+        f" each:\n  thread sensitive sync_to_async:"
+        f" {thread_sensitive_rate:.0f} messages/s"
+    )
+    rates = {}
+    for pool_size in (1, 2, 4, 8, 16):
+        settings.DB_EXECUTOR_POOL_SIZE = pool_size
+        get_db_executor.cache_clear()
+        rates[pool_size] = await _messages_per_second(
+            db_sync_to_async, user.username
+        )
+        get_db_executor().shutdown()
+        print(f"  pool of {pool_size}: {rates[pool_size]:.0f} messages/s")
+
+    # Query itself holds GIL, so scaling flattens once waiting for round
+    # trips is no longer the bottleneck.
+    assert rates[4] > 2 * thread_sensitive_rate
+    assert rates[4] > rates[2] > rates[1]
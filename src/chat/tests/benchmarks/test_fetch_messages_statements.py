@@ -0,0 +1,57 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.transaction import atomic
+from django.test.utils import CaptureQueriesContext
+
+from chat.models import ChatRoom, Message
+from chat.services import create_message, read_last_20_messages
+from chat.tests.services import multiple_users_generator
+
+
+def _legacy_read_last_20_messages(room: ChatRoom, user: User) -> None:
+    """
+    Fetch path before read cursors, every message removed from unread table
+    separately.
+    """
+    with atomic():
+        messages = list(room.message.order_by("-timestamp")[:20][::-1])
+        for message in messages:
+            message.unread_by.remove(user)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_statements_per_fetch(
+    django_capture_on_commit_callbacks,
+    recent_messages_redis,
+    user: User,
+    room: ChatRoom,
+):
+    author = next(multiple_users_generator())
+    room.members.add(author)
+    for i in range(40):
+        message = Message.objects.create(
+            author=author, room=room, content=str(i)
+        )
+        message.unread_by.add(user)
+
+    with CaptureQueriesContext(connection) as legacy_queries:
+        _legacy_read_last_20_messages(room, user)
+    # First fetch creates read cursor.
+    with CaptureQueriesContext(connection) as first_queries:
+        read_last_20_messages(str(room.id), user, "0")
+    with django_capture_on_commit_callbacks(execute=True):
+        create_message(author, room, "new")
+    with CaptureQueriesContext(connection) as next_queries:
+        read_last_20_messages(str(room.id), user, "0")
+
+    print(
+        "\nStatements per fetch of 20 unread messages:"
+        f"\n  unread_by rows: {len(legacy_queries)}"
+        f"\n  read cursor, first fetch: {len(first_queries)}"
+        f"\n  read cursor and cached page, next fetches: {len(next_queries)}"
+    )
+    # Cursor update, messages are read from cache.
+    assert len(next_queries) == 1
+    assert len(next_queries) < len(legacy_queries)
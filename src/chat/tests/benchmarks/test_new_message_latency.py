@@ -0,0 +1,128 @@
+from statistics import mean
+from time import perf_counter, sleep
+from typing import Any, Callable, Dict, List, Tuple
+from uuid import uuid4
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection
+from pytest_mock import MockerFixture
+
+from chat.db_executor import db_sync_to_async
+from chat.models import ChatRoom
+from chat.selectors import get_chat_members_ids, get_room, get_user
+from chat.serializers import message_to_json
+from chat.services import create_message, post_message
+
+NUM_MESSAGES = 100
+NUM_MEMBERS = 10
+# Approximate round trip to database server in the same data center
+DB_ROUND_TRIP = 0.0005
+
+
+def _round_trip(execute, sql, params, many, context):
+    sleep(DB_ROUND_TRIP)
+    return execute(sql, params, many, context)
+
+
+def _with_db_round_trips(func: Callable) -> Callable:
+    """
+    Runs func with each query waiting for the round trip to database server,
+    which SQLite in memory doesn't have.
+    """
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with connection.execute_wrapper(_round_trip):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _create_room() -> ChatRoom:
+    prefix = uuid4()
+    users = get_user_model().objects.bulk_create(
+        [
+            get_user_model()(
+                username=f"{prefix}-{i}", password="test-password"
+            )
+            for i in range(NUM_MEMBERS)
+        ]
+    )
+    room = ChatRoom.objects.create(admin=users[0])
+    Membership = ChatRoom.members.through
+    Membership.objects.bulk_create(  # type: ignore[attr-defined]
+        [Membership(chatroom=room, user=user) for user in users]
+    )
+
+    return room
+
+
+async def _legacy_new_message(
+    data: Dict[str, str]
+) -> Tuple[Dict[str, str | int], List[int]] | None:
+    """
+    Database work of new_message before post_message, a thread sensitive
+    hop per call.
+    """
+    author_obj = await sync_to_async(_with_db_round_trips(get_user))(
+        data["from"]
+    )
+    room_obj = await sync_to_async(_with_db_round_trips(get_room))(
+        data["room_id"]
+    )
+    if room_obj is None or author_obj is None:
+        return None
+    message = await sync_to_async(_with_db_round_trips(create_message))(
+        author_obj, room_obj, data["message"]
+    )
+    message_json = await sync_to_async(_with_db_round_trips(message_to_json))(
+        message
+    )
+    members_ids = await sync_to_async(
+        _with_db_round_trips(lambda: list(get_chat_members_ids(room_obj.id)))
+    )()
+
+    return message_json, members_ids
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_new_message_latency(mocker: MockerFixture):
+    """
+    Compares per message handling time of database work of new_message,
+    before and after it was done by a single post_message call.
+    """
+    mocker.patch("chat.services.cache_recent_message")
+    room = await sync_to_async(_create_room)()
+    author = await get_user_model().objects.aget(id=room.admin_id)
+    data = {
+        "from": author.username,
+        "room_id": str(room.id),
+        "message": "content",
+    }
+
+    legacy_durations = []
+    durations = []
+    for _ in range(NUM_MESSAGES):
+        start = perf_counter()
+        assert await _legacy_new_message(data) is not None
+        legacy_durations.append(perf_counter() - start)
+
+        start = perf_counter()
+        assert (
+            await db_sync_to_async(_with_db_round_trips(post_message))(
+                author, data["room_id"], data["message"]
+            )
+            is not None
+        )
+        durations.append(perf_counter() - start)
+
+    print(
+        f"\n{NUM_MESSAGES} messages, {NUM_MEMBERS} members,"
+        f" {DB_ROUND_TRIP * 1000:.1f} ms database round trip:"
+        f"\n  five calls: {mean(legacy_durations) * 1000:.2f} ms per message"
+        f"\n  post_message: {mean(durations) * 1000:.2f} ms per message"
+    )
+    assert mean(durations) < mean(legacy_durations)
@@ -0,0 +1,82 @@
+import asyncio
+import json
+from time import perf_counter
+from typing import Dict, List
+
+import pytest
+from chat.consumers import ChatConsumer
+
+NUM_MESSAGES = 200
+# Busy room, a message every 2 ms
+MESSAGES_INTERVAL = 0.002
+
+
+async def _burst(window: float, settings) -> Dict[str, float]:
+    """
+    Delivers burst of chats list messages to consumer and returns number of
+    sent frames and the longest delay of a message.
+    """
+    settings.OUTBOUND_COALESCE_WINDOW = window
+    consumer = ChatConsumer()
+    consumer.use_batch_frames = True
+    sent_at: Dict[int, float] = {}
+    num_frames = 0
+
+    async def send(text_data=None, bytes_data=None, close=False):
+        nonlocal num_frames
+        num_frames += 1
+        frame = json.loads(text_data)
+        frames = frame["frames"] if frame["command"] == "batch" else [frame]
+        for message in frames:
+            sent_at[message["num"]] = perf_counter()
+
+    consumer.send = send
+    received_at: List[float] = []
+    for num in range(NUM_MESSAGES):
+        received_at.append(perf_counter())
+        await consumer.chat_list_message(
+            {
+                "type": "chat_list_message",
+                "text": json.dumps(
+                    {"command": "chats_list_message", "num": num}
+                ),
+            }
+        )
+        await asyncio.sleep(MESSAGES_INTERVAL)
+    await asyncio.sleep(window)
+    await consumer.flush_outbound_frames()
+    await asyncio.sleep(0)
+
+    return {
+        "frames": num_frames,
+        "max_delay": max(
+            sent_at[num] - received_at[num] for num in range(NUM_MESSAGES)
+        ),
+    }
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_outbound_coalescing(settings):
+    """
+    Compares number of WebSocket frames sent for a burst of messages, and the
+    longest delay added to a message, for different coalescing windows.
+    """
+    print(
+        f"\n{NUM_MESSAGES} messages,"
+        f" {MESSAGES_INTERVAL * 1000:.0f} ms apart:"
+    )
+    results = {}
+    for window in (0, 0.01, 0.025):
+        results[window] = await _burst(window, settings)
+        print(
+            f"  {window * 1000:.0f} ms window:"
+            f" {results[window]['frames']} frames, longest delay"
+            f" {results[window]['max_delay'] * 1000:.2f} ms"
+        )
+
+    assert results[0]["frames"] == NUM_MESSAGES
+    assert results[0.01]["frames"] < NUM_MESSAGES / 3
+    assert results[0.025]["frames"] < results[0.01]["frames"]
+    # Delay is bounded by the window, plus event loop scheduling.
+    assert results[0.025]["max_delay"] < 0.025 + 0.01
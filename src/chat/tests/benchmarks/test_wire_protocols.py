@@ -0,0 +1,89 @@
+import json
+from datetime import datetime, timedelta, timezone
+from random import Random
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+import msgpack
+import pytest
+
+from chat.selectors import MESSAGES_PAGE_SIZE
+from chat.serializers import (
+    encode_json_frame,
+    encode_msgpack_frame,
+    messages_to_json,
+)
+
+NUM_PAGES = 1_000
+NEXT_CURSOR = "MjAyMy0xMC0xN1QwMTowMTowMS4wMDAwMDErMDA6MDB8MQ=="
+WORDS = (
+    "hi hello how are you fine thanks see you tomorrow meeting at noon ok"
+    " sounds good let me check the document and get back to you later"
+).split()
+
+
+def _history_pages(num_pages: int) -> List[Dict[str, Any]]:
+    """
+    Returns frames of history pages with messages of various lengths, like
+    ones sent by fetch_messages.
+    """
+    random = Random(0)
+    timestamp = datetime(2023, 10, 17, tzinfo=timezone.utc)
+    pages = []
+    for page in range(num_pages):
+        messages = []
+        for i in range(MESSAGES_PAGE_SIZE):
+            timestamp += timedelta(seconds=random.randint(1, 600))
+            messages.append(
+                {
+                    "id": page * MESSAGES_PAGE_SIZE + i,
+                    "author__username": f"user-{random.randint(1, 10)}",
+                    "content": " ".join(
+                        random.choices(WORDS, k=random.randint(1, 30))
+                    ),
+                    "timestamp": timestamp,
+                }
+            )
+        pages.append(
+            {
+                "command": "old_messages",
+                "messages": messages_to_json(messages),
+                "next_cursor": NEXT_CURSOR,
+            }
+        )
+
+    return pages
+
+
+def _pages_per_second(func: Callable, pages: List) -> float:
+    start = perf_counter()
+    for page in pages:
+        func(page)
+
+    return len(pages) / (perf_counter() - start)
+
+
+@pytest.mark.benchmark
+def test_wire_protocols():
+    """
+    Compares size of history pages frames, and speed of their encoding by the
+    server and decoding by the client, for JSON and MessagePack frames.
+    """
+    pages = _history_pages(NUM_PAGES)
+    json_frames = [encode_json_frame(page).encode() for page in pages]
+    msgpack_frames = [encode_msgpack_frame(page) for page in pages]
+    json_size = sum(map(len, json_frames)) / NUM_PAGES
+    msgpack_size = sum(map(len, msgpack_frames)) / NUM_PAGES
+
+    print(
+        f"\n{NUM_PAGES} pages of {MESSAGES_PAGE_SIZE} messages:"
+        f"\n  JSON: {json_size:.0f} B per page,"
+        f" encoding {_pages_per_second(encode_json_frame, pages):.0f}"
+        f" pages/s, decoding {_pages_per_second(json.loads, json_frames):.0f}"
+        " pages/s"
+        f"\n  MessagePack: {msgpack_size:.0f} B per page,"
+        f" encoding {_pages_per_second(encode_msgpack_frame, pages):.0f}"
+        " pages/s, decoding"
+        f" {_pages_per_second(msgpack.unpackb, msgpack_frames):.0f} pages/s"
+    )
+    assert msgpack_size < json_size
@@ -4,7 +4,11 @@ import pytest
 from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.test import Client
+from fakeredis import FakeServer, FakeStrictRedis
+from fakeredis.aioredis import FakeRedis
+from pytest_mock import MockerFixture
 
+from chat.db_executor import get_db_executor
 from chat.models import ChatRoom
 
 
@@ -41,3 +45,66 @@ async def async_room(async_user: User) -> ChatRoom:
     await sync_to_async(room.members.add)(async_user)
 
     return room
+
+
+@pytest.fixture
+def recent_messages_redis(mocker: MockerFixture) -> FakeStrictRedis:
+    """
+    Returns fake redis connection used by recent messages cache.
+    """
+    fake_redis_con = FakeStrictRedis(server=FakeServer())
+    mocker.patch(
+        "chat.recent_messages.get_redis_connection",
+        return_value=fake_redis_con,
+    )
+
+    return fake_redis_con
+
+
+@pytest.fixture(autouse=True)
+def room_members_redis(mocker: MockerFixture) -> FakeStrictRedis:
+    """
+    Returns fake redis connection used by room members cache. Membership is
+    checked by most views, so every test gets its own empty cache. Asyncio
+    client shares the data with returned one.
+    """
+    fake_redis_server = FakeServer()
+    fake_redis_con = FakeStrictRedis(server=fake_redis_server)
+    mocker.patch(
+        "chat.room_members.get_redis_connection",
+        return_value=fake_redis_con,
+    )
+    mocker.patch(
+        "chat.room_members.get_async_redis_connection",
+        return_value=FakeRedis(server=fake_redis_server),
+    )
+
+    return fake_redis_con
+
+
+@pytest.fixture(autouse=True)
+def rate_limits_redis(mocker: MockerFixture) -> FakeRedis:
+    """
+    Returns fake asyncio redis client used by rate limits. Commands received
+    by consumers are checked against limits, so every test gets its own empty
+    buckets.
+    """
+    fake_redis_con = FakeRedis(server=FakeServer())
+    mocker.patch(
+        "chat.rate_limits.get_async_redis_connection",
+        return_value=fake_redis_con,
+    )
+
+    return fake_redis_con
+
+
+@pytest.fixture(autouse=True)
+def db_executor():
+    """
+    Gives every test its own database threads pool, so database connections
+    of pool threads don't outlive the test.
+    """
+    yield
+    if get_db_executor.cache_info().currsize:
+        get_db_executor().shutdown()
+        get_db_executor.cache_clear()
@@ -1,28 +1,51 @@
 import json
 from asyncio import sleep
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Dict, List
 from uuid import uuid4
 
+import msgpack
 import pytest
 from asgiref.sync import sync_to_async
 from channels.layers import InMemoryChannelLayer, get_channel_layer
 from channels.testing import WebsocketCommunicator
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from fakeredis import FakeStrictRedis
 from pytest_mock import MockerFixture
 
-from chat.consumers import ChatConsumer
+from chat import consumers as consumers_module
+from chat import metrics
+from chat.consumers import ChatConsumer, OutboundFrame
 from chat.models import ChatRoom, Message
-from chat.serializers import message_to_json, messages_to_json
+from chat.read_receipts import read_receipts
+from chat.serializers import (
+    MSGPACK_SUBPROTOCOL,
+    encode_msgpack_frame,
+    message_to_json,
+)
+from chat.utils import encode_messages_cursor
 
 
 @pytest.fixture
-async def communicator_no_conn(async_room: ChatRoom) -> WebsocketCommunicator:
+def communicator_query_string() -> str:
+    """
+    Returns query string of communicators URL.
+    """
+    return ""
+
+
+@pytest.fixture
+async def communicator_no_conn(
+    async_room: ChatRoom, communicator_query_string: str
+) -> WebsocketCommunicator:
     """
     Returns communicator that is not connected yet.
     """
     communicator = WebsocketCommunicator(
         ChatConsumer.as_asgi(),
-        f"/ws/chat/{async_room.id}",
+        f"/ws/chat/{async_room.id}{communicator_query_string}",
     )
     communicator.scope["url_route"] = {
         "kwargs": {"room_id": str(async_room.id)}
@@ -42,9 +65,9 @@ async def communicator_no_discon(
     """
     Returns communicator that is already connected.
     """
-    mocker.patch("chat.consumers.is_chat_member", return_value=True)
-    mocker.patch("chat.consumers.save_channel_name", return_value=None)
-    mocker.patch("chat.consumers.remove_channel_name", return_value=None)
+    mocker.patch("chat.consumers.ais_chat_member", return_value=True)
+    mocker.patch("chat.consumers.asave_channel_name", return_value=None)
+    mocker.patch("chat.consumers.aremove_channel_name", return_value=None)
     mocker.patch("chat.consumers.read_by", return_value=None)
 
     await communicator_no_conn.connect()
@@ -67,22 +90,12 @@ async def communicator(
     await communicator_no_discon.disconnect()
 
 
-async def _async_create_room(user_obj: User) -> ChatRoom:
-    chat_room = await sync_to_async(ChatRoom.objects.create)(admin=user_obj)
-    await sync_to_async(chat_room.members.add)(user_obj)
-
-    return chat_room
-
-
-async def _async_get_chat_room(
-    user: User, num_messages: int
-) -> tuple[ChatRoom, list[Message]]:
+async def _async_create_messages(
+    user: User, room_obj: ChatRoom, num_messages: int
+) -> list[Message]:
     """
-    Creates user and room objects, and appends room with specified number of
-    messages.
+    Appends room with specified number of messages of the user.
     """
-
-    room_obj = await _async_create_room(user)
     messages = []
     for i in range(num_messages):
         messages.append(
@@ -93,7 +106,7 @@ async def _async_get_chat_room(
         # Necessary for difference in timestamps
         await sleep(0.0001)
 
-    return room_obj, messages
+    return messages
 
 
 @pytest.mark.asyncio
@@ -104,9 +117,9 @@ class TestChatConsumerConnect:
         mocker: MockerFixture,
         communicator_no_conn: WebsocketCommunicator,
     ):
-        mocker.patch("chat.consumers.is_chat_member", return_value=True)
-        mocker.patch("chat.consumers.save_channel_name", return_value=None)
-        mocker.patch("chat.consumers.remove_channel_name", return_value=None)
+        mocker.patch("chat.consumers.ais_chat_member", return_value=True)
+        mocker.patch("chat.consumers.asave_channel_name", return_value=None)
+        mocker.patch("chat.consumers.aremove_channel_name", return_value=None)
 
         connected, _ = await communicator_no_conn.connect()
 
@@ -119,7 +132,7 @@ class TestChatConsumerConnect:
         mocker: MockerFixture,
         communicator_no_conn: WebsocketCommunicator,
     ):
-        mocker.patch("chat.consumers.is_chat_member", return_value=False)
+        mocker.patch("chat.consumers.ais_chat_member", return_value=False)
 
         with pytest.raises(
             ObjectDoesNotExist,
@@ -211,6 +224,37 @@ class TestChatConsumerReceive:
         assert len(calls) == 1
         assert calls[0] == mocker.call(json.loads(data))
 
+    @pytest.mark.asyncio
+    async def test_throttled_command_refused(
+        self,
+        settings,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        settings.WEBSOCKET_RATE_LIMITS = {
+            "new_message": {"user": {"capacity": 1, "rate": 1}}
+        }
+        self.data["command"] = "new_message"
+        new_message_patched = mocker.patch.object(
+            ChatConsumer, "new_message", return_value=None
+        )
+        acheck_rate_limit_spy = mocker.spy(
+            consumers_module, "acheck_rate_limit"
+        )
+
+        for _ in range(2):
+            await communicator.send_json_to(self.data)
+
+        response = await communicator.receive_json_from()
+        assert response["command"] == "throttled"
+        assert response["throttled_command"] == "new_message"
+        assert 0 < response["retry_after"] <= 1000
+        new_message_patched.assert_called_once()
+        acheck_rate_limit_spy.assert_called_with(
+            "new_message", async_room.admin.id, str(async_room.id)
+        )
+
 
 @pytest.mark.django_db
 @pytest.mark.asyncio
@@ -227,15 +271,19 @@ class TestChatConsumerFetchMessages:
         self,
         mocker: MockerFixture,
         communicator: WebsocketCommunicator,
-        async_user: User,
+        async_room: ChatRoom,
         offset: int,
     ):
-        room, messages = await _async_get_chat_room(async_user, 5)
-        self.data["room_id"] = str(room.id)
+        async_user = async_room.admin
+        messages = await _async_create_messages(async_user, async_room, 5)
+        self.data["room_id"] = str(async_room.id)
         self.data["username"] = async_user.username
         self.data["msgs_offset"] = str(offset)
-        messages_json = await sync_to_async(messages_to_json)(messages)
-        mocker.patch("chat.consumers.get_last_20_messages", return_value=[])
+        messages_json = [
+            await sync_to_async(message_to_json)(message)
+            for message in messages
+        ]
+        mocker.patch("chat.consumers.read_last_20_messages", return_value=[])
         mocker.patch(
             "chat.consumers.messages_to_json", return_value=messages_json
         )
@@ -244,7 +292,9 @@ class TestChatConsumerFetchMessages:
         )
         content = {
             "command": "messages" if offset == 0 else "old_messages",
+            "room_id": str(async_room.id),
             "messages": messages_json,
+            "next_cursor": None,
         }
 
         await communicator.send_json_to(self.data)
@@ -253,6 +303,116 @@ class TestChatConsumerFetchMessages:
 
         send_message_patched.assert_called_once_with(content)
 
+    async def test_cursor_passed(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        async_user = async_room.admin
+        messages = await _async_create_messages(async_user, async_room, 20)
+        data = {
+            "command": "fetch_messages",
+            "room_id": str(async_room.id),
+            "username": async_user.username,
+            "before": "cursor",
+        }
+        read_last_20_messages_patched = mocker.patch(
+            "chat.consumers.read_last_20_messages",
+            return_value=[
+                {
+                    "id": message.id,
+                    "author__username": async_user.username,
+                    "content": message.content,
+                    "timestamp": message.timestamp,
+                }
+                for message in messages
+            ],
+        )
+        send_message_patched = mocker.patch.object(
+            ChatConsumer, "send_message", return_value=None
+        )
+
+        await communicator.send_json_to(data)
+        # Since send_message mocked, data won't be sent back.
+        await communicator.receive_nothing()
+
+        read_last_20_messages_patched.assert_called_once_with(
+            str(async_room.id), async_user, "0", "cursor"
+        )
+        content = send_message_patched.call_args.args[0]
+        assert content["command"] == "old_messages"
+        assert content["next_cursor"] == encode_messages_cursor(
+            messages[0].timestamp, messages[0].id
+        )
+
+    async def test_user_taken_from_scope(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        read_last_20_messages_patched = mocker.patch(
+            "chat.consumers.read_last_20_messages", return_value=[]
+        )
+
+        await communicator.send_json_to(
+            {
+                "command": "fetch_messages",
+                "room_id": str(async_room.id),
+                "username": "other-user",
+            }
+        )
+        await communicator.receive_json_from()
+
+        read_last_20_messages_patched.assert_called_once_with(
+            str(async_room.id), async_room.admin, "0", None
+        )
+
+    async def test_room_of_socket_used(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        read_last_20_messages_patched = mocker.patch(
+            "chat.consumers.read_last_20_messages", return_value=[]
+        )
+
+        await communicator.send_json_to(
+            {"command": "fetch_messages", "room_id": str(uuid4())}
+        )
+        response = await communicator.receive_json_from()
+
+        read_last_20_messages_patched.assert_called_once_with(
+            str(async_room.id), async_room.admin, "0", None
+        )
+        assert response["room_id"] == str(async_room.id)
+
+    async def test_room_of_socket_used_for_missed_messages(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        read_messages_after_patched = mocker.patch(
+            "chat.consumers.read_messages_after", return_value=[]
+        )
+
+        await communicator.send_json_to(
+            {
+                "command": "fetch_messages",
+                "room_id": str(uuid4()),
+                "after": "cursor",
+            }
+        )
+        response = await communicator.receive_json_from()
+
+        read_messages_after_patched.assert_called_once_with(
+            str(async_room.id), async_room.admin, "cursor"
+        )
+        assert response["room_id"] == str(async_room.id)
+
 
 @pytest.mark.django_db
 @pytest.mark.asyncio
@@ -263,7 +423,6 @@ class TestChatConsumerNewMessage:
         "from": "some username",
         "room_id": "some room-id",
     }
-    reload_page_data = {"command": "reload_page"}
 
     async def test_new_message_success(
         self,
@@ -273,24 +432,16 @@ class TestChatConsumerNewMessage:
     ):
         # Arrange
         user = async_room.admin
-        self.data["from"] = str(user.id)
         self.data["room_id"] = str(async_room.id)
-        message = await sync_to_async(Message.objects.create)(
-            author=user, room=async_room, content="test message content"
-        )
-        message_json = await sync_to_async(message_to_json)(message)
-
-        get_user_patched = mocker.patch(
-            "chat.consumers.get_user", return_value=user
-        )
-        get_room_patched = mocker.patch(
-            "chat.consumers.get_room", return_value=async_room
-        )
-        create_message_patched = mocker.patch(
-            "chat.consumers.create_message", return_value=message
-        )
-        message_to_json_patched = mocker.patch(
-            "chat.consumers.message_to_json", return_value=message_json
+        message_json = {
+            "id": 1,
+            "author": user.username,
+            "content": self.data["message"],
+            "timestamp": "2023-10-17 01:01:01+00:00",
+        }
+        post_message_patched = mocker.patch(
+            "chat.consumers.post_message",
+            return_value=(message_json, [user.id]),
         )
         send_chat_message_patched = mocker.patch.object(
             ChatConsumer, "send_chat_message", return_value=None
@@ -305,56 +456,92 @@ class TestChatConsumerNewMessage:
         await communicator.receive_nothing()
 
         # Assertions
-        get_user_patched.assert_called_once_with(str(user.id))
-        get_room_patched.assert_called_once_with(str(async_room.id))
-        create_message_patched.assert_called_once_with(
-            user, async_room, self.data["message"]
+        post_message_patched.assert_called_once_with(
+            user, str(async_room.id), self.data["message"]
+        )
+        send_chat_message_patched.assert_called_once_with(
+            message_json, str(async_room.id)
         )
-        message_to_json_patched.assert_called_once_with(message)
-        send_chat_message_patched.assert_called_once_with(message_json)
         send_message_to_chats_list_patched.assert_called_once_with(
-            message_json, async_room
+            message_json, str(async_room.id), [user.id]
         )
 
-    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
-    @pytest.mark.parametrize(
-        ["author_obj_is_none", "room_obj_is_none"],
-        [(True, False), (False, True), (True, True)],
-    )
-    async def test_new_message_fail(
+    async def test_room_of_socket_used(
         self,
         mocker: MockerFixture,
         communicator: WebsocketCommunicator,
         async_room: ChatRoom,
-        author_obj_is_none: bool,
-        room_obj_is_none: bool,
     ):
-        # Arrange
         user = async_room.admin
-        self.data["from"] = (
-            "unexistent user" if author_obj_is_none else str(user.id)
+        other_room = await ChatRoom.objects.acreate(admin=user)
+        await other_room.members.aadd(user)
+        message_json = {"id": 1, "author": user.username}
+        post_message_patched = mocker.patch(
+            "chat.consumers.post_message",
+            return_value=(message_json, [user.id]),
+        )
+        acheck_rate_limit_patched = mocker.patch(
+            "chat.consumers.acheck_rate_limit", return_value=0
+        )
+        send_chat_message_patched = mocker.patch.object(
+            ChatConsumer, "send_chat_message", return_value=None
         )
-        self.data["room_id"] = (
-            "unexistent room" if room_obj_is_none else str(async_room.id)
+        send_message_to_chats_list_patched = mocker.patch.object(
+            ChatConsumer, "send_message_to_chats_list", return_value=None
         )
 
-        get_user_return_value = None if author_obj_is_none else user
-        get_user_patched = mocker.patch(
-            "chat.consumers.get_user", return_value=get_user_return_value
+        await communicator.send_json_to(
+            {**self.data, "room_id": str(other_room.id)}
         )
-        get_room_return_value = None if room_obj_is_none else async_room
-        get_room_patched = mocker.patch(
-            "chat.consumers.get_room", return_value=get_room_return_value
+        await communicator.receive_nothing()
+
+        acheck_rate_limit_patched.assert_called_once_with(
+            "new_message", user.id, str(async_room.id)
         )
-        send_reload_page_patched = mocker.patch.object(
-            ChatConsumer, "send_reload_page", return_value=None
+        post_message_patched.assert_called_once_with(
+            user, str(async_room.id), self.data["message"]
+        )
+        send_chat_message_patched.assert_called_once_with(
+            message_json, str(async_room.id)
+        )
+        send_message_to_chats_list_patched.assert_called_once_with(
+            message_json, str(async_room.id), [user.id]
         )
 
-        create_message_patched = mocker.patch(
-            "chat.consumers.create_message", return_value=None
+    async def test_author_taken_from_scope(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+        recent_messages_redis: FakeStrictRedis,
+    ):
+        self.data["room_id"] = str(async_room.id)
+        self.data["from"] = "other-user"
+        mocker.patch.object(
+            ChatConsumer, "send_message_to_chats_list", return_value=None
         )
-        message_to_json_patched = mocker.patch(
-            "chat.consumers.message_to_json", return_value=None
+
+        await communicator.send_json_to(self.data)
+        response = await communicator.receive_json_from()
+
+        assert response["command"] == "new_message"
+        assert response["message"]["author"] == async_room.admin.username
+        message = await Message.objects.select_related("author").aget(
+            id=response["message"]["id"]
+        )
+        assert message.author == async_room.admin
+
+    async def test_new_message_fail(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        # Arrange
+        self.data["room_id"] = str(async_room.id)
+        mocker.patch("chat.consumers.post_message", return_value=None)
+        send_reload_page_patched = mocker.patch.object(
+            ChatConsumer, "send_reload_page", return_value=None
         )
         send_chat_message_patched = mocker.patch.object(
             ChatConsumer, "send_chat_message", return_value=None
@@ -365,15 +552,841 @@ class TestChatConsumerNewMessage:
 
         # Actions
         await communicator.send_json_to(self.data)
-        # Since send_chat_message and send_message_to_chats_list are mocked, data won't be sent back.
         await communicator.receive_nothing()
 
         # Assertions
-        get_user_patched.assert_called_once_with(self.data["from"])
-        get_room_patched.assert_called_once_with(self.data["room_id"])
         send_reload_page_patched.assert_called_once()
-
-        create_message_patched.assert_not_called()
-        message_to_json_patched.assert_not_called()
         send_chat_message_patched.assert_not_called()
         send_message_to_chats_list_patched.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+class TestChatConsumerChatMessage:
+    async def test_encoded_frame_forwarded(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        read_receipts_add_patched = mocker.patch.object(
+            read_receipts, "add", return_value=None
+        )
+        json_dumps_patched = mocker.patch("chat.consumers.json.dumps")
+        text = '{"command": "new_message", "message": {"id": 1}}'
+
+        await get_channel_layer().group_send(
+            f"chat_{async_room.id}",
+            {"type": "chat_message", "message_id": 1, "text": text},
+        )
+
+        assert await communicator.receive_from() == text
+        read_receipts_add_patched.assert_called_once_with(
+            async_room.admin.id, str(async_room.id), 1
+        )
+        json_dumps_patched.assert_not_called()
+
+    async def test_frame_encoded_by_sender(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        mocker.patch.object(read_receipts, "add", return_value=None)
+        message_json = {
+            "id": 1,
+            "author": "author",
+            "content": "content",
+            "timestamp": "2023-10-17 01:01:01+00:00",
+        }
+        consumer = ChatConsumer()
+        consumer.channel_layer = get_channel_layer()
+
+        await consumer.send_chat_message(message_json, str(async_room.id))
+
+        assert await communicator.receive_json_from() == {
+            "command": "new_message",
+            "room_id": str(async_room.id),
+            "message": message_json,
+        }
+
+    async def test_read_receipt_buffered_and_forwarded(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        read_receipts_add_patched = mocker.patch.object(
+            read_receipts, "add", return_value=None
+        )
+        read_by_patched = mocker.patch("chat.consumers.read_by")
+        message = {
+            "command": "new_message",
+            "message": {
+                "id": 1,
+                "author": "author",
+                "content": "content",
+                "timestamp": "2023-10-17 01:01:01+00:00",
+            },
+        }
+
+        await get_channel_layer().group_send(
+            f"chat_{async_room.id}",
+            {"type": "chat_message", "message": message},
+        )
+
+        assert await communicator.receive_json_from() == message
+        read_receipts_add_patched.assert_called_once_with(
+            async_room.admin.id, str(async_room.id), 1
+        )
+        read_by_patched.assert_not_called()
+
+    async def test_message_without_id_read_and_forwarded(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        read_by_patched = mocker.patch("chat.consumers.read_by")
+        message = {
+            "command": "new_message",
+            "message": {
+                "author": "author",
+                "content": "content",
+                "timestamp": "2023-10-17 01:01:01+00:00",
+            },
+        }
+
+        await get_channel_layer().group_send(
+            f"chat_{async_room.id}",
+            {"type": "chat_message", "message": message},
+        )
+
+        assert await communicator.receive_json_from() == message
+        read_by_patched.assert_called_once_with(
+            message["message"], async_room.admin, str(async_room.id)
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+class TestChatConsumerSendMessageToChatsList:
+    message_json = {
+        "id": 1,
+        "author": "author",
+        "content": "content",
+        "timestamp": "2023-10-17 01:01:01+00:00",
+    }
+
+    async def test_user_group_joined(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        channel_layer = get_channel_layer()
+
+        assert f"user_{async_room.admin.id}" in channel_layer.groups
+
+    async def test_sent_to_each_member_group(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        other_user = await sync_to_async(User.objects.create)(
+            username=str(uuid4())
+        )
+        await sync_to_async(async_room.members.add)(other_user)
+        channel_layer = get_channel_layer()
+        # Second connection of the other member, e.g. another browser tab
+        other_channel_name = await channel_layer.new_channel()
+        await channel_layer.group_add(
+            f"user_{other_user.id}", other_channel_name
+        )
+        aget_users_channels_patched = mocker.patch(
+            "chat.selectors.aget_users_channels"
+        )
+        mocker.patch(
+            "chat.consumers.aget_online_users_ids",
+            side_effect=lambda members_ids: members_ids,
+        )
+        consumer = ChatConsumer()
+        consumer.channel_layer = channel_layer
+        expected_message = {
+            "command": "chats_list_message",
+            "room_id": str(async_room.id),
+            "message": self.message_json,
+        }
+
+        await consumer.send_message_to_chats_list(
+            self.message_json,
+            str(async_room.id),
+            [async_room.admin.id, other_user.id],
+        )
+
+        assert await communicator.receive_json_from() == expected_message
+        event = await channel_layer.receive(other_channel_name)
+        assert event["type"] == "chat_list_message"
+        assert json.loads(event["text"]) == expected_message
+        aget_users_channels_patched.assert_not_called()
+
+    async def test_event_without_encoded_frame_forwarded(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        message = {
+            "command": "chats_list_message",
+            "room_id": str(async_room.id),
+            "message": self.message_json,
+        }
+
+        await get_channel_layer().group_send(
+            f"user_{async_room.admin.id}",
+            {"type": "chat_list_message", "message": message},
+        )
+
+        assert await communicator.receive_json_from() == message
+
+    async def test_offline_members_skipped(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        offline_user = await sync_to_async(User.objects.create)(
+            username=str(uuid4())
+        )
+        await sync_to_async(async_room.members.add)(offline_user)
+        channel_layer = get_channel_layer()
+        # Channel that wasn't disconnected, e.g. after server crash
+        dead_channel_name = await channel_layer.new_channel()
+        await channel_layer.group_add(
+            f"user_{offline_user.id}", dead_channel_name
+        )
+        aget_online_users_ids_patched = mocker.patch(
+            "chat.consumers.aget_online_users_ids",
+            return_value=[async_room.admin.id],
+        )
+        consumer = ChatConsumer()
+        consumer.channel_layer = channel_layer
+
+        await consumer.send_message_to_chats_list(
+            self.message_json,
+            str(async_room.id),
+            [async_room.admin.id, offline_user.id],
+        )
+
+        assert (await communicator.receive_json_from())["command"] == (
+            "chats_list_message"
+        )
+        assert sorted(aget_online_users_ids_patched.call_args.args[0]) == sorted(
+            [async_room.admin.id, offline_user.id]
+        )
+        assert dead_channel_name not in channel_layer.channels
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+class TestChatConsumerHeartbeat:
+    async def test_channel_name_saved(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        asave_channel_name_patched = mocker.patch(
+            "chat.consumers.asave_channel_name", return_value=None
+        )
+
+        await communicator.send_json_to({"command": "heartbeat"})
+        await communicator.receive_nothing()
+
+        asave_channel_name_patched.assert_called_once()
+        assert asave_channel_name_patched.call_args.args[0] == (
+            async_room.admin.id
+        )
+
+    async def test_other_command_refreshes_channel_name(
+        self,
+        settings,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+    ):
+        asave_channel_name_patched = mocker.patch(
+            "chat.consumers.asave_channel_name", return_value=None
+        )
+        mocker.patch(
+            "chat.consumers.monotonic",
+            return_value=monotonic() + settings.PRESENCE_HEARTBEAT_INTERVAL,
+        )
+
+        await communicator.send_json_to({"command": "ack", "frames": 0})
+        await communicator.send_json_to({"command": "ack", "frames": 0})
+        await communicator.receive_nothing()
+
+        asave_channel_name_patched.assert_called_once()
+
+    async def test_channel_name_not_refreshed_within_interval(
+        self, mocker: MockerFixture, communicator: WebsocketCommunicator
+    ):
+        asave_channel_name_patched = mocker.patch(
+            "chat.consumers.asave_channel_name", return_value=None
+        )
+
+        await communicator.send_json_to({"command": "ack", "frames": 0})
+        await communicator.receive_nothing()
+
+        asave_channel_name_patched.assert_not_called()
+
+
+@pytest.fixture
+async def msgpack_communicator(
+    mocker: MockerFixture, async_room: ChatRoom, communicator_query_string: str
+) -> WebsocketCommunicator:
+    """
+    Returns connected communicator that negotiated MessagePack frames.
+    """
+    mocker.patch("chat.consumers.ais_chat_member", return_value=True)
+    mocker.patch("chat.consumers.asave_channel_name", return_value=None)
+    mocker.patch("chat.consumers.aremove_channel_name", return_value=None)
+    communicator = WebsocketCommunicator(
+        ChatConsumer.as_asgi(),
+        f"/ws/chat/{async_room.id}{communicator_query_string}",
+        subprotocols=["other", MSGPACK_SUBPROTOCOL],
+    )
+    communicator.scope["url_route"] = {
+        "kwargs": {"room_id": str(async_room.id)}
+    }
+    communicator.scope["user"] = async_room.admin
+
+    connected, subprotocol = await communicator.connect()
+    assert connected
+    assert subprotocol == MSGPACK_SUBPROTOCOL
+
+    yield communicator
+
+    await communicator.disconnect()
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+class TestChatConsumerMsgpack:
+    message_json = {
+        "id": 1,
+        "author": "author",
+        "content": "content",
+        "timestamp": "2023-10-17 01:01:01+00:00",
+    }
+
+    async def test_json_is_default(
+        self,
+        mocker: MockerFixture,
+        communicator_no_conn: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        mocker.patch("chat.consumers.ais_chat_member", return_value=True)
+        mocker.patch("chat.consumers.asave_channel_name", return_value=None)
+        mocker.patch("chat.consumers.aremove_channel_name", return_value=None)
+        mocker.patch("chat.consumers.read_last_20_messages", return_value=[])
+
+        connected, subprotocol = await communicator_no_conn.connect()
+        await communicator_no_conn.send_json_to(
+            {
+                "command": "fetch_messages",
+                "room_id": str(async_room.id),
+                "username": async_room.admin.username,
+            }
+        )
+        response = await communicator_no_conn.receive_json_from()
+        await communicator_no_conn.disconnect()
+
+        assert connected
+        assert subprotocol is None
+        assert response == {
+            "command": "messages",
+            "room_id": str(async_room.id),
+            "messages": [],
+            "next_cursor": None,
+        }
+
+    async def test_binary_frame_received(
+        self,
+        mocker: MockerFixture,
+        msgpack_communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        read_last_20_messages_patched = mocker.patch(
+            "chat.consumers.read_last_20_messages", return_value=[]
+        )
+
+        await msgpack_communicator.send_to(
+            bytes_data=msgpack.packb(
+                {
+                    "c": "fetch_messages",
+                    "r": str(async_room.id),
+                    "u": async_room.admin.username,
+                }
+            )
+        )
+        response = await msgpack_communicator.receive_from()
+
+        read_last_20_messages_patched.assert_called_once_with(
+            str(async_room.id), async_room.admin, "0", None
+        )
+        assert msgpack.unpackb(response) == {
+            "c": "messages",
+            "r": str(async_room.id),
+            "ms": [],
+            "n": None,
+        }
+
+    async def test_group_message_forwarded_as_binary(
+        self,
+        mocker: MockerFixture,
+        msgpack_communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        mocker.patch.object(read_receipts, "add", return_value=None)
+        consumer = ChatConsumer()
+        consumer.channel_layer = get_channel_layer()
+
+        await consumer.send_chat_message(self.message_json, str(async_room.id))
+        response = await msgpack_communicator.receive_from()
+
+        assert response == encode_msgpack_frame(
+            {
+                "command": "new_message",
+                "room_id": str(async_room.id),
+                "message": self.message_json,
+            }
+        )
+
+    async def test_sender_encodes_only_json(self, async_room: ChatRoom):
+        consumer = ChatConsumer()
+        consumer.channel_layer = get_channel_layer()
+        channel_name = await consumer.channel_layer.new_channel()
+        await consumer.channel_layer.group_add(
+            f"chat_{async_room.id}", channel_name
+        )
+
+        await consumer.send_chat_message(self.message_json, str(async_room.id))
+        event = await consumer.channel_layer.receive(channel_name)
+
+        assert "bytes" not in event
+        assert json.loads(event["text"])["message"] == self.message_json
+
+    async def test_frame_of_older_sender_forwarded(
+        self,
+        mocker: MockerFixture,
+        msgpack_communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        mocker.patch.object(read_receipts, "add", return_value=None)
+        frame = encode_msgpack_frame({"command": "new_message", "id": 1})
+
+        await get_channel_layer().group_send(
+            f"chat_{async_room.id}",
+            {
+                "type": "chat_message",
+                "message_id": 1,
+                "text": '{"command": "new_message"}',
+                "bytes": frame,
+            },
+        )
+
+        assert await msgpack_communicator.receive_from() == frame
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+class TestChatConsumerOutboundCoalescing:
+    @pytest.fixture
+    def communicator_query_string(self) -> str:
+        return "?batch=1"
+
+    @staticmethod
+    def _event(num: int) -> Dict:
+        return {
+            "type": "chat_list_message",
+            "text": json.dumps({"command": "chats_list_message", "num": num}),
+            "bytes": encode_msgpack_frame(
+                {"command": "chats_list_message", "num": num}
+            ),
+        }
+
+    async def test_messages_within_window_batched(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        for num in range(3):
+            await get_channel_layer().group_send(
+                f"user_{async_room.admin.id}", self._event(num)
+            )
+
+        assert await communicator.receive_json_from() == {
+            "command": "batch",
+            "frames": [
+                {"command": "chats_list_message", "num": num}
+                for num in range(3)
+            ],
+        }
+        assert await communicator.receive_nothing()
+
+    async def test_coalescing_disabled(
+        self,
+        settings,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        settings.OUTBOUND_COALESCE_WINDOW = 0
+
+        for num in range(2):
+            await get_channel_layer().group_send(
+                f"user_{async_room.admin.id}", self._event(num)
+            )
+
+        for num in range(2):
+            assert await communicator.receive_json_from() == {
+                "command": "chats_list_message",
+                "num": num,
+            }
+
+    @pytest.mark.parametrize("communicator_query_string", ("", "?batch=0"))
+    async def test_batch_frames_not_accepted(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        for num in range(2):
+            await get_channel_layer().group_send(
+                f"user_{async_room.admin.id}", self._event(num)
+            )
+
+        for num in range(2):
+            assert await communicator.receive_json_from() == {
+                "command": "chats_list_message",
+                "num": num,
+            }
+
+    async def test_full_buffer_sent_right_away(
+        self,
+        settings,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        settings.OUTBOUND_COALESCE_WINDOW = 60
+        settings.OUTBOUND_COALESCE_MAX_FRAMES = 2
+
+        for num in range(2):
+            await get_channel_layer().group_send(
+                f"user_{async_room.admin.id}", self._event(num)
+            )
+
+        response = await communicator.receive_json_from()
+        assert response["command"] == "batch"
+        assert len(response["frames"]) == 2
+
+    async def test_buffer_sent_before_direct_message(
+        self,
+        settings,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        settings.OUTBOUND_COALESCE_WINDOW = 60
+        mocker.patch("chat.consumers.read_last_20_messages", return_value=[])
+
+        await get_channel_layer().group_send(
+            f"user_{async_room.admin.id}", self._event(0)
+        )
+        # Buffered until the end of the window
+        assert await communicator.receive_nothing()
+        await communicator.send_json_to(
+            {
+                "command": "fetch_messages",
+                "room_id": str(async_room.id),
+                "username": async_room.admin.username,
+            }
+        )
+
+        assert await communicator.receive_json_from() == {
+            "command": "chats_list_message",
+            "num": 0,
+        }
+        assert (await communicator.receive_json_from())["command"] == (
+            "messages"
+        )
+
+    async def test_msgpack_batch(
+        self,
+        msgpack_communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        for num in range(2):
+            await get_channel_layer().group_send(
+                f"user_{async_room.admin.id}", self._event(num)
+            )
+
+        assert msgpack.unpackb(await msgpack_communicator.receive_from()) == {
+            "c": "batch",
+            "fs": [
+                {"c": "chats_list_message", "num": num} for num in range(2)
+            ],
+        }
+
+    async def test_buffer_dropped_on_disconnect(
+        self,
+        settings,
+        mocker: MockerFixture,
+        communicator_no_discon: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        settings.OUTBOUND_COALESCE_WINDOW = 0.05
+        send_patched = mocker.patch.object(ChatConsumer, "send")
+
+        await get_channel_layer().group_send(
+            f"user_{async_room.admin.id}", self._event(0)
+        )
+        await communicator_no_discon.disconnect()
+        await sleep(0.1)
+
+        send_patched.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+class TestChatConsumerOutboundQueue:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, mocker: MockerFixture):
+        settings.OUTBOUND_COALESCE_WINDOW = 0
+        settings.OUTBOUND_UNACKED_FRAMES = 1
+        settings.OUTBOUND_QUEUE_SIZE = 2
+        mocker.patch.object(read_receipts, "add", return_value=None)
+        metrics.reset_metrics()
+        yield
+        metrics.reset_metrics()
+
+    @staticmethod
+    def _chats_list_event(num: int) -> Dict:
+        return {
+            "type": "chat_list_message",
+            "text": json.dumps({"command": "chats_list_message", "num": num}),
+            "bytes": encode_msgpack_frame(
+                {"command": "chats_list_message", "num": num}
+            ),
+        }
+
+    @staticmethod
+    def _chat_event(message_id: int) -> Dict:
+        return {
+            "type": "chat_message",
+            "message_id": message_id,
+            "cursor": f"cursor-{message_id}",
+            "text": json.dumps({"command": "new_message", "id": message_id}),
+            "bytes": encode_msgpack_frame(
+                {"command": "new_message", "id": message_id}
+            ),
+        }
+
+    @pytest.fixture
+    def communicator_query_string(self) -> str:
+        return "?ack=1"
+
+    @staticmethod
+    async def _send_events(user_id: int, events: List[Dict]) -> None:
+        """
+        Sends events to the user group and waits until consumer handles them.
+        """
+        for event in events:
+            await get_channel_layer().group_send(f"user_{user_id}", event)
+        # receive_nothing returns right away, if a frame was already sent
+        await sleep(0.05)
+
+    async def test_frames_held_until_acked(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        await get_channel_layer().group_send(
+            f"user_{async_room.admin.id}", self._chats_list_event(0)
+        )
+        await get_channel_layer().group_send(
+            f"user_{async_room.admin.id}", self._chats_list_event(1)
+        )
+
+        assert (await communicator.receive_json_from())["num"] == 0
+        assert await communicator.receive_nothing()
+        await communicator.send_json_to({"command": "ack", "frames": 1})
+        assert (await communicator.receive_json_from())["num"] == 1
+
+    @pytest.mark.parametrize("communicator_query_string", ("", "?ack=0"))
+    async def test_frames_of_client_without_acks_sent(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        await self._send_events(
+            async_room.admin.id,
+            [self._chats_list_event(num) for num in range(3)],
+        )
+
+        for num in range(3):
+            assert (await communicator.receive_json_from())["num"] == num
+        assert "outbound.queue_depth" not in metrics.get_metrics()["summaries"]
+
+    async def test_ack_of_frames_not_sent_ignored(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        await communicator.send_json_to({"command": "ack", "frames": 10})
+        assert await communicator.receive_nothing()
+
+        await self._send_events(
+            async_room.admin.id,
+            [self._chats_list_event(num) for num in range(2)],
+        )
+
+        assert (await communicator.receive_json_from())["num"] == 0
+        assert await communicator.receive_nothing()
+
+    async def test_oldest_chats_list_message_dropped(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        await self._send_events(
+            async_room.admin.id,
+            [self._chats_list_event(num) for num in range(4)],
+        )
+
+        received = [(await communicator.receive_json_from())["num"]]
+        for frames in (1, 2):
+            await communicator.send_json_to(
+                {"command": "ack", "frames": frames}
+            )
+            received.append((await communicator.receive_json_from())["num"])
+
+        assert received == [0, 2, 3]
+        assert await communicator.receive_nothing()
+        assert metrics.get_metrics()["counters"]["outbound.dropped_frames"] == 1
+
+    async def test_chats_list_message_dropped_for_chat_message(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        channel_layer = get_channel_layer()
+        await channel_layer.group_send(
+            f"chat_{async_room.id}", self._chat_event(1)
+        )
+        await channel_layer.group_send(
+            f"user_{async_room.admin.id}", self._chats_list_event(0)
+        )
+        for message_id in (2, 3):
+            await channel_layer.group_send(
+                f"chat_{async_room.id}", self._chat_event(message_id)
+            )
+        await sleep(0.05)
+
+        received = [(await communicator.receive_json_from())["id"]]
+        for frames in (1, 2):
+            await communicator.send_json_to(
+                {"command": "ack", "frames": frames}
+            )
+            received.append((await communicator.receive_json_from())["id"])
+
+        assert received == [1, 2, 3]
+        assert await communicator.receive_nothing()
+
+    async def test_slow_client_disconnected_with_resume_token(
+        self,
+        communicator_no_discon: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        for message_id in range(1, 5):
+            await get_channel_layer().group_send(
+                f"chat_{async_room.id}", self._chat_event(message_id)
+            )
+
+        assert await communicator_no_discon.receive_json_from() == {
+            "command": "new_message",
+            "id": 1,
+        }
+        assert await communicator_no_discon.receive_json_from() == {
+            "command": "resume",
+            "resume_token": "cursor-1",
+        }
+        assert await communicator_no_discon.receive_output() == {
+            "type": "websocket.close",
+            "code": ChatConsumer.slow_consumer_close_code,
+        }
+        counters = metrics.get_metrics()["counters"]
+        assert counters["outbound.slow_consumer_disconnects"] == 1
+        assert counters["outbound.dropped_frames"] == 3
+
+    async def test_queue_depth_observed(
+        self, communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        await self._send_events(
+            async_room.admin.id,
+            [self._chats_list_event(num) for num in range(2)],
+        )
+
+        assert metrics.get_metrics()["summaries"]["outbound.queue_depth"] == {
+            "count": 1,
+            "sum": 1,
+            "max": 1,
+        }
+
+    async def test_chat_message_event_has_cursor(self, mocker: MockerFixture):
+        consumer = ChatConsumer()
+        consumer.channel_layer = mocker.AsyncMock()
+        message_json = {
+            "id": 1,
+            "author": "author",
+            "content": "content",
+            "timestamp": "2023-10-17 01:01:01+00:00",
+        }
+
+        await consumer.send_chat_message(message_json, "room")
+
+        event = consumer.channel_layer.group_send.call_args.args[1]
+        assert event["cursor"] == encode_messages_cursor(
+            datetime(2023, 10, 17, 1, 1, 1, tzinfo=timezone.utc), 1
+        )
+
+    async def test_batch_with_chat_message_not_droppable(self, mocker):
+        enqueue_frame_patched = mocker.patch.object(
+            ChatConsumer, "enqueue_frame"
+        )
+        consumer = ChatConsumer()
+        consumer.outbound_frames = [
+            OutboundFrame('{"num": 0}', droppable=True),
+            OutboundFrame('{"id": 1}', cursors={"room-1": "cursor-1"}),
+            OutboundFrame('{"id": 2}', cursors={"room-2": "cursor-2"}),
+        ]
+
+        await consumer.flush_outbound_frames()
+
+        enqueue_frame_patched.assert_called_once_with(
+            OutboundFrame(
+                '{"command": "batch", "frames":'
+                ' [{"num": 0}, {"id": 1}, {"id": 2}]}',
+                droppable=False,
+                cursors={"room-1": "cursor-1", "room-2": "cursor-2"},
+            )
+        )
+
+    async def test_missed_messages_fetched(
+        self,
+        mocker: MockerFixture,
+        communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        read_messages_after_patched = mocker.patch(
+            "chat.consumers.read_messages_after", return_value=[]
+        )
+
+        await communicator.send_json_to(
+            {
+                "command": "fetch_messages",
+                "room_id": str(async_room.id),
+                "username": async_room.admin.username,
+                "after": "cursor",
+            }
+        )
+
+        assert await communicator.receive_json_from() == {
+            "command": "missed_messages",
+            "room_id": str(async_room.id),
+            "messages": [],
+            "resume_token": None,
+        }
+        read_messages_after_patched.assert_called_once_with(
+            str(async_room.id), async_room.admin, "cursor"
+        )
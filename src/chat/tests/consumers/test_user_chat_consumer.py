@@ -0,0 +1,390 @@
+import json
+from typing import List
+
+import pytest
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from pytest_mock import MockerFixture
+
+from chat import consumers as consumers_module
+from chat.consumers import ChatConsumer, UserChatConsumer
+from chat.models import ChatRoom
+from chat.read_receipts import read_receipts
+
+ROOM_1 = "00000000-0000-0000-0000-000000000001"
+ROOM_2 = "00000000-0000-0000-0000-000000000002"
+ROOM_3 = "0000000a-0000-0000-0000-00000000000b"
+MESSAGE_JSON = {
+    "id": 1,
+    "author": "author",
+    "content": "content",
+    "timestamp": "2023-10-17 01:01:01+00:00",
+}
+
+
+@pytest.fixture
+def members_of(mocker: MockerFixture) -> List[str]:
+    """
+    Returns ids of rooms, of which the user is a member.
+    """
+    rooms_ids = [ROOM_1, ROOM_2]
+    mocker.patch(
+        "chat.consumers.ais_chat_member",
+        side_effect=lambda _, room_id: room_id in rooms_ids,
+    )
+    return rooms_ids
+
+
+@pytest.fixture
+async def user_communicator_no_discon(
+    mocker: MockerFixture, members_of: List[str], async_room: ChatRoom
+) -> WebsocketCommunicator:
+    """
+    Returns communicator that is already connected to the user socket.
+    """
+    mocker.patch("chat.consumers.asave_channel_name", return_value=None)
+    mocker.patch("chat.consumers.aremove_channel_name", return_value=None)
+    mocker.patch.object(read_receipts, "add", return_value=None)
+    communicator = WebsocketCommunicator(
+        UserChatConsumer.as_asgi(), "/ws/chat/"
+    )
+    communicator.scope["user"] = async_room.admin
+    communicator.scope["channel_layer"] = InMemoryChannelLayer()
+
+    connected, _ = await communicator.connect()
+    assert connected
+
+    return communicator
+
+
+@pytest.fixture
+async def user_communicator(
+    user_communicator_no_discon: WebsocketCommunicator,
+) -> WebsocketCommunicator:
+    """
+    Returns communicator that is already connected to the user socket and
+    will disconnect it after a test is done.
+    """
+
+    yield user_communicator_no_discon
+
+    await user_communicator_no_discon.disconnect()
+
+
+async def _subscribe(communicator: WebsocketCommunicator, room_id: str):
+    await communicator.send_json_to(
+        {"command": "subscribe", "room_id": room_id}
+    )
+    assert await communicator.receive_json_from() == {
+        "command": "subscribed",
+        "room_id": room_id,
+    }
+
+
+async def _send_chat_message(room_id: str) -> None:
+    consumer = ChatConsumer()
+    consumer.channel_layer = get_channel_layer()
+    await consumer.send_chat_message(MESSAGE_JSON, room_id)
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+class TestUserChatConsumer:
+    async def test_anonymous_user_rejected(self):
+        communicator = WebsocketCommunicator(
+            UserChatConsumer.as_asgi(), "/ws/chat/"
+        )
+        communicator.scope["user"] = AnonymousUser()
+
+        connected, _ = await communicator.connect()
+
+        assert not connected
+        # Server still reports the disconnect of the rejected socket
+        await communicator.disconnect()
+
+    async def test_chats_list_message_received(
+        self, user_communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        frame = json.dumps(
+            {"command": "chats_list_message", "room_id": ROOM_1}
+        )
+
+        await get_channel_layer().group_send(
+            f"user_{async_room.admin.id}",
+            {"type": "chat_list_message", "text": frame, "bytes": b""},
+        )
+
+        assert await user_communicator.receive_from() == frame
+
+    async def test_messages_of_subscribed_rooms_received(
+        self, user_communicator: WebsocketCommunicator
+    ):
+        await _subscribe(user_communicator, ROOM_1)
+        await _subscribe(user_communicator, ROOM_2)
+
+        await _send_chat_message(ROOM_1)
+        await _send_chat_message(ROOM_2)
+
+        frames = [
+            await user_communicator.receive_json_from() for _ in range(2)
+        ]
+
+        assert frames == [
+            {
+                "command": "new_message",
+                "room_id": room_id,
+                "message": MESSAGE_JSON,
+            }
+            for room_id in (ROOM_1, ROOM_2)
+        ]
+
+    async def test_read_receipt_of_message_room(
+        self, user_communicator: WebsocketCommunicator, async_room: ChatRoom
+    ):
+        await _subscribe(user_communicator, ROOM_2)
+
+        await _send_chat_message(ROOM_2)
+        await user_communicator.receive_json_from()
+
+        read_receipts.add.assert_called_once_with(  # type: ignore
+            async_room.admin.id, ROOM_2, MESSAGE_JSON["id"]
+        )
+
+    async def test_messages_of_other_rooms_not_received(
+        self, user_communicator: WebsocketCommunicator
+    ):
+        await _subscribe(user_communicator, ROOM_1)
+
+        await _send_chat_message(ROOM_2)
+
+        assert await user_communicator.receive_nothing()
+
+    async def test_subscription_refused(
+        self,
+        user_communicator: WebsocketCommunicator,
+        members_of: List[str],
+    ):
+        members_of.remove(ROOM_2)
+
+        await user_communicator.send_json_to(
+            {"command": "subscribe", "room_id": ROOM_2}
+        )
+        await _send_chat_message(ROOM_2)
+
+        assert await user_communicator.receive_json_from() == {
+            "command": "subscription_refused",
+            "room_id": ROOM_2,
+        }
+        assert await user_communicator.receive_nothing()
+
+    @pytest.mark.parametrize(
+        "room_id",
+        (
+            f"{{{ROOM_3}}}",
+            f"urn:uuid:{ROOM_3}",
+            ROOM_3.replace("-", ""),
+            ROOM_3.upper(),
+        ),
+    )
+    async def test_room_id_normalized(
+        self,
+        mocker: MockerFixture,
+        user_communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+        members_of: List[str],
+        room_id: str,
+    ):
+        members_of.append(ROOM_3)
+        acheck_rate_limit_patched = mocker.patch(
+            "chat.consumers.acheck_rate_limit", return_value=0
+        )
+        post_message_patched = mocker.patch(
+            "chat.consumers.post_message",
+            return_value=(MESSAGE_JSON, [async_room.admin.id]),
+        )
+        mocker.patch.object(
+            UserChatConsumer, "send_message_to_chats_list", return_value=None
+        )
+
+        await user_communicator.send_json_to(
+            {"command": "subscribe", "room_id": room_id}
+        )
+        assert await user_communicator.receive_json_from() == {
+            "command": "subscribed",
+            "room_id": ROOM_3,
+        }
+        await user_communicator.send_json_to(
+            {
+                "command": "new_message",
+                "room_id": room_id,
+                "message": "content",
+            }
+        )
+
+        assert await user_communicator.receive_json_from() == {
+            "command": "new_message",
+            "room_id": ROOM_3,
+            "message": MESSAGE_JSON,
+        }
+        post_message_patched.assert_called_once_with(
+            async_room.admin, ROOM_3, "content"
+        )
+        acheck_rate_limit_patched.assert_called_with(
+            "new_message", async_room.admin.id, ROOM_3
+        )
+
+    async def test_invalid_room_id_refused(
+        self, user_communicator: WebsocketCommunicator
+    ):
+        await user_communicator.send_json_to(
+            {"command": "subscribe", "room_id": "not-uuid"}
+        )
+
+        assert await user_communicator.receive_json_from() == {
+            "command": "subscription_refused",
+            "room_id": "not-uuid",
+        }
+
+    async def test_throttled_subscription_refused(
+        self,
+        settings,
+        mocker: MockerFixture,
+        user_communicator: WebsocketCommunicator,
+    ):
+        settings.WEBSOCKET_RATE_LIMITS = {
+            "subscribe": {"user": {"capacity": 1, "rate": 1}}
+        }
+        ais_chat_member_spy = mocker.spy(consumers_module, "ais_chat_member")
+
+        await _subscribe(user_communicator, ROOM_1)
+        await user_communicator.send_json_to(
+            {"command": "subscribe", "room_id": ROOM_2}
+        )
+
+        response = await user_communicator.receive_json_from()
+        assert response["command"] == "throttled"
+        assert response["throttled_command"] == "subscribe"
+        assert ais_chat_member_spy.call_count == 1
+
+    async def test_unsubscribe(self, user_communicator: WebsocketCommunicator):
+        await _subscribe(user_communicator, ROOM_1)
+
+        await user_communicator.send_json_to(
+            {"command": "unsubscribe", "room_id": ROOM_1}
+        )
+        assert await user_communicator.receive_json_from() == {
+            "command": "unsubscribed",
+            "room_id": ROOM_1,
+        }
+        await _send_chat_message(ROOM_1)
+
+        assert await user_communicator.receive_nothing()
+
+    @pytest.mark.parametrize("command", ("fetch_messages", "new_message"))
+    async def test_room_command_requires_subscription(
+        self,
+        mocker: MockerFixture,
+        user_communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+        command: str,
+    ):
+        read_last_20_messages_patched = mocker.patch(
+            "chat.consumers.read_last_20_messages"
+        )
+        post_message_patched = mocker.patch("chat.consumers.post_message")
+
+        await user_communicator.send_json_to(
+            {
+                "command": command,
+                "room_id": ROOM_1,
+                "username": async_room.admin.username,
+                "message": "content",
+            }
+        )
+
+        assert await user_communicator.receive_json_from() == {
+            "command": "not_subscribed",
+            "room_id": ROOM_1,
+        }
+        read_last_20_messages_patched.assert_not_called()
+        post_message_patched.assert_not_called()
+
+    async def test_fetch_messages_tagged_with_room(
+        self,
+        mocker: MockerFixture,
+        user_communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        mocker.patch("chat.consumers.read_last_20_messages", return_value=[])
+        await _subscribe(user_communicator, ROOM_1)
+
+        await user_communicator.send_json_to(
+            {
+                "command": "fetch_messages",
+                "room_id": ROOM_1,
+                "username": async_room.admin.username,
+            }
+        )
+
+        assert await user_communicator.receive_json_from() == {
+            "command": "messages",
+            "room_id": ROOM_1,
+            "messages": [],
+            "next_cursor": None,
+        }
+
+    async def test_new_message_sent_to_room(
+        self,
+        mocker: MockerFixture,
+        user_communicator: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        post_message_patched = mocker.patch(
+            "chat.consumers.post_message",
+            return_value=(MESSAGE_JSON, [async_room.admin.id]),
+        )
+        mocker.patch.object(
+            UserChatConsumer, "send_message_to_chats_list", return_value=None
+        )
+        await _subscribe(user_communicator, ROOM_1)
+
+        await user_communicator.send_json_to(
+            {"command": "new_message", "room_id": ROOM_1, "message": "content"}
+        )
+
+        assert await user_communicator.receive_json_from() == {
+            "command": "new_message",
+            "room_id": ROOM_1,
+            "message": MESSAGE_JSON,
+        }
+        post_message_patched.assert_called_once_with(
+            async_room.admin, ROOM_1, "content"
+        )
+
+    async def test_groups_left_on_disconnect(
+        self,
+        user_communicator_no_discon: WebsocketCommunicator,
+        async_room: ChatRoom,
+    ):
+        await _subscribe(user_communicator_no_discon, ROOM_1)
+        await _subscribe(user_communicator_no_discon, ROOM_2)
+
+        await user_communicator_no_discon.disconnect()
+
+        groups = get_channel_layer().groups
+        for group_name in (
+            f"chat_{ROOM_1}",
+            f"chat_{ROOM_2}",
+            f"user_{async_room.admin.id}",
+        ):
+            assert not groups.get(group_name)
+
+    async def test_resume_tokens_of_all_rooms(self):
+        consumer = UserChatConsumer()
+        consumer.last_sent_cursors = {ROOM_1: "cursor-1", ROOM_2: "cursor-2"}
+
+        assert consumer.get_resume_content() == {
+            "command": "resume",
+            "resume_tokens": {ROOM_1: "cursor-1", ROOM_2: "cursor-2"},
+        }
@@ -0,0 +1,90 @@
+import asyncio
+from threading import Barrier, current_thread
+
+import pytest
+from django.contrib.auth.models import User
+from pytest_mock import MockerFixture
+
+from chat import metrics
+from chat.db_executor import db_sync_to_async
+from chat.selectors import get_user
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+@pytest.mark.asyncio
+async def test_returns_result():
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    result = await db_sync_to_async(add)(1, b=2)
+
+    assert result == 3
+
+
+@pytest.mark.asyncio
+async def test_raises_exception():
+    def fail():
+        raise ValueError("test error")
+
+    with pytest.raises(ValueError, match="test error"):
+        await db_sync_to_async(fail)()
+
+
+@pytest.mark.asyncio
+async def test_runs_in_pool_thread():
+    thread_name = await db_sync_to_async(lambda: current_thread().name)()
+
+    assert thread_name.startswith("chat-db")
+
+
+@pytest.mark.asyncio
+async def test_calls_run_in_parallel(settings):
+    settings.DB_EXECUTOR_POOL_SIZE = 2
+    barrier = Barrier(2, timeout=1)
+
+    # Each call waits for the other one, so they would time out if run one
+    # at a time.
+    await asyncio.gather(
+        db_sync_to_async(barrier.wait)(), db_sync_to_async(barrier.wait)()
+    )
+
+
+@pytest.mark.asyncio
+async def test_old_connections_closed_before_call(mocker: MockerFixture):
+    calls = []
+    mocker.patch(
+        "chat.db_executor.close_old_connections",
+        lambda: calls.append("close_old_connections"),
+    )
+
+    await db_sync_to_async(lambda: calls.append("func"))()
+
+    assert calls == ["close_old_connections", "func"]
+
+
+@pytest.mark.asyncio
+async def test_metrics():
+    await db_sync_to_async(lambda: None)()
+    await db_sync_to_async(lambda: None)()
+
+    summaries = metrics.get_metrics()["summaries"]
+    assert summaries["db_executor.queue_wait"]["count"] == 2
+    assert summaries["db_executor.execution_time"]["count"] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_database_query():
+    user = await User.objects.acreate(
+        username="test-db-executor-user", password="test-password"
+    )
+
+    user_obj = await db_sync_to_async(get_user)(user.username)
+
+    assert user_obj == user
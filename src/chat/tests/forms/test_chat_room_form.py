@@ -53,3 +53,4 @@ def test_saving_with_commit_true(rf: RequestFactory, user: User):
 
     assert room.admin == user
     assert list(room.members.all()) == [user]
+    assert list(room.read_states.values_list("user", flat=True)) == [user.id]
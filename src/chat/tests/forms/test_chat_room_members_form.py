@@ -5,7 +5,8 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 
 from chat.forms import ChatRoomMembersForm
-from chat.models import ChatRoom
+from chat.models import ChatRoom, ReadState
+from chat.selectors import is_chat_member
 
 URL = reverse("chat:add_members", args=(uuid4(),))
 
@@ -30,6 +31,7 @@ def test_update_members(user: User, room_no_members: ChatRoom):
     form.update_members(room_no_members)
 
     assert list(room_no_members.members.all()) == [user]
+    assert ReadState.objects.filter(user=user, room=room_no_members).exists()
 
 
 @pytest.mark.django_db
@@ -43,3 +45,18 @@ def test_update_members_with_empty_field(
     form.update_members(room_no_members)
 
     assert not list(room_no_members.members.all())
+
+
+@pytest.mark.django_db
+def test_update_members_invalidates_cached_members(
+    user: User, room: ChatRoom
+):
+    new_member = User.objects.create(username="new-member")
+    assert not is_chat_member(new_member.id, room.id)
+    data = {"members_to_add": new_member.username}
+
+    form = ChatRoomMembersForm(data=data)
+    form.is_valid()
+    form.update_members(room)
+
+    assert is_chat_member(new_member.id, room.id)
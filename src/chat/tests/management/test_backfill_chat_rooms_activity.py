@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from io import StringIO
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from chat.models import ChatRoom, Message
+from chat.services import create_message
+
+MIGRATE_FROM = [("chat", "0004_message_unread_by")]
+
+
+@pytest.fixture(autouse=True)
+def no_committed_rooms(db):
+    """
+    Removes rooms that async tests committed outside of their transactions,
+    command processes all rooms.
+    """
+    ChatRoom.objects.all().delete()
+
+
+def _create_legacy_room(user: User, num_messages: int) -> ChatRoom:
+    """
+    Creates room with messages, as migration leaves rooms created before last
+    message and last activity date were maintained.
+    """
+    room = ChatRoom.objects.create(admin=user)
+    for i in range(num_messages):
+        Message.objects.create(author=user, room=room, content=str(i))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+    ChatRoom.objects.filter(pk=room.pk).update(last_activity_at=None)
+
+    return room
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fills_migrated_rooms(user: User):
+    executor = MigrationExecutor(connection)
+    executor.migrate(MIGRATE_FROM)
+    old_apps = executor.loader.project_state(MIGRATE_FROM).apps
+    old_room = old_apps.get_model("chat", "ChatRoom").objects.create(
+        admin_id=user.id
+    )
+    old_message = old_apps.get_model("chat", "Message").objects.create(
+        author_id=user.id, room=old_room, content="content"
+    )
+    timestamp = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    old_message.__class__.objects.filter(pk=old_message.pk).update(
+        timestamp=timestamp
+    )
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+    assert ChatRoom.objects.get(pk=old_room.pk).last_activity_at is None
+    call_command("backfill_chat_rooms_activity", stdout=StringIO())
+
+    room = ChatRoom.objects.get(pk=old_room.pk)
+    assert room.last_message_id == old_message.pk
+    assert room.last_activity_at == timestamp
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("chunk_size", (1, 2, 1000))
+def test_fills_rooms(user: User, chunk_size: int):
+    rooms = [_create_legacy_room(user, i) for i in range(5)]
+
+    call_command(
+        "backfill_chat_rooms_activity",
+        chunk_size=chunk_size,
+        stdout=StringIO(),
+    )
+
+    for room in rooms:
+        room.refresh_from_db()
+        last_message = room.message.order_by("-timestamp").first()
+        assert room.last_message == last_message
+        assert room.last_activity_at == (
+            last_message.timestamp if last_message else room.created
+        )
+
+
+@pytest.mark.django_db
+def test_filled_rooms_not_changed(user: User):
+    empty_room = ChatRoom.objects.create(admin=user)
+    room = ChatRoom.objects.create(admin=user)
+    message = create_message(user, room, "content")
+    room.refresh_from_db()
+
+    call_command("backfill_chat_rooms_activity", stdout=StringIO())
+
+    for filled_room in (empty_room, room):
+        last_activity_at = filled_room.last_activity_at
+        filled_room.refresh_from_db()
+        assert filled_room.last_activity_at == last_activity_at
+    assert room.last_message == message
+
+
+@pytest.mark.django_db
+def test_room_filled_by_new_message_not_reverted(user: User):
+    """
+    Message posted after the chunk was selected, but before it's updated,
+    stays the last message.
+    """
+    room = _create_legacy_room(user, 1)
+    new_messages = []
+    is_posting = False
+
+    def post_before_update(execute, sql, params, many, context):
+        nonlocal is_posting
+        if sql.startswith('UPDATE "chat_chatroom"') and not is_posting:
+            # Message is posted once, its own room update goes through
+            is_posting = True
+            new_messages.append(create_message(user, room, "new"))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(post_before_update):
+        call_command("backfill_chat_rooms_activity", stdout=StringIO())
+
+    room.refresh_from_db()
+    assert room.last_message == new_messages[0]
+    assert room.last_activity_at == new_messages[0].timestamp
+
+
+@pytest.mark.django_db
+def test_chunked_queries(django_assert_max_num_queries, user: User):
+    for _ in range(4):
+        _create_legacy_room(user, 1)
+
+    # Per chunk: select and update; and final empty select.
+    with django_assert_max_num_queries(2 * 2 + 1):
+        call_command(
+            "backfill_chat_rooms_activity", chunk_size=2, stdout=StringIO()
+        )
+
+    assert not ChatRoom.objects.filter(last_activity_at__isnull=True).exists()
@@ -0,0 +1,72 @@
+from io import StringIO
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from chat.models import ChatRoom, Message, ReadState
+from chat.tests.services import multiple_users_generator
+
+
+def _create_messages(author: User, room: ChatRoom, num: int) -> list[Message]:
+    messages = []
+    for i in range(num):
+        messages.append(
+            Message.objects.create(author=author, room=room, content=str(i))
+        )
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+    return messages
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("chunk_size", (1, 1000))
+@pytest.mark.parametrize("num_unread", (0, 1, 3, 5))
+def test_cursor_before_oldest_unread(
+    user: User, room: ChatRoom, chunk_size: int, num_unread: int
+):
+    author = next(multiple_users_generator())
+    room.members.add(author)
+    messages = _create_messages(author, room, 5)
+    for message in messages[len(messages) - num_unread :]:
+        message.unread_by.add(user)
+
+    call_command(
+        "migrate_unread_to_read_states",
+        chunk_size=chunk_size,
+        stdout=StringIO(),
+    )
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    # sourcery skip: no-conditionals-in-tests
+    expected_last_read = (
+        messages[4 - num_unread] if num_unread < len(messages) else None
+    )
+    assert read_state.last_read_message == expected_last_read
+    # Author has nothing unread, so cursor is placed at the last message.
+    author_read_state = ReadState.objects.get(user=author, room=room)
+    assert author_read_state.last_read_message == messages[-1]
+
+
+@pytest.mark.django_db
+def test_room_without_messages(user: User, room: ChatRoom):
+    call_command("migrate_unread_to_read_states", stdout=StringIO())
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message is None
+
+
+@pytest.mark.django_db
+def test_existing_cursors_untouched(user: User, room: ChatRoom):
+    messages = _create_messages(user, room, 3)
+    messages[0].unread_by.add(user)
+    ReadState.objects.create(
+        user=user, room=room, last_read_message=messages[1]
+    )
+
+    call_command("migrate_unread_to_read_states", stdout=StringIO())
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message == messages[1]
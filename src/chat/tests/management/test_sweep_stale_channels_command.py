@@ -0,0 +1,36 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from pytest_mock import MockerFixture
+
+
+def test_single_sweep(mocker: MockerFixture):
+    sweep_patched = mocker.patch(
+        "chat.management.commands.sweep_stale_channels.sweep_stale_channels",
+        return_value=3,
+    )
+    stdout = StringIO()
+
+    call_command("sweep_stale_channels", stdout=stdout)
+
+    sweep_patched.assert_called_once_with()
+    assert "Removed 3 stale channels." in stdout.getvalue()
+
+
+def test_periodic_sweeps(mocker: MockerFixture):
+    sweep_patched = mocker.patch(
+        "chat.management.commands.sweep_stale_channels.sweep_stale_channels",
+        return_value=0,
+    )
+    # Stops the loop after the second sweep
+    sleep_patched = mocker.patch(
+        "chat.management.commands.sweep_stale_channels.sleep",
+        side_effect=[None, KeyboardInterrupt],
+    )
+
+    with pytest.raises(KeyboardInterrupt):
+        call_command("sweep_stale_channels", interval=5, stdout=StringIO())
+
+    assert sweep_patched.call_count == 2
+    sleep_patched.assert_called_with(5)
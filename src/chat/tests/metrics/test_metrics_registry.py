@@ -0,0 +1,56 @@
+import pytest
+
+from chat import metrics
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+def test_increment():
+    metrics.increment("counter")
+    metrics.increment("counter", 2)
+
+    assert metrics.get_metrics()["counters"] == {"counter": 3}
+
+
+def test_set_gauge():
+    metrics.set_gauge("gauge", 5)
+    metrics.set_gauge("gauge", 2)
+
+    assert metrics.get_metrics()["gauges"] == {"gauge": 2}
+
+
+def test_observe():
+    for value in (3, 1, 2):
+        metrics.observe("summary", value)
+
+    assert metrics.get_metrics()["summaries"] == {
+        "summary": {"count": 3, "sum": 6, "max": 3}
+    }
+
+
+def test_snapshot_not_changed():
+    metrics.observe("summary", 1)
+    snapshot = metrics.get_metrics()
+
+    metrics.observe("summary", 2)
+
+    assert snapshot["summaries"]["summary"]["count"] == 1
+
+
+def test_reset():
+    metrics.increment("counter")
+    metrics.set_gauge("gauge", 1)
+    metrics.observe("summary", 1)
+
+    metrics.reset_metrics()
+
+    assert metrics.get_metrics() == {
+        "counters": {},
+        "gauges": {},
+        "summaries": {},
+    }
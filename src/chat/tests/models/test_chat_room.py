@@ -18,6 +18,7 @@ def test_create_chat_room(mocker: MockerFixture, user: User, chat_name: str):
     assert chat_room.admin == user
     assert chat_room.room_name == chat_name
     assert chat_room.created == date
+    assert chat_room.last_activity_at == date
 
 
 @pytest.mark.django_db
@@ -48,3 +49,19 @@ def test_chat_room_str_empty_name(user: User, chat_name: str | None):
     chat_room_str = str(chat_room)
 
     assert chat_room_str == str(chat_room.id)
+
+
+@pytest.mark.django_db
+def test_last_activity_not_changed_on_update(
+    mocker: MockerFixture, room: ChatRoom
+):
+    last_activity_at = room.last_activity_at
+    mocker.patch.object(
+        timezone, "now", return_value=timezone.make_aware(datetime(2030, 1, 1))
+    )
+
+    room.room_name = "new name"
+    room.save()
+
+    room.refresh_from_db()
+    assert room.last_activity_at == last_activity_at
@@ -0,0 +1,145 @@
+from typing import List
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from chat.models import ChatRoom, Message
+from chat.selectors import (
+    count_unread_msgs,
+    get_last_20_messages,
+    get_last_message,
+    get_last_messages,
+)
+from chat.services import read_by
+from chat.tests.services import multiple_users_generator
+from chat.utils import encode_messages_cursor
+
+# Markers of reading messages without index in query plans of supported
+# databases.
+FULL_SCAN_MARKERS = {
+    "sqlite": ("SCAN chat_message", "TEMP B-TREE"),
+    "postgresql": ("Seq Scan on chat_message", "Sort"),
+}
+
+
+def _explain_messages_queries(captured_queries: List[dict]) -> List[str]:
+    """
+    Returns query plans of captured queries that read messages.
+    """
+    plans = []
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Planner prefers sequential scan of tables as small as in tests.
+            cursor.execute("SET enable_seqscan = off")
+        for query in captured_queries:
+            if not query["sql"].startswith("SELECT") or (
+                '"chat_message"' not in query["sql"]
+            ):
+                continue
+            cursor.execute(
+                f"{connection.ops.explain_query_prefix()} {query['sql']}"
+            )
+            plans.append(
+                "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+            )
+
+    return plans
+
+
+def _assert_messages_read_by_index(
+    captured_queries: List[dict], index_name: str
+):
+    plans = _explain_messages_queries(captured_queries)
+
+    assert plans
+    for plan in plans:
+        assert index_name in plan, plan
+        for marker in FULL_SCAN_MARKERS.get(connection.vendor, ()):
+            assert marker not in plan, plan
+
+
+@pytest.fixture
+def room_with_messages(room: ChatRoom) -> ChatRoom:
+    other_user = next(multiple_users_generator())
+    room.members.add(other_user)
+    for i in range(30):
+        Message.objects.create(
+            author=other_user if i % 2 else room.admin,
+            room=room,
+            content=f"message {i}",
+        )
+
+    return room
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("with_cursor", (False, True))
+def test_last_20_messages_use_index(
+    room_with_messages: ChatRoom, with_cursor: bool
+):
+    last_message = room_with_messages.message.latest("id")
+    before = (
+        encode_messages_cursor(last_message.timestamp, last_message.id)
+        if with_cursor
+        else None
+    )
+
+    with CaptureQueriesContext(connection) as captured:
+        get_last_20_messages(str(room_with_messages.id), "0", before)
+
+    _assert_messages_read_by_index(
+        captured.captured_queries, "chat_msg_room_ts_id_idx"
+    )
+
+
+@pytest.mark.django_db
+def test_last_messages_use_index(room_with_messages: ChatRoom):
+    with CaptureQueriesContext(connection) as captured:
+        get_last_messages(str(room_with_messages.id), 50)
+
+    _assert_messages_read_by_index(
+        captured.captured_queries, "chat_msg_room_ts_id_idx"
+    )
+
+
+@pytest.mark.django_db
+def test_last_message_uses_index(room_with_messages: ChatRoom):
+    with CaptureQueriesContext(connection) as captured:
+        get_last_message(room_with_messages)
+
+    _assert_messages_read_by_index(
+        captured.captured_queries, "chat_msg_room_ts_id_idx"
+    )
+
+
+@pytest.mark.django_db
+def test_unread_msgs_counter_uses_index(
+    user: User, room_with_messages: ChatRoom
+):
+    with CaptureQueriesContext(connection) as captured:
+        count_unread_msgs(room_with_messages, user, "")
+
+    _assert_messages_read_by_index(
+        captured.captured_queries, "chat_msg_room_id_idx"
+    )
+
+
+@pytest.mark.django_db
+def test_read_by_timestamp_uses_index(
+    user: User, room_with_messages: ChatRoom
+):
+    message_obj = room_with_messages.message.latest("id")
+    message = {
+        "author": user.username + "f",
+        "content": message_obj.content,
+        "timestamp": str(message_obj.timestamp),
+    }
+
+    with CaptureQueriesContext(connection) as captured:
+        read_by(message, user, str(room_with_messages.id))
+
+    _assert_messages_read_by_index(
+        captured.captured_queries, "chat_msg_room_ts_id_idx"
+    )
@@ -0,0 +1,153 @@
+import pytest
+from fakeredis.aioredis import FakeRedis
+from pytest_mock import MockerFixture
+from redis import ConnectionError as RedisConnectionError
+
+from chat import metrics
+from chat.rate_limits import acheck_rate_limit
+from chat.utils import (
+    construct_name_of_redis_hash_for_room_rate_limit,
+    construct_name_of_redis_hash_for_user_rate_limit,
+)
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+@pytest.fixture(autouse=True)
+def limits(settings):
+    settings.WEBSOCKET_RATE_LIMITS = {
+        "new_message": {
+            "user": {"capacity": 2, "rate": 1},
+            "room": {"capacity": 3, "rate": 10},
+        },
+        "fetch_messages": {"user": {"capacity": 1, "rate": 0.5}},
+    }
+
+
+@pytest.fixture
+def now(mocker: MockerFixture):
+    """
+    Freezes time seen by rate limits, returns mock to move it.
+    """
+    return mocker.patch("chat.rate_limits.time", return_value=NOW)
+
+
+@pytest.mark.asyncio
+async def test_allowed_up_to_capacity(now):
+    results = [
+        await acheck_rate_limit("new_message", 1, "room") for _ in range(3)
+    ]
+
+    assert results == [0, 0, 1000]
+    assert metrics.get_metrics()["counters"] == {
+        "rate_limits.throttled.new_message": 1
+    }
+
+
+@pytest.mark.asyncio
+async def test_tokens_refilled(now):
+    for _ in range(2):
+        await acheck_rate_limit("new_message", 1, "room")
+
+    now.return_value = NOW + 0.4
+    assert await acheck_rate_limit("new_message", 1, "room") == 600
+    now.return_value = NOW + 1
+    assert await acheck_rate_limit("new_message", 1, "room") == 0
+
+
+@pytest.mark.asyncio
+async def test_room_bucket_shared_by_users(now):
+    results = [
+        await acheck_rate_limit("new_message", user_id, "room")
+        for user_id in range(4)
+    ]
+
+    assert results == [0, 0, 0, 100]
+
+
+@pytest.mark.asyncio
+async def test_refused_command_takes_no_tokens(now, rate_limits_redis):
+    for user_id in range(3):
+        await acheck_rate_limit("new_message", user_id, "room")
+
+    assert await acheck_rate_limit("new_message", 3, "room") == 100
+    assert not await rate_limits_redis.exists(
+        construct_name_of_redis_hash_for_user_rate_limit("new_message", 3)
+    )
+
+
+@pytest.mark.asyncio
+async def test_command_without_room(now, rate_limits_redis: FakeRedis):
+    results = [
+        await acheck_rate_limit("new_message", 1, None) for _ in range(3)
+    ]
+
+    assert results == [0, 0, 1000]
+    assert await rate_limits_redis.keys() == [
+        construct_name_of_redis_hash_for_user_rate_limit(
+            "new_message", 1
+        ).encode()
+    ]
+
+
+@pytest.mark.asyncio
+async def test_buckets_of_commands_separate(now):
+    assert await acheck_rate_limit("fetch_messages", 1, "room") == 0
+    assert await acheck_rate_limit("fetch_messages", 1, "room") == 2000
+    assert await acheck_rate_limit("new_message", 1, "room") == 0
+
+
+@pytest.mark.asyncio
+async def test_bucket_expires_when_full(now, rate_limits_redis: FakeRedis):
+    await acheck_rate_limit("new_message", 1, "room")
+
+    user_ttl = await rate_limits_redis.pttl(
+        construct_name_of_redis_hash_for_user_rate_limit("new_message", 1)
+    )
+    room_ttl = await rate_limits_redis.pttl(
+        construct_name_of_redis_hash_for_room_rate_limit("new_message", "room")
+    )
+    assert 0 < user_ttl <= 1000
+    assert 0 < room_ttl <= 100
+
+
+@pytest.mark.asyncio
+async def test_single_round_trip(mocker: MockerFixture, rate_limits_redis):
+    evalsha_spy = mocker.spy(rate_limits_redis, "evalsha")
+    eval_spy = mocker.spy(rate_limits_redis, "eval")
+    # Loads script
+    await acheck_rate_limit("new_message", 1, "room")
+    evalsha_spy.reset_mock()
+    eval_spy.reset_mock()
+
+    await acheck_rate_limit("new_message", 1, "room")
+
+    evalsha_spy.assert_called_once()
+    eval_spy.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_command_without_limits(mocker: MockerFixture):
+    get_async_redis_connection_patched = mocker.patch(
+        "chat.rate_limits.get_async_redis_connection"
+    )
+
+    assert await acheck_rate_limit("heartbeat", 1, "room") == 0
+    get_async_redis_connection_patched.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_redis_error_allows_command(mocker: MockerFixture):
+    mocker.patch(
+        "chat.rate_limits.arun_script", side_effect=RedisConnectionError
+    )
+
+    assert await acheck_rate_limit("new_message", 1, "room") == 0
+    assert metrics.get_metrics()["counters"] == {"rate_limits.errors": 1}
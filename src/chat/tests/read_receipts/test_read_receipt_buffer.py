@@ -0,0 +1,124 @@
+from asyncio import sleep
+from unittest.mock import Mock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from chat import metrics
+from chat.read_receipts import ReadReceiptBuffer
+
+
+@pytest.fixture
+def mark_messages_read_bulk_mock(mocker: MockerFixture) -> Mock:
+    return mocker.patch("chat.read_receipts.mark_messages_read_bulk")
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+@pytest.mark.asyncio
+async def test_newest_message_kept(mark_messages_read_bulk_mock: Mock):
+    buffer = ReadReceiptBuffer(flush_interval=60, batch_size=100)
+
+    buffer.add(1, "room", 5)
+    buffer.add(1, "room", 3)
+    buffer.add(1, "room", 7)
+    buffer.add(2, "room", 1)
+    await buffer.flush()
+
+    mark_messages_read_bulk_mock.assert_called_once_with(
+        {(1, "room"): 7, (2, "room"): 1}
+    )
+    assert buffer.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_after_interval(mark_messages_read_bulk_mock: Mock):
+    buffer = ReadReceiptBuffer(flush_interval=0.01, batch_size=100)
+
+    buffer.add(1, "room", 5)
+    mark_messages_read_bulk_mock.assert_not_called()
+    await sleep(0.05)
+
+    mark_messages_read_bulk_mock.assert_called_once_with({(1, "room"): 5})
+
+
+@pytest.mark.asyncio
+async def test_flush_on_batch_size(mark_messages_read_bulk_mock: Mock):
+    buffer = ReadReceiptBuffer(flush_interval=60, batch_size=3)
+
+    for user_id in range(3):
+        buffer.add(user_id, "room", 1)
+    await sleep(0.01)
+
+    mark_messages_read_bulk_mock.assert_called_once_with(
+        {(user_id, "room"): 1 for user_id in range(3)}
+    )
+
+
+@pytest.mark.asyncio
+async def test_flush_in_chunks_of_batch_size(
+    mark_messages_read_bulk_mock: Mock,
+):
+    buffer = ReadReceiptBuffer(flush_interval=60, batch_size=2)
+
+    # Receipts added before the scheduled flush runs
+    for user_id in range(5):
+        buffer.add(user_id, "room", 1)
+    await buffer.flush()
+
+    assert [
+        call.args[0] for call in mark_messages_read_bulk_mock.call_args_list
+    ] == [
+        {(0, "room"): 1, (1, "room"): 1},
+        {(2, "room"): 1, (3, "room"): 1},
+        {(4, "room"): 1},
+    ]
+    assert buffer.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_empty_flush(mark_messages_read_bulk_mock: Mock):
+    buffer = ReadReceiptBuffer(flush_interval=60, batch_size=100)
+
+    await buffer.flush()
+
+    mark_messages_read_bulk_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_metrics(mark_messages_read_bulk_mock: Mock):
+    buffer = ReadReceiptBuffer(flush_interval=60, batch_size=100)
+
+    buffer.add(1, "room", 1)
+    buffer.add(2, "room", 1)
+    assert metrics.get_metrics()["gauges"]["read_receipts.queue_depth"] == 2
+    await buffer.flush()
+
+    current_metrics = metrics.get_metrics()
+    assert current_metrics["gauges"]["read_receipts.queue_depth"] == 0
+    assert current_metrics["summaries"]["read_receipts.batch_size"] == {
+        "count": 1,
+        "sum": 2,
+        "max": 2,
+    }
+    assert (
+        current_metrics["summaries"]["read_receipts.flush_latency"]["count"]
+        == 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_dropped(mark_messages_read_bulk_mock: Mock):
+    mark_messages_read_bulk_mock.side_effect = Exception
+    buffer = ReadReceiptBuffer(flush_interval=60, batch_size=100)
+
+    buffer.add(1, "room", 1)
+    await buffer.flush()
+
+    assert metrics.get_metrics()["counters"]["read_receipts.dropped"] == 1
+    assert buffer.queue_depth == 0
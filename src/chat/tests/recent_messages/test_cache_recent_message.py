@@ -0,0 +1,65 @@
+import pytest
+from django.contrib.auth.models import User
+from django.test import override_settings
+from fakeredis import FakeStrictRedis
+
+from chat.models import ChatRoom
+from chat.recent_messages import get_recent_messages
+from chat.selectors import get_last_20_messages
+from chat.services import create_message
+
+
+@pytest.mark.django_db
+def test_message_pushed_to_cached(
+    django_capture_on_commit_callbacks,
+    recent_messages_redis: FakeStrictRedis,
+    room: ChatRoom,
+    user: User,
+):
+    create_message(user, room, "first")
+    _ = get_recent_messages(str(room.id))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_message(user, room, "second")
+
+    assert recent_messages_redis.llen(f"chat:recent_messages:{room.id}") == 2
+    assert get_recent_messages(str(room.id)) == get_last_20_messages(
+        str(room.id), "0"
+    )
+
+
+@pytest.mark.django_db
+def test_not_cached_room_not_pushed(
+    django_capture_on_commit_callbacks,
+    recent_messages_redis: FakeStrictRedis,
+    room: ChatRoom,
+    user: User,
+):
+    """
+    Tests that a single message isn't cached as the whole room history.
+    """
+    with django_capture_on_commit_callbacks(execute=True):
+        create_message(user, room, "content")
+
+    assert not recent_messages_redis.exists(f"chat:recent_messages:{room.id}")
+    assert recent_messages_redis.get(
+        f"chat:recent_messages_version:{room.id}"
+    ) == b"1"
+
+
+@pytest.mark.django_db
+@override_settings(RECENT_MESSAGES_CACHE_SIZE=3)
+def test_list_capped(
+    django_capture_on_commit_callbacks,
+    recent_messages_redis: FakeStrictRedis,
+    room: ChatRoom,
+    user: User,
+):
+    create_message(user, room, "first")
+    _ = get_recent_messages(str(room.id))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for i in range(5):
+            create_message(user, room, str(i))
+
+    assert recent_messages_redis.llen(f"chat:recent_messages:{room.id}") == 3
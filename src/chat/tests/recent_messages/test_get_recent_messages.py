@@ -0,0 +1,82 @@
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+from fakeredis import FakeStrictRedis
+from pytest_mock import MockerFixture
+from redis import ConnectionError
+
+from chat import metrics
+from chat.models import ChatRoom, Message
+from chat.recent_messages import get_recent_messages
+from chat.selectors import get_last_20_messages
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+def _create_messages(room: ChatRoom, user: User, num_messages: int) -> None:
+    for i in range(num_messages):
+        Message.objects.create(author=user, room=room, content=str(i))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_messages", (0, 1, 20, 60))
+def test_miss_returns_db_messages(
+    recent_messages_redis: FakeStrictRedis,
+    room: ChatRoom,
+    user: User,
+    num_messages: int,
+):
+    _create_messages(room, user, num_messages)
+
+    messages = get_recent_messages(str(room.id))
+
+    assert messages == get_last_20_messages(str(room.id), "0")
+    assert metrics.get_metrics()["counters"] == {"recent_messages.misses": 1}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_messages", (1, 20, 60))
+def test_hit_returns_cached_messages(
+    django_assert_num_queries,
+    recent_messages_redis: FakeStrictRedis,
+    room: ChatRoom,
+    user: User,
+    num_messages: int,
+):
+    _create_messages(room, user, num_messages)
+    _ = get_recent_messages(str(room.id))
+
+    with django_assert_num_queries(0):
+        messages = get_recent_messages(str(room.id))
+
+    assert messages == get_last_20_messages(str(room.id), "0")
+    assert metrics.get_metrics()["counters"] == {
+        "recent_messages.misses": 1,
+        "recent_messages.hits": 1,
+    }
+
+
+@pytest.mark.django_db
+def test_redis_error_falls_back_to_db(
+    mocker: MockerFixture,
+    recent_messages_redis: FakeStrictRedis,
+    room: ChatRoom,
+    user: User,
+):
+    _create_messages(room, user, 5)
+    mocker.patch.object(
+        recent_messages_redis, "lrange", side_effect=ConnectionError
+    )
+
+    messages = get_recent_messages(str(room.id))
+
+    assert messages == get_last_20_messages(str(room.id), "0")
+    assert metrics.get_metrics()["counters"] == {"recent_messages.errors": 1}
@@ -0,0 +1,24 @@
+import pytest
+from django.contrib.auth.models import User
+from fakeredis import FakeStrictRedis
+
+from chat.models import ChatRoom, Message
+from chat.recent_messages import (
+    get_recent_messages,
+    invalidate_recent_messages,
+)
+
+
+@pytest.mark.django_db
+def test_cached_messages_removed(
+    recent_messages_redis: FakeStrictRedis, room: ChatRoom, user: User
+):
+    Message.objects.create(author=user, room=room, content="content")
+    _ = get_recent_messages(str(room.id))
+
+    invalidate_recent_messages(str(room.id))
+
+    assert not recent_messages_redis.exists(f"chat:recent_messages:{room.id}")
+    assert recent_messages_redis.get(
+        f"chat:recent_messages_version:{room.id}"
+    ) == b"1"
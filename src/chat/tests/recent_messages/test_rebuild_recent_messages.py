@@ -0,0 +1,68 @@
+from time import sleep
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+from fakeredis import FakeStrictRedis
+from pytest_mock import MockerFixture
+
+from chat.models import ChatRoom, Message
+from chat.recent_messages import get_recent_messages, rebuild_recent_messages
+from chat.selectors import get_last_messages
+
+
+def _create_messages(room: ChatRoom, user: User, num_messages: int) -> None:
+    for i in range(num_messages):
+        Message.objects.create(author=user, room=room, content=str(i))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_messages", (0, 1, 60))
+def test_messages_cached(
+    recent_messages_redis: FakeStrictRedis,
+    room: ChatRoom,
+    user: User,
+    num_messages: int,
+):
+    _create_messages(room, user, num_messages)
+
+    messages = rebuild_recent_messages(str(room.id))
+
+    expected_messages = get_last_messages(
+        str(room.id), settings.RECENT_MESSAGES_CACHE_SIZE
+    )
+    assert messages == expected_messages
+    assert recent_messages_redis.llen(
+        f"chat:recent_messages:{room.id}"
+    ) == len(expected_messages)
+
+
+@pytest.mark.django_db
+def test_changed_room_not_cached(
+    mocker: MockerFixture,
+    recent_messages_redis: FakeStrictRedis,
+    room: ChatRoom,
+    user: User,
+):
+    """
+    Tests that rebuild racing with a new message doesn't cache history without
+    the message.
+    """
+    _create_messages(room, user, 5)
+
+    def _get_last_messages_during_new_message(*args):
+        messages = get_last_messages(*args)
+        recent_messages_redis.incr(f"chat:recent_messages_version:{room.id}")
+        return messages
+
+    mocker.patch(
+        "chat.recent_messages.get_last_messages",
+        new=_get_last_messages_during_new_message,
+    )
+
+    messages = rebuild_recent_messages(str(room.id))
+
+    assert len(messages) == 5
+    assert not recent_messages_redis.exists(f"chat:recent_messages:{room.id}")
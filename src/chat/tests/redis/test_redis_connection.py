@@ -2,7 +2,7 @@ from os import environ
 
 from fakeredis import FakeStrictRedis
 
-from chat.redis import get_redis_connection
+from chat.redis import get_async_redis_connection, get_redis_connection
 
 
 def test_redis_connection(mocker, clear_redis_connection_cache):
@@ -29,3 +29,41 @@ def test_redis_connection2(mocker, clear_redis_connection_cache):
         "rediss://:redis_TSL_link", ssl_cert_reqs=None
     )
     assert connection1 == connection2
+
+
+def test_async_redis_connection(
+    mocker, settings, clear_async_redis_connection_cache
+):
+    pool_from_url_patched = mocker.patch(
+        "chat.redis.BlockingConnectionPool.from_url"
+    )
+    environ["REDIS_URL"] = "redis_non_TSL_link"
+    connection1 = get_async_redis_connection()
+    connection2 = get_async_redis_connection()
+
+    pool_from_url_patched.assert_called_once_with(
+        "redis_non_TSL_link",
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    )
+    assert connection1 is connection2
+    assert connection1.connection_pool == pool_from_url_patched.return_value
+
+
+def test_async_redis_connection2(
+    mocker, settings, clear_async_redis_connection_cache
+):
+    pool_from_url_patched = mocker.patch(
+        "chat.redis.BlockingConnectionPool.from_url"
+    )
+    environ["REDIS_URL"] = "rediss://:redis_TSL_link"
+    get_async_redis_connection()
+
+    pool_from_url_patched.assert_called_once_with(
+        "rediss://:redis_TSL_link",
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        ssl_cert_reqs=None,
+    )
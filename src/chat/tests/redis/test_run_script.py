@@ -0,0 +1,34 @@
+import pytest
+from fakeredis import FakeServer, FakeStrictRedis
+from fakeredis.aioredis import FakeRedis
+from pytest_mock import MockerFixture
+
+from chat.redis import arun_script, run_script
+
+SCRIPT = "return redis.call('INCRBY', KEYS[1], ARGV[1])"
+
+
+def test_script_loaded_once(mocker: MockerFixture):
+    redis_connection = FakeStrictRedis(server=FakeServer())
+    eval_spy = mocker.spy(redis_connection, "eval")
+
+    results = [
+        run_script(redis_connection, SCRIPT, ["key"], [2]) for _ in range(2)
+    ]
+
+    assert results == [2, 4]
+    eval_spy.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_async_script_loaded_once(mocker: MockerFixture):
+    redis_connection = FakeRedis(server=FakeServer())
+    eval_spy = mocker.spy(redis_connection, "eval")
+
+    results = [
+        await arun_script(redis_connection, SCRIPT, ["key"], [2])
+        for _ in range(2)
+    ]
+
+    assert results == [2, 4]
+    eval_spy.assert_called_once()
@@ -0,0 +1,74 @@
+from uuid import uuid4
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from fakeredis import FakeStrictRedis
+from pytest_mock import MockerFixture
+from redis import ConnectionError as RedisConnectionError
+
+from chat import metrics
+from chat.models import ChatRoom
+from chat.room_members import ais_room_member, cache_room_members
+from chat.utils import construct_name_of_redis_set_for_room_members
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_miss_fills_cache(
+    room_members_redis: FakeStrictRedis, async_room: ChatRoom
+):
+    is_member = await ais_room_member(async_room.admin_id, async_room.id)
+
+    assert is_member
+    assert room_members_redis.smembers(
+        construct_name_of_redis_set_for_room_members(async_room.id)
+    ) == {str(async_room.admin_id).encode()}
+    assert metrics.get_metrics()["counters"] == {"room_members.misses": 1}
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+@pytest.mark.parametrize("is_member", (True, False))
+async def test_hit_stays_in_event_loop(
+    mocker: MockerFixture, async_room: ChatRoom, is_member: bool
+):
+    await sync_to_async(cache_room_members)(async_room.id)
+    db_sync_to_async_mock = mocker.patch(
+        "chat.room_members.db_sync_to_async"
+    )
+    user_id = async_room.admin_id if is_member else async_room.admin_id + 1
+
+    result = await ais_room_member(user_id, async_room.id)
+
+    assert result is is_member
+    db_sync_to_async_mock.assert_not_called()
+    assert metrics.get_metrics()["counters"] == {"room_members.hits": 1}
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+@pytest.mark.parametrize("is_member", (True, False))
+async def test_redis_error_falls_back_to_db(
+    mocker: MockerFixture, async_room: ChatRoom, is_member: bool
+):
+    mocker.patch(
+        "chat.room_members.get_async_redis_connection",
+        side_effect=RedisConnectionError,
+    )
+    other_user = await sync_to_async(User.objects.create)(
+        username=f"test-user-{uuid4()}"
+    )
+    user_id = async_room.admin_id if is_member else other_user.id
+
+    result = await ais_room_member(user_id, async_room.id)
+
+    assert result is is_member
+    assert metrics.get_metrics()["counters"] == {"room_members.errors": 1}
@@ -0,0 +1,60 @@
+import pytest
+from fakeredis import FakeStrictRedis
+from pytest_mock import MockerFixture
+
+from chat.models import ChatRoom
+from chat.room_members import cache_room_members
+from chat.tests.services import multiple_users_generator
+from chat.utils import (
+    construct_name_of_redis_key_for_room_members_version,
+    construct_name_of_redis_set_for_room_members,
+)
+
+
+@pytest.mark.django_db
+def test_members_cached(
+    settings, room_members_redis: FakeStrictRedis, room: ChatRoom
+):
+    member = next(multiple_users_generator())
+    room.members.add(member)
+    members_key = construct_name_of_redis_set_for_room_members(room.id)
+
+    members_ids = cache_room_members(room.id)
+
+    assert members_ids == {room.admin.id, member.id}
+    assert room_members_redis.smembers(members_key) == {
+        str(room.admin.id).encode(),
+        str(member.id).encode(),
+    }
+    assert 0 < room_members_redis.ttl(members_key) <= (  # type: ignore
+        settings.ROOM_MEMBERS_CACHE_TTL
+    )
+
+
+@pytest.mark.django_db
+def test_members_changed_during_filling_arent_cached(
+    mocker: MockerFixture,
+    room_members_redis: FakeStrictRedis,
+    room: ChatRoom,
+):
+    """
+    Tests that set isn't cached if members changed between reading them from
+    database and writing them to redis.
+    """
+    def get_members_ids_and_change_members(room_id):
+        room_members_redis.incr(
+            construct_name_of_redis_key_for_room_members_version(room_id)
+        )
+        return {room.admin.id}
+
+    mocker.patch(
+        "chat.room_members._get_members_ids",
+        side_effect=get_members_ids_and_change_members,
+    )
+
+    members_ids = cache_room_members(room.id)
+
+    assert members_ids == {room.admin.id}
+    assert not room_members_redis.exists(
+        construct_name_of_redis_set_for_room_members(room.id)
+    )
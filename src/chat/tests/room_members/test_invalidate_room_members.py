@@ -0,0 +1,44 @@
+import pytest
+from fakeredis import FakeStrictRedis
+from pytest_mock import MockerFixture
+from redis import ConnectionError as RedisConnectionError
+
+from chat.models import ChatRoom
+from chat.room_members import cache_room_members, invalidate_room_members
+from chat.utils import (
+    construct_name_of_redis_key_for_room_members_version,
+    construct_name_of_redis_set_for_room_members,
+)
+
+
+@pytest.mark.django_db
+def test_cached_members_removed(
+    room_members_redis: FakeStrictRedis, room: ChatRoom
+):
+    cache_room_members(room.id)
+
+    invalidate_room_members(room.id)
+
+    assert not room_members_redis.exists(
+        construct_name_of_redis_set_for_room_members(room.id)
+    )
+    assert (
+        room_members_redis.get(
+            construct_name_of_redis_key_for_room_members_version(room.id)
+        )
+        == b"1"
+    )
+
+
+@pytest.mark.django_db
+def test_redis_error_logged(
+    mocker: MockerFixture, caplog: pytest.LogCaptureFixture, room: ChatRoom
+):
+    mocker.patch(
+        "chat.room_members.get_redis_connection",
+        side_effect=RedisConnectionError,
+    )
+
+    invalidate_room_members(room.id)
+
+    assert f"Failed to invalidate members of {room.id}." in caplog.text
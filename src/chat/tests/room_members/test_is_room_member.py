@@ -0,0 +1,90 @@
+import pytest
+from django.contrib.auth.models import User
+from fakeredis import FakeStrictRedis
+from pytest_mock import MockerFixture
+from redis import ConnectionError as RedisConnectionError
+
+from chat import metrics
+from chat.models import ChatRoom
+from chat.room_members import is_room_member
+from chat.tests.services import multiple_users_generator
+from chat.utils import construct_name_of_redis_set_for_room_members
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+@pytest.mark.django_db
+def test_miss_fills_cache(
+    django_assert_num_queries,
+    room_members_redis: FakeStrictRedis,
+    room: ChatRoom,
+):
+    member = next(multiple_users_generator())
+    room.members.add(member)
+
+    with django_assert_num_queries(1):
+        is_member = is_room_member(member.id, room.id)
+
+    assert is_member
+    assert room_members_redis.smembers(
+        construct_name_of_redis_set_for_room_members(room.id)
+    ) == {str(room.admin.id).encode(), str(member.id).encode()}
+    assert metrics.get_metrics()["counters"] == {"room_members.misses": 1}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("is_member", (True, False))
+def test_hit_doesnt_query_db(
+    django_assert_num_queries, user: User, room: ChatRoom, is_member: bool
+):
+    non_member = next(multiple_users_generator())
+    is_room_member(user.id, room.id)
+
+    with django_assert_num_queries(0):
+        result = is_room_member(
+            user.id if is_member else non_member.id, room.id
+        )
+
+    assert result is is_member
+    assert metrics.get_metrics()["counters"] == {
+        "room_members.misses": 1,
+        "room_members.hits": 1,
+    }
+
+
+@pytest.mark.django_db
+def test_room_without_members_isnt_cached(
+    room_members_redis: FakeStrictRedis, user: User, room_no_members: ChatRoom
+):
+    is_member = is_room_member(user.id, room_no_members.id)
+
+    assert not is_member
+    assert not room_members_redis.exists(
+        construct_name_of_redis_set_for_room_members(room_no_members.id)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("is_member", (True, False))
+def test_redis_error_falls_back_to_db(
+    mocker: MockerFixture,
+    django_assert_num_queries,
+    room: ChatRoom,
+    is_member: bool,
+):
+    mocker.patch(
+        "chat.room_members.get_redis_connection",
+        side_effect=RedisConnectionError,
+    )
+    user_id = room.admin.id if is_member else room.admin.id + 1
+
+    with django_assert_num_queries(1):
+        result = is_room_member(user_id, room.id)
+
+    assert result is is_member
+    assert metrics.get_metrics()["counters"] == {"room_members.errors": 1}
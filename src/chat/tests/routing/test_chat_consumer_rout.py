@@ -16,8 +16,8 @@ from chat.models import ChatRoom
 async def test_successful_connection(
     mocker: MockerFixture, async_room: ChatRoom
 ):
-    mocker.patch("chat.consumers.save_channel_name", return_value=None)
-    mocker.patch("chat.consumers.remove_channel_name", return_value=None)
+    mocker.patch("chat.consumers.asave_channel_name", return_value=None)
+    mocker.patch("chat.consumers.aremove_channel_name", return_value=None)
 
     communicator = WebsocketCommunicator(
         ChatConsumer.as_asgi(),
@@ -40,8 +40,8 @@ async def test_successful_connection(
 @pytest.mark.asyncio
 @pytest.mark.django_db
 async def test_denied_connection(mocker: MockerFixture, user: User):
-    mocker.patch("chat.consumers.save_channel_name", return_value=None)
-    mocker.patch("chat.consumers.remove_channel_name", return_value=None)
+    mocker.patch("chat.consumers.asave_channel_name", return_value=None)
+    mocker.patch("chat.consumers.aremove_channel_name", return_value=None)
 
     unexistent_room_id = uuid4()
     communicator = WebsocketCommunicator(
@@ -0,0 +1,28 @@
+import pytest
+from channels.layers import InMemoryChannelLayer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from pytest_mock import MockerFixture
+
+from chat.routing import websocket_urlpatterns
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_user_socket_connection(mocker: MockerFixture, user: User):
+    mocker.patch("chat.consumers.asave_channel_name", return_value=None)
+    mocker.patch("chat.consumers.aremove_channel_name", return_value=None)
+
+    communicator = WebsocketCommunicator(
+        URLRouter(websocket_urlpatterns), "/ws/chat/"
+    )
+    communicator.scope["user"] = user
+
+    communicator.scope["channel_layer"] = InMemoryChannelLayer()
+
+    connected, _ = await communicator.connect()
+
+    assert connected
+
+    await communicator.disconnect()
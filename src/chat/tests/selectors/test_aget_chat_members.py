@@ -0,0 +1,24 @@
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom
+from chat.selectors import aget_chat_members
+from chat.tests.services import multiple_users_generator
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+@pytest.mark.parametrize("num_members", (0, 1, 5))
+async def test_return_values(
+    async_room: ChatRoom, async_user: User, num_members: int
+):
+    multiple_users = multiple_users_generator()
+    other_users = await sync_to_async(
+        lambda: [next(multiple_users) for _ in range(num_members)]
+    )()
+    await sync_to_async(async_room.members.add)(*other_users)
+
+    members = await aget_chat_members(async_room)
+
+    assert members == [async_user, *other_users]
@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom
+from chat.selectors import aget_chat_members_ids
+from chat.tests.services import multiple_users_generator
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+@pytest.mark.parametrize("num_members", (0, 1, 5))
+async def test_return_values(
+    async_room: ChatRoom, async_user: User, num_members: int
+):
+    multiple_users = multiple_users_generator()
+    other_users = await sync_to_async(
+        lambda: [next(multiple_users) for _ in range(num_members)]
+    )()
+    await sync_to_async(async_room.members.add)(*other_users)
+
+    members_ids = await aget_chat_members_ids(str(async_room.id))
+
+    assert sorted(members_ids) == sorted(
+        [async_user.id, *(other_user.id for other_user in other_users)]
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_room_doesnt_exist():
+    members_ids = await aget_chat_members_ids(str(uuid4()))
+
+    assert members_ids == []
@@ -0,0 +1,36 @@
+from time import time
+
+import pytest
+from django.conf import settings
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from pytest_mock import MockerFixture
+
+from chat.selectors import aget_online_users_ids
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+)
+
+
+@pytest.mark.asyncio
+async def test_return_values(mocker: MockerFixture):
+    fake_redis_con = FakeRedis(server=FakeServer())
+    mocker.patch(
+        "chat.selectors.get_async_redis_connection",
+        return_value=fake_redis_con,
+    )
+    dead_heartbeat = time() - settings.PRESENCE_TIMEOUT - 1
+    await fake_redis_con.zadd(
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(1),
+        {"live": time(), "dead": dead_heartbeat},
+    )
+    await fake_redis_con.zadd(
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(2),
+        {"dead": dead_heartbeat},
+    )
+    await fake_redis_con.zadd(
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(4),
+        {"live": time()},
+    )
+
+    assert await aget_online_users_ids([1, 2, 3, 4]) == [1, 4]
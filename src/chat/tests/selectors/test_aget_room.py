@@ -0,0 +1,22 @@
+from uuid import uuid4
+
+import pytest
+
+from chat.models import ChatRoom
+from chat.selectors import aget_room
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_returns_room(async_room: ChatRoom):
+    returned_room = await aget_room(str(async_room.id))
+
+    assert returned_room == async_room
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_no_returns_none():
+    returned_room = await aget_room(str(uuid4()))
+
+    assert returned_room is None
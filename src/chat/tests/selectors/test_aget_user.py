@@ -0,0 +1,20 @@
+import pytest
+from django.contrib.auth.models import User
+
+from chat.selectors import aget_user
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_return_user(async_user: User):
+    returned_user = await aget_user(async_user.username)
+
+    assert returned_user == async_user
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_no_return_user():
+    returned_user = await aget_user("unexistent-username")
+
+    assert returned_user is None
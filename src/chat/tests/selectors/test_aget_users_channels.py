@@ -0,0 +1,55 @@
+from time import time
+from uuid import uuid4
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from pytest_mock import MockerFixture
+
+from chat.selectors import aget_users_channels
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_users", (0, 1, 5))
+@pytest.mark.parametrize("num_channels", (0, 1, 5))
+async def test_return_values(
+    mocker: MockerFixture, num_users: int, num_channels: int
+):
+    fake_redis_con = FakeRedis(server=FakeServer())
+    mocker.patch(
+        "chat.selectors.get_async_redis_connection",
+        return_value=fake_redis_con,
+    )
+    users = [
+        await sync_to_async(User.objects.create)(
+            username=f"test-user-{uuid4()}", password="test-password"
+        )
+        for _ in range(num_users)
+    ]
+    expected_channels = []
+    for user in users:
+        redis_key_name = (
+            construct_name_of_redis_sorted_set_for_channels_names_test_method(
+                user.id
+            )
+        )
+        await fake_redis_con.zadd(
+            redis_key_name,
+            {"dead_name": time() - settings.PRESENCE_TIMEOUT - 1},
+        )
+        for i in range(num_channels):
+            await fake_redis_con.zadd(redis_key_name, {f"name_{i}": time() + i})
+        expected_channels.append(
+            [f"name_{i}".encode() for i in range(num_channels)]
+        )
+
+    channels = await aget_users_channels(users)
+
+    assert channels == expected_channels
@@ -0,0 +1,52 @@
+from uuid import uuid4
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from pytest_mock import MockerFixture
+
+from chat.models import ChatRoom
+from chat.selectors import ais_chat_member
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_user_is_member(async_room: ChatRoom):
+    is_member = await ais_chat_member(async_room.admin_id, str(async_room.id))
+
+    assert is_member
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_user_is_not_member(async_room: ChatRoom):
+    other_user = await sync_to_async(User.objects.create)(
+        username=f"test-user-{uuid4()}"
+    )
+
+    is_member = await ais_chat_member(other_user.id, str(async_room.id))
+
+    assert not is_member
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_room_doesnt_exist(async_user: User):
+    is_member = await ais_chat_member(async_user.id, str(uuid4()))
+
+    assert not is_member
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("user_id", "room_id"), ((None, str(uuid4())), (1, "not-uuid"))
+)
+async def test_invalid_arguments(
+    mocker: MockerFixture, user_id: int | None, room_id: str
+):
+    ais_room_member_mock = mocker.patch("chat.selectors.ais_room_member")
+
+    is_member = await ais_chat_member(user_id, room_id)
+
+    assert not is_member
+    ais_room_member_mock.assert_not_called()
@@ -0,0 +1,66 @@
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom
+from chat.selectors import annotate_chats_list
+from chat.services import create_message
+from chat.tests.services import multiple_users_generator
+
+
+@pytest.mark.django_db
+def test_annotations_no_messages(user: User, room: ChatRoom):
+    annotated_room = annotate_chats_list(user.chat_rooms.all(), user).get()
+
+    assert annotated_room.last_message is None
+    assert annotated_room.num_unread_msgs == 0  # type: ignore
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_messages", (1, 5))
+def test_annotations_with_messages(
+    user: User, room: ChatRoom, num_messages: int
+):
+    other_user = next(multiple_users_generator())
+    messages = []
+    for i in range(num_messages):
+        message = create_message(other_user, room, str(i))
+        messages.append(message)
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+    annotated_room = annotate_chats_list(user.chat_rooms.all(), user).get()
+
+    assert annotated_room.last_message == messages[-1]
+    assert annotated_room.num_unread_msgs == num_messages  # type: ignore
+
+
+@pytest.mark.django_db
+def test_ordered_by_last_activity(user: User):
+    rooms = []
+    for _ in range(3):
+        room = ChatRoom.objects.create(admin=user)
+        room.members.add(user)
+        rooms.append(room)
+        sleep(0.0001)
+    create_message(user, rooms[0], "content")
+
+    annotated_rooms = annotate_chats_list(user.chat_rooms.all(), user)
+
+    assert list(annotated_rooms) == [rooms[0], rooms[2], rooms[1]]
+
+
+@pytest.mark.django_db
+def test_not_backfilled_rooms_ordered_last(user: User):
+    rooms = []
+    for _ in range(2):
+        room = ChatRoom.objects.create(admin=user)
+        room.members.add(user)
+        rooms.append(room)
+        sleep(0.0001)
+    ChatRoom.objects.filter(pk=rooms[1].pk).update(last_activity_at=None)
+
+    annotated_rooms = annotate_chats_list(user.chat_rooms.all(), user)
+
+    assert list(annotated_rooms) == [rooms[0], rooms[1]]
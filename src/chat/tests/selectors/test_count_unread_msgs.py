@@ -4,19 +4,24 @@ from uuid import uuid4
 import pytest
 from django.contrib.auth.models import User
 
-from chat.models import ChatRoom, Message
+from chat.models import ChatRoom, Message, ReadState
 from chat.selectors import count_unread_msgs
+from chat.tests.services import multiple_users_generator
 
 
-def _add_unread_messages(user: User, room_obj: ChatRoom, num_messages: int):
+def _add_messages(
+    author: User, room_obj: ChatRoom, num_messages: int
+) -> list[Message]:
+    messages = []
     for i in range(num_messages):
-        msg = Message.objects.create(
-            author=user, room=room_obj, content=str(i)
+        messages.append(
+            Message.objects.create(author=author, room=room_obj, content=str(i))
         )
-        msg.unread_by.add(user)
         # Necessary for difference in timestamps
         sleep(0.0001)
 
+    return messages
+
 
 @pytest.mark.django_db
 def test_room_is_current_page_room(user: User, room: ChatRoom):
@@ -28,13 +33,53 @@ def test_room_is_current_page_room(user: User, room: ChatRoom):
 @pytest.mark.parametrize("num_messages", [0, 1, 10, 50])
 @pytest.mark.django_db
 def test_return_unread_msgs(user: User, room: ChatRoom, num_messages: int):
-    _add_unread_messages(user, room, num_messages)
+    _add_messages(next(multiple_users_generator()), room, num_messages)
 
     num_unread_msgs = count_unread_msgs(room, user, str(uuid4()))
 
     assert num_unread_msgs == num_messages
 
 
+@pytest.mark.parametrize("num_read_messages", [0, 1, 5, 10])
+@pytest.mark.django_db
+def test_messages_up_to_cursor_read(
+    user: User, room: ChatRoom, num_read_messages: int
+):
+    messages = _add_messages(next(multiple_users_generator()), room, 10)
+    ReadState.objects.create(
+        user=user,
+        room=room,
+        last_read_message=(
+            messages[num_read_messages - 1] if num_read_messages else None
+        ),
+    )
+
+    num_unread_msgs = count_unread_msgs(room, user, str(uuid4()))
+
+    assert num_unread_msgs == 10 - num_read_messages
+
+
+@pytest.mark.django_db
+def test_cursor_kept_when_read_message_deleted(user: User, room: ChatRoom):
+    messages = _add_messages(next(multiple_users_generator()), room, 10)
+    ReadState.objects.create(
+        user=user, room=room, last_read_message=messages[-1]
+    )
+
+    messages[-1].delete()
+
+    assert count_unread_msgs(room, user, str(uuid4())) == 0
+
+
+@pytest.mark.django_db
+def test_own_messages_not_counted(user: User, room: ChatRoom):
+    _add_messages(user, room, 5)
+
+    num_unread_msgs = count_unread_msgs(room, user, str(uuid4()))
+
+    assert num_unread_msgs == 0
+
+
 @pytest.mark.django_db
 def test_no_room_msgs(user: User, room: ChatRoom):
     num_unread_msgs = count_unread_msgs(room, user, str(uuid4()))
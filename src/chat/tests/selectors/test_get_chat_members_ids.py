@@ -0,0 +1,26 @@
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom
+from chat.selectors import get_chat_members_ids
+from chat.tests.services import multiple_users_generator
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_members", (0, 1, 5, 30))
+def test_return_values(room: ChatRoom, user: User, num_members: int):
+    multiple_users = multiple_users_generator()
+    other_users = [next(multiple_users) for _ in range(num_members)]
+    room.members.add(*other_users)
+
+    members_ids = get_chat_members_ids(room.id)
+
+    assert sorted(members_ids) == sorted(
+        [user.id, *(other_user.id for other_user in other_users)]
+    )
+
+
+@pytest.mark.django_db
+def test_single_query(django_assert_num_queries, room: ChatRoom):
+    with django_assert_num_queries(1):
+        list(get_chat_members_ids(room.id))
@@ -0,0 +1,29 @@
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom, Message
+from chat.selectors import get_last_messages
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ["num_messages", "num_requested"], [(0, 5), (3, 5), (10, 5), (60, 50)]
+)
+def test_return_values(
+    room: ChatRoom, user: User, num_messages: int, num_requested: int
+):
+    for i in range(num_messages):
+        Message.objects.create(author=user, room=room, content=str(i))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+    messages = get_last_messages(str(room.id), num_requested)
+
+    expected_messages = room.message.order_by("-timestamp")[:num_requested][
+        ::-1
+    ]
+    assert [message["id"] for message in messages] == [
+        message.id for message in expected_messages
+    ]
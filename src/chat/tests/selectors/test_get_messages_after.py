@@ -0,0 +1,88 @@
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom, Message
+from chat.selectors import get_messages_after
+from chat.utils import encode_messages_cursor
+
+
+def _get_chat_room(user: User, num_messages: int) -> ChatRoom:
+    """
+    Creates room object, and appends room with specified number of messages.
+    """
+    room_obj = ChatRoom.objects.create(admin=user)
+    room_obj.members.add(user)
+    for i in range(num_messages):
+        Message.objects.create(author=user, room=room_obj, content=str(i))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+    return room_obj
+
+
+def _cursor(message: Message) -> str:
+    return encode_messages_cursor(message.timestamp, message.id)
+
+
+@pytest.mark.django_db
+def test_messages_after_cursor_returned(user: User) -> None:
+    room_obj = _get_chat_room(user, 10)
+    room_messages = list(room_obj.message.order_by("timestamp", "id"))
+
+    messages = get_messages_after(str(room_obj.id), _cursor(room_messages[3]))
+
+    assert messages == [
+        {
+            "id": message.id,
+            "author__username": user.username,
+            "content": message.content,
+            "timestamp": message.timestamp,
+        }
+        for message in room_messages[4:]
+    ]
+
+
+@pytest.mark.django_db
+def test_first_page_returned(user: User) -> None:
+    room_obj = _get_chat_room(user, 30)
+    room_messages = list(room_obj.message.order_by("timestamp", "id"))
+
+    messages = get_messages_after(str(room_obj.id), _cursor(room_messages[0]))
+
+    assert [message["id"] for message in messages] == [
+        message.id for message in room_messages[1:21]
+    ]
+
+
+@pytest.mark.django_db
+def test_message_with_same_timestamp_returned(user: User) -> None:
+    room_obj = _get_chat_room(user, 2)
+    first_message, second_message = room_obj.message.order_by("id")
+    Message.objects.filter(id=second_message.id).update(
+        timestamp=first_message.timestamp
+    )
+
+    messages = get_messages_after(str(room_obj.id), _cursor(first_message))
+
+    assert [message["id"] for message in messages] == [second_message.id]
+
+
+@pytest.mark.django_db
+def test_other_room_messages_skipped(user: User) -> None:
+    room_obj = _get_chat_room(user, 1)
+    _get_chat_room(user, 5)
+
+    messages = get_messages_after(
+        str(room_obj.id), _cursor(room_obj.message.get())
+    )
+
+    assert messages == []
+
+
+@pytest.mark.django_db
+def test_invalid_cursor(user: User) -> None:
+    room_obj = _get_chat_room(user, 5)
+
+    assert get_messages_after(str(room_obj.id), "invalid") == []
@@ -0,0 +1,35 @@
+from time import time
+
+import pytest
+from django.contrib.auth.models import User
+from fakeredis import FakeServer, FakeStrictRedis
+from pytest_mock import MockerFixture
+
+from chat.models import ChatRoom
+from chat.selectors import get_online_members
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+    multiple_users_generator,
+)
+
+
+@pytest.mark.django_db
+def test_return_values(mocker: MockerFixture, room: ChatRoom, user: User):
+    fake_redis_con = FakeStrictRedis(server=FakeServer())
+    mocker.patch(
+        "chat.selectors.get_redis_connection", return_value=fake_redis_con
+    )
+    multiple_users = multiple_users_generator()
+    online_user, offline_user = next(multiple_users), next(multiple_users)
+    room.members.add(online_user, offline_user)
+    for member in (user, online_user):
+        fake_redis_con.zadd(
+            construct_name_of_redis_sorted_set_for_channels_names_test_method(
+                member.id
+            ),
+            {"channel": time()},
+        )
+
+    assert get_online_members(room) == sorted(
+        [user.username, online_user.username]
+    )
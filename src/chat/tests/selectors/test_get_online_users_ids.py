@@ -0,0 +1,31 @@
+from time import time
+
+from django.conf import settings
+from fakeredis import FakeServer, FakeStrictRedis
+from pytest_mock import MockerFixture
+
+from chat.selectors import get_online_users_ids
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+)
+
+
+def test_return_values(mocker: MockerFixture):
+    fake_redis_con = FakeStrictRedis(server=FakeServer())
+    mocker.patch(
+        "chat.selectors.get_redis_connection", return_value=fake_redis_con
+    )
+    dead_heartbeat = time() - settings.PRESENCE_TIMEOUT - 1
+    # User 1 has live and dead channels, user 2 only dead channel and user 3
+    # no channels.
+    fake_redis_con.zadd(
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(1),
+        {"live": time(), "dead": dead_heartbeat},
+    )
+    fake_redis_con.zadd(
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(2),
+        {"dead": dead_heartbeat},
+    )
+
+    assert get_online_users_ids([1, 2, 3]) == [1]
+    assert get_online_users_ids([]) == []
@@ -0,0 +1,50 @@
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom
+from chat.selectors import get_3_members, get_rooms_3_members
+from chat.tests.services import multiple_users_generator
+
+
+def _get_room(admin: User, users: list[User]) -> ChatRoom:
+    """
+    Creates room object and adds members to it.
+    """
+    room = ChatRoom.objects.create(admin=admin)
+    for user in users:
+        room.members.add(user)
+
+    return room
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_members", (0, 1, 2, 3, 4, 10))
+def test_same_as_get_3_members(user: User, num_members: int):
+    multiple_users = multiple_users_generator()
+    users = [next(multiple_users) for _ in range(num_members)]
+    room = _get_room(user, users)
+
+    rooms_members = get_rooms_3_members([room.id])
+
+    assert rooms_members.get(room.id, "") == get_3_members(room)
+
+
+@pytest.mark.django_db
+def test_multiple_rooms_single_query(django_assert_num_queries, user: User):
+    multiple_users = multiple_users_generator()
+    users = [next(multiple_users) for _ in range(5)]
+    rooms = [_get_room(user, users[i:]) for i in range(5)]
+
+    with django_assert_num_queries(1):
+        rooms_members = get_rooms_3_members([room.id for room in rooms])
+
+    assert rooms_members == {
+        room.id: ", ".join(user.username for user in users[i : i + 3])
+        for i, room in enumerate(rooms)
+    }
+
+
+@pytest.mark.django_db
+def test_no_rooms(django_assert_num_queries):
+    with django_assert_num_queries(0):
+        assert get_rooms_3_members([]) == {}
@@ -1,29 +1,40 @@
+from time import time
+
 import pytest
+from django.conf import settings
 from fakeredis import FakeStrictRedis
 from pytest_mock import MockerFixture
 from redis import Redis
 
 from chat.redis import get_redis_connection
 from chat.selectors import get_users_channels
-from chat.tests.services import construct_name_of_redis_list_for_channel_name_test_method, multiple_users_generator
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+    multiple_users_generator,
+)
 
 
 def _add_data_to_redis(
     redis_connection: Redis, user_id: int, num_channels: int
 ) -> list[bytes]:
     """
-    Appends data to redis list.
+    Adds live channels and one dead channel of the user to redis.
     """
+    redis_key_name = (
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(
+            user_id
+        )
+    )
+    redis_connection.zadd(
+        redis_key_name,
+        {"dead_name": time() - settings.PRESENCE_TIMEOUT - 1},
+    )
     data = []
     for i in range(num_channels):
-        redis_connection.lpush(
-            construct_name_of_redis_list_for_channel_name_test_method(user_id),
-            f"name_{i}",
-        )
+        redis_connection.zadd(redis_key_name, {f"name_{i}": time() + i})
         data.append(f"name_{i}".encode())
 
-    return data[::-1]
-
+    return data
 
 
 @pytest.mark.django_db
@@ -35,11 +46,7 @@ def test_return_values(
     num_channels: int,
     num_users: int,
 ):
-    redis_patched = mocker.patch("chat.redis.from_url", FakeStrictRedis)
-    mocker.patch(
-        "chat.selectors.construct_name_of_redis_list_for_channel_name",
-        construct_name_of_redis_list_for_channel_name_test_method,
-    )
+    mocker.patch("chat.redis.from_url", FakeStrictRedis)
 
     redis_connection = get_redis_connection()
 
@@ -53,3 +60,20 @@ def test_return_values(
     channels = get_users_channels(users)
 
     assert channels == expected_channels
+
+
+@pytest.mark.django_db
+def test_single_round_trip(clear_redis_data: None, mocker: MockerFixture):
+    mocker.patch("chat.redis.from_url", FakeStrictRedis)
+    redis_connection = get_redis_connection()
+    multiple_users = multiple_users_generator()
+    users = [next(multiple_users) for _ in range(5)]
+    # Loads script
+    get_users_channels(users)
+    evalsha_spy = mocker.spy(redis_connection, "evalsha")
+    eval_spy = mocker.spy(redis_connection, "eval")
+
+    get_users_channels(users)
+
+    evalsha_spy.assert_called_once()
+    eval_spy.assert_not_called()
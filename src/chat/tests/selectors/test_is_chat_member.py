@@ -1,3 +1,5 @@
+from uuid import uuid4
+
 import pytest
 from django.contrib.auth.models import User
 from pytest_mock import MockerFixture
@@ -24,12 +26,9 @@ def _add_users_to_room(num_members: int, room: ChatRoom) -> list[User]:
     (1, 2, 3),
 )
 def test_if_room_exists_user_is_member(
-    mocker: MockerFixture,
     room_no_members: ChatRoom,
     num_members: int,
 ):
-    mocker.patch("chat.selectors.get_room", return_value=room_no_members)
-
     users = _add_users_to_room(num_members, room_no_members)
 
     is_member = is_chat_member(users[0].id, str(room_no_members.id))
@@ -43,15 +42,12 @@ def test_if_room_exists_user_is_member(
     (1, 2, 3),
 )
 def test_if_room_doesnt_exists_user_is_member(
-    mocker: MockerFixture,
     room_no_members: ChatRoom,
     num_members: int,
 ):
-    mocker.patch("chat.selectors.get_room", return_value=None)
-
     users = _add_users_to_room(num_members, room_no_members)
 
-    is_member = is_chat_member(users[0].id, str(room_no_members.id))
+    is_member = is_chat_member(users[0].id, str(uuid4()))
 
     assert not is_member
 
@@ -59,13 +55,10 @@ def test_if_room_doesnt_exists_user_is_member(
 @pytest.mark.django_db
 @pytest.mark.parametrize("num_members", (0, 1, 2, 3))
 def test_if_room_exists_user_is_not_member(
-    mocker: MockerFixture,
     user: User,
     room_no_members: ChatRoom,
     num_members: int,
 ):
-    mocker.patch("chat.selectors.get_room", return_value=room_no_members)
-
     _add_users_to_room(num_members, room_no_members)
 
     is_member = is_chat_member(user.id, str(room_no_members.id))
@@ -74,17 +67,33 @@ def test_if_room_exists_user_is_not_member(
 
 
 @pytest.mark.django_db
-@pytest.mark.parametrize("num_members", (0, 1, 2, 3))
-def test_if_room_doesnt_exists_user_is_not_member(
-    mocker: MockerFixture,
-    user: User,
-    room_no_members: ChatRoom,
-    num_members: int,
-):
-    mocker.patch("chat.selectors.get_room", return_value=None)
+@pytest.mark.parametrize("room_id", ("", "not-uuid", "123"))
+def test_invalid_room_id(mocker: MockerFixture, room: ChatRoom, room_id: str):
+    is_room_member_mock = mocker.patch("chat.selectors.is_room_member")
 
-    _add_users_to_room(num_members, room_no_members)
+    is_member = is_chat_member(room.admin.id, room_id)
 
-    is_member = is_chat_member(user.id, str(room_no_members.id))
+    assert not is_member
+    is_room_member_mock.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_anonymous_user(mocker: MockerFixture, room: ChatRoom):
+    is_room_member_mock = mocker.patch("chat.selectors.is_room_member")
+
+    is_member = is_chat_member(None, room.id)
 
     assert not is_member
+    is_room_member_mock.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_cached_membership_doesnt_query_db(
+    django_assert_num_queries, room: ChatRoom
+):
+    is_chat_member(room.admin.id, str(room.id))
+
+    with django_assert_num_queries(0):
+        is_member = is_chat_member(room.admin.id, str(room.id))
+
+    assert is_member
@@ -1,17 +1,10 @@
 from time import sleep
-from unittest.mock import Mock
-
 import pytest
 from django.contrib.auth.models import User
-from pytest_mock import MockerFixture
 
 from chat.models import ChatRoom, Message
 from chat.selectors import get_last_20_messages
-
-
-@pytest.fixture
-def get_user_mock(mocker: MockerFixture, user: User):
-    return mocker.patch("chat.selectors.get_user", return_value=user)
+from chat.utils import encode_messages_cursor
 
 
 def _create_room(user_obj: User) -> ChatRoom:
@@ -20,24 +13,32 @@ def _create_room(user_obj: User) -> ChatRoom:
     return chat_room
 
 
-def _get_chat_room(user: User, num_messages: int, unread=False):
+def _get_chat_room(user: User, num_messages: int):
     """
     Creates user and room objects, and appends room with specified number of
     messages.
     """
     room_obj = _create_room(user)
     for i in range(num_messages):
-        msg = Message.objects.create(
-            author=user, room=room_obj, content=str(i)
-        )
-        if unread:
-            msg.unread_by.add(user)
+        Message.objects.create(author=user, room=room_obj, content=str(i))
         # Necessary for difference in timestamps
         sleep(0.0001)
 
     return room_obj
 
 
+def _values(messages: list[Message]) -> list[dict]:
+    return [
+        {
+            "id": message.id,
+            "author__username": message.author.username,
+            "content": message.content,
+            "timestamp": message.timestamp,
+        }
+        for message in messages
+    ]
+
+
 @pytest.mark.parametrize(
     ["num_messages", "expected_num_messages", "offset"],
     [
@@ -65,9 +66,9 @@ def test_num_returned_items(
     Tests if number of returned items muches expected number.
     """
     room_obj = _get_chat_room(user, num_messages)
-    messages = get_last_20_messages(str(room_obj.id), user.username, offset)
+    messages = get_last_20_messages(str(room_obj.id), offset)
 
-    assert len(messages) == expected_num_messages  # type: ignore
+    assert len(messages) == expected_num_messages
 
 
 @pytest.mark.parametrize(
@@ -79,42 +80,76 @@ def test_order_returned_items(
     num_messages: int, user: User, offset: str
 ) -> None:
     room_obj = _get_chat_room(user, num_messages)
-    messages = get_last_20_messages(str(room_obj.id), user.username, offset)
+    messages = get_last_20_messages(str(room_obj.id), offset)
 
-    expected_messages = list(
+    expected_messages = _values(
         room_obj.message.order_by("-timestamp")[int(offset) : int(offset) + 20][::-1]
     )
 
     assert messages == expected_messages
 
 
+@pytest.mark.parametrize("num_messages", (0, 19, 20, 21, 45))
 @pytest.mark.django_db
-def test_msgs_mark_as_read(user: User) -> None:
-    room_obj = _get_chat_room(user, 20, True)
+def test_cursor_pages(num_messages: int, user: User) -> None:
+    """
+    Tests if following cursors returns all room messages exactly once.
+    """
+    room_obj = _get_chat_room(user, num_messages)
+
+    pages = [get_last_20_messages(str(room_obj.id), "0")]
+    while len(pages[-1]) == 20:
+        oldest = pages[-1][0]
+        pages.append(
+            get_last_20_messages(
+                str(room_obj.id),
+                "0",
+                encode_messages_cursor(oldest["timestamp"], oldest["id"]),
+            )
+        )
 
-    _ = get_last_20_messages(str(room_obj.id), user.username, "0")
+    messages = [message for page in reversed(pages) for message in page]
+    assert messages == _values(room_obj.message.order_by("timestamp", "id"))
 
-    expected_messages: list[Message] = list(
-        room_obj.message.order_by("-timestamp")[:20][::-1]
+
+@pytest.mark.django_db
+def test_cursor_same_timestamp(user: User) -> None:
+    """
+    Tests if messages with the same timestamp are ordered by id.
+    """
+    room_obj = _get_chat_room(user, 25)
+    timestamp = room_obj.message.first().timestamp
+    room_obj.message.update(timestamp=timestamp)
+    messages = list(room_obj.message.order_by("id"))
+
+    page = get_last_20_messages(
+        str(room_obj.id),
+        "0",
+        encode_messages_cursor(timestamp, messages[10].id),
     )
 
-    unread = [msg.unread_by.all().exists() for msg in expected_messages]
-    assert True not in unread
+    assert page == _values(messages[:10])
 
 
 @pytest.mark.django_db
-def test_none_returned(get_user_mock: Mock, user: User) -> None:
+def test_invalid_cursor(user: User) -> None:
+    room_obj = _get_chat_room(user, 5)
+
+    messages = get_last_20_messages(str(room_obj.id), "0", "invalid cursor")
+
+    assert messages == []
+
+
+@pytest.mark.django_db
+def test_single_query(django_assert_num_queries, user: User) -> None:
     """
-    Tests if no user found. M2M relations will still exists.
+    Tests if authors are fetched in the same query as messages.
     """
-    get_user_mock.return_value = None
-    room_obj = _get_chat_room(user, 20, True)
+    room_obj = _get_chat_room(user, 20)
 
-    _ = get_last_20_messages(str(room_obj.id), user.username, "0")
-
-    expected_messages: list[Message] = list(
-        room_obj.message.order_by("-timestamp")[:20][::-1]
-    )
+    with django_assert_num_queries(1):
+        messages = get_last_20_messages(str(room_obj.id), "0")
 
-    unread = [msg.unread_by.all().exists() for msg in expected_messages]
-    assert False not in unread
+    assert {message["author__username"] for message in messages} == {
+        user.username
+    }
@@ -0,0 +1,26 @@
+import msgpack
+
+from chat.serializers import decode_msgpack_frame
+
+
+def test_keys_expanded():
+    frame = msgpack.packb(
+        {"c": "fetch_messages", "r": "room-id", "u": "username", "b": "cursor"}
+    )
+
+    data = decode_msgpack_frame(frame)
+
+    assert data == {
+        "command": "fetch_messages",
+        "room_id": "room-id",
+        "username": "username",
+        "before": "cursor",
+    }
+
+
+def test_unknown_keys_kept():
+    frame = msgpack.packb({"c": "heartbeat", "other": 1})
+
+    data = decode_msgpack_frame(frame)
+
+    assert data == {"command": "heartbeat", "other": 1}
@@ -0,0 +1,34 @@
+import json
+
+import msgpack
+
+from chat.serializers import (
+    encode_json_batch_frame,
+    encode_json_frame,
+    encode_msgpack_batch_frame,
+    encode_msgpack_frame,
+)
+
+MESSAGES = [
+    {"command": "new_message", "message": {"id": 1, "content": "first"}},
+    {"command": "chats_list_message", "room_id": "room-id", "message": {}},
+]
+
+
+def test_json_batch_frame():
+    frames = [encode_json_frame(message) for message in MESSAGES]
+
+    batch_frame = encode_json_batch_frame(frames)
+
+    assert json.loads(batch_frame) == {"command": "batch", "frames": MESSAGES}
+
+
+def test_msgpack_batch_frame():
+    frames = [encode_msgpack_frame(message) for message in MESSAGES]
+
+    batch_frame = encode_msgpack_batch_frame(frames)
+
+    assert msgpack.unpackb(batch_frame) == {
+        "c": "batch",
+        "fs": [msgpack.unpackb(frame) for frame in frames],
+    }
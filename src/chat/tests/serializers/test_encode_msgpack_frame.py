@@ -0,0 +1,70 @@
+import json
+
+import msgpack
+
+from chat.serializers import encode_json_frame, encode_msgpack_frame
+
+MESSAGE_JSON = {
+    "id": 1,
+    "author": "author",
+    "content": "test message content",
+    "timestamp": "2023-10-17 01:01:01.000001+00:00",
+}
+
+
+def test_short_keys_and_epoch_timestamps():
+    content = {
+        "command": "messages",
+        "messages": [MESSAGE_JSON],
+        "next_cursor": None,
+    }
+
+    frame = encode_msgpack_frame(content)
+
+    assert msgpack.unpackb(frame) == {
+        "c": "messages",
+        "ms": [
+            {
+                "i": 1,
+                "a": "author",
+                "t": "test message content",
+                "ts": 1697504461000,
+            }
+        ],
+        "n": None,
+    }
+
+
+def test_nested_message():
+    content = {
+        "command": "chats_list_message",
+        "room_id": "room-id",
+        "message": MESSAGE_JSON,
+    }
+
+    frame = encode_msgpack_frame(content)
+
+    assert msgpack.unpackb(frame) == {
+        "c": "chats_list_message",
+        "r": "room-id",
+        "m": {
+            "i": 1,
+            "a": "author",
+            "t": "test message content",
+            "ts": 1697504461000,
+        },
+    }
+
+
+def test_unknown_keys_kept():
+    frame = encode_msgpack_frame({"command": "reload_page", "other": 1})
+
+    assert msgpack.unpackb(frame) == {"c": "reload_page", "other": 1}
+
+
+def test_json_frame():
+    content = {"command": "new_message", "message": MESSAGE_JSON}
+
+    frame = encode_json_frame(content)
+
+    assert json.loads(frame) == content
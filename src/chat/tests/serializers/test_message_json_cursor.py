@@ -0,0 +1,16 @@
+import pytest
+
+from chat.models import ChatRoom, Message
+from chat.serializers import message_json_cursor, message_to_json
+from chat.utils import decode_messages_cursor
+
+
+@pytest.mark.django_db
+def test_cursor_of_message(room: ChatRoom):
+    message = Message.objects.create(
+        author=room.admin, room=room, content="content"
+    )
+
+    cursor = message_json_cursor(message_to_json(message))
+
+    assert decode_messages_cursor(cursor) == (message.timestamp, message.id)
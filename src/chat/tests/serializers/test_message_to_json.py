@@ -29,6 +29,7 @@ def test_return_values(room: ChatRoom, mocker: MockerFixture):
     message = _message(room)
 
     expected_json = {
+        "id": message.id,
         "author": TEST_USERNAME,
         "content": TEST_MESSAGE_CONTENT,
         "timestamp": str(timezone.now()),
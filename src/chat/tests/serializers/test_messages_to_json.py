@@ -42,18 +42,36 @@ def _create_messages(num_messages: int) -> list[Message]:
     return messages
 
 
-def _message_to_json(message: Message) -> dict[str, str]:
+def _message_to_json(message: Message) -> dict[str, str | int]:
     return {
+        "id": message.id,
         "author": message.author.username,
         "content": message.content,
         "timestamp": str(message.timestamp),
     }
 
 
-def _messages_to_json(messages: list[Message]) -> list[dict[str, str]]:
+def _messages_to_json(
+    messages: list[Message],
+) -> list[dict[str, str | int]]:
     return [_message_to_json(message) for message in messages]
 
 
+def _messages_values(messages: list[Message]) -> list[dict]:
+    """
+    Returns messages in the form returned by get_last_20_messages.
+    """
+    return [
+        {
+            "id": message.id,
+            "author__username": message.author.username,
+            "content": message.content,
+            "timestamp": message.timestamp,
+        }
+        for message in messages
+    ]
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("num_messages", (0, 1, 2, 5, 10, 30, 100))
 def test_return_values(mocker: MockerFixture, num_messages: int):
@@ -65,6 +83,14 @@ def test_return_values(mocker: MockerFixture, num_messages: int):
     messages = _create_messages(num_messages)
     expected_messages_json = _messages_to_json(messages)
 
-    messages_json = messages_to_json(messages)
+    messages_json = messages_to_json(_messages_values(messages))
 
     assert messages_json == expected_messages_json
+
+
+@pytest.mark.django_db
+def test_no_queries(django_assert_num_queries):
+    messages = _messages_values(_create_messages(5))
+
+    with django_assert_num_queries(0):
+        messages_to_json(messages)
@@ -0,0 +1,34 @@
+from time import sleep
+
+import pytest
+
+from chat.models import ChatRoom, Message
+from chat.serializers import next_messages_cursor
+from chat.utils import encode_messages_cursor
+
+
+def _messages(room: ChatRoom, num_messages: int) -> list[dict]:
+    for i in range(num_messages):
+        Message.objects.create(author=room.admin, room=room, content=str(i))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+    messages = room.message.order_by("timestamp").values("id", "timestamp")
+    return list(messages)  # type: ignore
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_messages", (0, 1, 19))
+def test_last_page(room: ChatRoom, num_messages: int):
+    assert next_messages_cursor(_messages(room, num_messages)) is None
+
+
+@pytest.mark.django_db
+def test_full_page(room: ChatRoom):
+    messages = _messages(room, 20)
+
+    cursor = next_messages_cursor(messages)
+
+    assert cursor == encode_messages_cursor(
+        messages[0]["timestamp"], messages[0]["id"]
+    )
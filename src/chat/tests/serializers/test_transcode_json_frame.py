@@ -0,0 +1,36 @@
+import json
+
+from pytest_mock import MockerFixture
+
+from chat import serializers
+from chat.serializers import encode_msgpack_frame, transcode_json_frame
+
+MESSAGE_JSON = {
+    "id": 1,
+    "author": "author",
+    "content": "test message content",
+    "timestamp": "2023-10-17 01:01:01.000001+00:00",
+}
+
+
+def test_same_as_msgpack_frame():
+    content = {
+        "command": "new_message",
+        "room_id": "room",
+        "message": MESSAGE_JSON,
+    }
+
+    frame = transcode_json_frame(json.dumps(content))
+
+    assert frame == encode_msgpack_frame(content)
+
+
+def test_frame_transcoded_once(mocker: MockerFixture):
+    transcode_json_frame.cache_clear()
+    encode_msgpack_frame_spy = mocker.spy(serializers, "encode_msgpack_frame")
+    text = json.dumps({"command": "new_message", "message": MESSAGE_JSON})
+
+    frames = [transcode_json_frame(text) for _ in range(3)]
+
+    assert frames == [encode_msgpack_frame_spy.spy_return] * 3
+    encode_msgpack_frame_spy.assert_called_once()
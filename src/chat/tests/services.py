@@ -16,10 +16,10 @@ def multiple_users_generator() -> Generator[User, None, None]:
         counter += 1
 
 
-def construct_name_of_redis_list_for_channel_name_test_method(
+def construct_name_of_redis_sorted_set_for_channels_names_test_method(
     user_id: str | int,
 ) -> str:
     """
-    Construct name for redis list that contains django-channels name.
+    Construct name for redis sorted set that contains django-channels names.
     """
-    return f"asgi:users_channels_names:{user_id}"
+    return f"asgi:users_channels:{user_id}"
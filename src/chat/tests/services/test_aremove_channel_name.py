@@ -0,0 +1,44 @@
+from time import time
+
+import pytest
+from django.conf import settings
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from pytest_mock import MockerFixture
+
+from chat.services import aremove_channel_name
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+)
+
+
+@pytest.mark.asyncio
+async def test_aremove_channel_name(mocker: MockerFixture):
+    fake_redis_con = FakeRedis(server=FakeServer())
+    mocker.patch(
+        "chat.services.get_async_redis_connection",
+        return_value=fake_redis_con,
+    )
+    user_id = "1"
+    redis_key_name = (
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(
+            user_id
+        )
+    )
+    await fake_redis_con.zadd(
+        redis_key_name,
+        {
+            "test-channel-name": time(),
+            "other-channel-name": time(),
+            "stale-channel-name": time() - settings.PRESENCE_TIMEOUT - 1,
+        },
+    )
+
+    live_channels_names = await aremove_channel_name(
+        user_id, "test-channel-name"
+    )
+
+    assert await fake_redis_con.zrange(redis_key_name, 0, -1) == [
+        b"other-channel-name"
+    ]
+    assert live_channels_names == [b"other-channel-name"]
@@ -0,0 +1,96 @@
+import pytest
+from django.conf import settings
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from pytest_mock import MockerFixture
+
+from chat.services import asave_channel_name
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+)
+
+
+@pytest.mark.asyncio
+async def test_asave_channel_name(mocker: MockerFixture):
+    fake_redis_con = FakeRedis(server=FakeServer())
+    mocker.patch(
+        "chat.services.get_async_redis_connection",
+        return_value=fake_redis_con,
+    )
+    mocker.patch("chat.services.time", side_effect=[100.0, 150.0])
+    user_id = "1"
+    redis_key_name = (
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(
+            user_id
+        )
+    )
+
+    await asave_channel_name(user_id, "test-channel-name-1")
+    live_channels_names = await asave_channel_name(
+        user_id, "test-channel-name-2"
+    )
+
+    channel_names = await fake_redis_con.zrange(
+        redis_key_name, 0, -1, withscores=True
+    )
+    assert channel_names == [
+        (b"test-channel-name-1", 100.0),
+        (b"test-channel-name-2", 150.0),
+    ]
+    assert live_channels_names == [
+        b"test-channel-name-1",
+        b"test-channel-name-2",
+    ]
+    assert 0 < await fake_redis_con.ttl(redis_key_name) <= (
+        settings.USERS_CHANNELS_NAMES_TTL
+    )
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_updated(mocker: MockerFixture):
+    fake_redis_con = FakeRedis(server=FakeServer())
+    mocker.patch(
+        "chat.services.get_async_redis_connection",
+        return_value=fake_redis_con,
+    )
+    mocker.patch("chat.services.time", side_effect=[100.0, 150.0])
+    user_id = "1"
+    redis_key_name = (
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(
+            user_id
+        )
+    )
+
+    await asave_channel_name(user_id, "test-channel-name")
+    await asave_channel_name(user_id, "test-channel-name")
+
+    assert await fake_redis_con.zrange(
+        redis_key_name, 0, -1, withscores=True
+    ) == [(b"test-channel-name", 150.0)]
+
+
+@pytest.mark.asyncio
+async def test_stale_channels_pruned(mocker: MockerFixture):
+    fake_redis_con = FakeRedis(server=FakeServer())
+    mocker.patch(
+        "chat.services.get_async_redis_connection",
+        return_value=fake_redis_con,
+    )
+    heartbeat = 100.0 + settings.PRESENCE_TIMEOUT + 1
+    mocker.patch("chat.services.time", side_effect=[100.0, heartbeat])
+    user_id = "1"
+    redis_key_name = (
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(
+            user_id
+        )
+    )
+
+    await asave_channel_name(user_id, "stale-channel-name")
+    live_channels_names = await asave_channel_name(
+        user_id, "test-channel-name"
+    )
+
+    assert await fake_redis_con.zrange(
+        redis_key_name, 0, -1, withscores=True
+    ) == [(b"test-channel-name", heartbeat)]
+    assert live_channels_names == [b"test-channel-name"]
@@ -1,50 +1,42 @@
-from datetime import datetime
+from time import sleep
 
 import pytest
 from django.contrib.auth.models import User
-from django.utils import timezone
-from pytest_mock import MockerFixture
 
 from chat.models import ChatRoom, Message
-from chat.services import chats_list
+from chat.services import chats_list, create_message
+from chat.tests.services import multiple_users_generator
 
 
 def _create_room(admin: User, room_name: str | None) -> ChatRoom:
-    return ChatRoom.objects.create(admin=admin, room_name=room_name)
+    room = ChatRoom.objects.create(admin=admin, room_name=room_name)
+    room.members.add(admin)
+    return room
 
 
 def _create_message(author: User, room: ChatRoom) -> Message:
-    return Message.objects.create(
-        author=author, room=room, content="Message test content"
-    )
+    return create_message(author, room, "Message test content")
 
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
-    ("room_name", "get_3_members", "last_msg", "is_current_room_id"),
+    ("room_name", "last_msg", "is_current_room_id"),
     (
-        ("room name", None, True, False),
-        (None, "member1, member2, member3", True, False),
-        (None, "member1, member2, member3", False, True),
+        ("room name", True, False),
+        (None, True, False),
+        (None, False, True),
     ),
 )
 def test_return_values_single_room(
-    mocker: MockerFixture,
     user: User,
     room_name: str | None,
-    get_3_members: str | None,
     last_msg: bool,
     is_current_room_id: bool,
 ):
     room = _create_room(user, room_name)
-    message = _create_message(user, room) if last_msg else None
-    mocker.patch("chat.services.get_last_message", return_value=message)
-    mocker.patch("chat.services.get_3_members", return_value=get_3_members)
-    expected_unread_msgs = 1 if is_current_room_id else 0
-    mocker.patch(
-        "chat.services.count_unread_msgs",
-        return_value=expected_unread_msgs,
-    )
+    other_user = next(multiple_users_generator())
+    message = _create_message(other_user, room) if last_msg else None
+    expected_unread_msgs = 1 if last_msg and not is_current_room_id else 0
     chat_rooms = user.admin.all()
 
     chats_info = chats_list(
@@ -54,7 +46,7 @@ def test_return_values_single_room(
     expected_chats_info = [
         (
             room.id,
-            room.room_name or get_3_members,
+            room.room_name or user.username,
             message,
             expected_unread_msgs,
         )
@@ -63,53 +55,21 @@ def test_return_values_single_room(
 
 
 @pytest.mark.django_db
-@pytest.mark.parametrize(
-    ("room_name", "get_3_members", "message_1_none"),
-    (
-        ("room name", None, False),
-        (None, "member1, member2, member3", True),
-    ),
-)
-def test_return_values_4_rooms(
-    mocker: MockerFixture,
-    user: User,
-    room_name: str | None,
-    get_3_members: str | None,
-    message_1_none: bool,
-):
-    dates = (
-        # For room creation
-        timezone.make_aware(datetime(2023, 10, 4, 1, 1, 1)),
-        timezone.make_aware(datetime(2000, 1, 1, 1, 1, 1)),  # Not important
-        timezone.make_aware(datetime(2000, 1, 1, 1, 1, 1)),  # Not important
-        timezone.make_aware(datetime(2000, 1, 1, 1, 1, 1)),  # Not important
-        # For messages creation
-        timezone.make_aware(datetime(2023, 10, 2, 1, 1, 1)),
-        timezone.make_aware(datetime(2023, 10, 3, 1, 1, 1)),
-        timezone.make_aware(datetime(2023, 10, 5, 1, 1, 1)),
-        timezone.make_aware(datetime(2023, 10, 6, 1, 1, 1)),
-    )
-    mocker.patch.object(timezone, "now", side_effect=dates)
-    room1 = _create_room(user, room_name)
-    room2 = _create_room(user, room_name)
-    room3 = _create_room(user, room_name)
-    room4 = _create_room(user, room_name)
-    message1 = None if message_1_none else _create_message(user, room1)
-    # If message1 is not created, we need manually get value from timezone.now,
-    # so order will remain the same.
+@pytest.mark.parametrize("message_1_none", (False, True))
+def test_return_values_4_rooms(user: User, message_1_none: bool):
+    rooms = []
+    for i in range(4):
+        rooms.append(_create_room(user, f"room {i + 1}"))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+    room1, room2, room3, room4 = rooms
+    # If message1 is not created, room 1 is ordered by its creation date.
     # sourcery skip: no-conditionals-in-tests
-    if message_1_none:
-        timezone.now()
-    message2 = _create_message(user, room1)
+    message1 = None if message_1_none else _create_message(user, room1)
+    sleep(0.0001)
     message3 = _create_message(user, room3)
+    sleep(0.0001)
     message4 = _create_message(user, room4)
-    messages = (message1, message2, message3, message4)
-    mocker.patch("chat.services.get_last_message", side_effect=messages)
-    mocker.patch("chat.services.get_3_members", return_value=get_3_members)
-    mocker.patch(
-        "chat.services.count_unread_msgs",
-        side_effect=[3, 4, 1, 2],
-    )
     chat_rooms = user.admin.all()
 
     chats_info = chats_list(chat_rooms, user)
@@ -117,16 +77,58 @@ def test_return_values_4_rooms(
     # sourcery skip: no-conditionals-in-tests
     if message_1_none:
         expected_chats_info = [
-            (room4.id, room4.room_name or get_3_members, message4, 2),
-            (room3.id, room3.room_name or get_3_members, message3, 1),
-            (room1.id, room1.room_name or get_3_members, message1, 3),
-            (room2.id, room2.room_name or get_3_members, message2, 4),
+            (room4.id, "room 4", message4, 0),
+            (room3.id, "room 3", message3, 0),
+            (room2.id, "room 2", None, 0),
+            (room1.id, "room 1", None, 0),
         ]
     else:
         expected_chats_info = [
-            (room4.id, room4.room_name or get_3_members, message4, 2),
-            (room3.id, room3.room_name or get_3_members, message3, 1),
-            (room2.id, room2.room_name or get_3_members, message2, 4),
-            (room1.id, room1.room_name or get_3_members, message1, 3),
+            (room4.id, "room 4", message4, 0),
+            (room3.id, "room 3", message3, 0),
+            (room1.id, "room 1", message1, 0),
+            (room2.id, "room 2", None, 0),
         ]
     assert chats_info == expected_chats_info
+
+
+@pytest.mark.django_db
+def test_unread_msgs_counted_per_room(user: User):
+    room1 = _create_room(user, None)
+    room2 = _create_room(user, None)
+    other_user = next(multiple_users_generator())
+    room1.members.add(other_user)
+    room2.members.add(other_user)
+    for _ in range(3):
+        _create_message(other_user, room1)
+    _create_message(other_user, room2)
+    chat_rooms = user.chat_rooms.all()
+
+    chats_info = chats_list(chat_rooms, user)
+
+    unread = {room_id: num_unread for room_id, _, _, num_unread in chats_info}
+    names = {room_id: room_name for room_id, room_name, _, _ in chats_info}
+    assert unread == {room1.id: 3, room2.id: 1}
+    assert names[room1.id] == f"{user.username}, {other_user.username}"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_rooms", (1, 10, 50))
+def test_constant_num_queries(
+    django_assert_num_queries, user: User, num_rooms: int
+):
+    """
+    Tests that number of queries doesn't depend on number of rooms. One query
+    for rooms with their last messages and one for members names.
+    """
+    other_user = next(multiple_users_generator())
+    for _ in range(num_rooms):
+        room = _create_room(user, None)
+        room.members.add(other_user)
+        _create_message(other_user, room)
+    chat_rooms = user.chat_rooms.all()
+
+    with django_assert_num_queries(2):
+        chats_info = chats_list(chat_rooms, user)
+
+    assert len(chats_info) == num_rooms
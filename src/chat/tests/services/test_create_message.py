@@ -2,6 +2,7 @@ import pytest
 from django.contrib.auth.models import User
 from chat.models import ChatRoom
 
+from chat.selectors import count_unread_msgs
 from chat.services import create_message
 from chat.tests.services import multiple_users_generator
 
@@ -21,7 +22,10 @@ def test_create_message(user: User, room: ChatRoom):
     assert message.author == user
     assert message.room == room
     assert message.content == "test message content"
-    assert list(message.unread_by.all()) == users
+    assert not message.unread_by.exists()
+    for member in users:
+        assert count_unread_msgs(room, member, "") == 1
+    assert count_unread_msgs(room, user, "") == 0
 
 
 @pytest.mark.django_db
@@ -30,3 +34,40 @@ def test_create_message_with_same_user_and_room(user: User, room: ChatRoom):
     create_message(user, room, "test message content")
 
     assert len(user.author.all()) == 2
+
+
+@pytest.mark.django_db
+def test_create_message_updates_room(user: User, room: ChatRoom):
+    message = create_message(user, room, "test message content")
+
+    room.refresh_from_db()
+    assert room.last_message == message
+    assert room.last_activity_at == message.timestamp
+
+
+@pytest.mark.django_db
+def test_create_message_keeps_newer_room_activity(user: User, room: ChatRoom):
+    newer_message = create_message(user, room, "newer message")
+    # Simulates a concurrent transaction that committed a newer message first.
+    ChatRoom.objects.filter(pk=room.pk).update(
+        last_activity_at=newer_message.timestamp.replace(year=3000)
+    )
+
+    create_message(user, room, "older message")
+
+    room.refresh_from_db()
+    assert room.last_message == newer_message
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_members", (1, 10, 50))
+def test_num_queries_independent_of_members(
+    django_assert_num_queries, user: User, room: ChatRoom, num_members: int
+):
+    multiple_users = multiple_users_generator()
+    for _ in range(num_members):
+        room.members.add(next(multiple_users))
+
+    # Savepoint, message insert, room update, release
+    with django_assert_num_queries(4):
+        create_message(user, room, "test message content")
@@ -0,0 +1,32 @@
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom, ReadState
+from chat.services import create_message, create_read_states
+from chat.tests.services import multiple_users_generator
+
+
+@pytest.mark.django_db
+def test_new_members_cursor_at_last_message(user: User, room: ChatRoom):
+    message = create_message(user, room, "test message content")
+    multiple_users = multiple_users_generator()
+    users = [next(multiple_users) for _ in range(3)]
+
+    create_read_states(room, users)
+
+    read_states = ReadState.objects.filter(room=room).order_by("user_id")
+    assert [read_state.user for read_state in read_states] == users
+    assert all(
+        read_state.last_read_message == message for read_state in read_states
+    )
+
+
+@pytest.mark.django_db
+def test_existing_cursor_untouched(user: User, room: ChatRoom):
+    create_read_states(room, [user])
+    create_message(user, room, "test message content")
+
+    create_read_states(room, [user])
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message is None
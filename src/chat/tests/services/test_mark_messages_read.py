@@ -0,0 +1,61 @@
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom, Message, ReadState
+from chat.services import mark_messages_read
+
+
+def _create_messages(user: User, room: ChatRoom, num: int) -> list[Message]:
+    return [
+        Message.objects.create(author=user, room=room, content=str(i))
+        for i in range(num)
+    ]
+
+
+@pytest.mark.django_db
+def test_creates_read_state(user: User, room: ChatRoom):
+    messages = _create_messages(user, room, 3)
+
+    mark_messages_read(user, room.id, messages[1].id)
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message == messages[1]
+
+
+@pytest.mark.django_db
+def test_moves_cursor_forward(user: User, room: ChatRoom):
+    messages = _create_messages(user, room, 3)
+    ReadState.objects.create(
+        user=user, room=room, last_read_message=messages[0]
+    )
+
+    mark_messages_read(user, room.id, messages[2].id)
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message == messages[2]
+
+
+@pytest.mark.django_db
+def test_doesnt_move_cursor_back(user: User, room: ChatRoom):
+    messages = _create_messages(user, room, 3)
+    ReadState.objects.create(
+        user=user, room=room, last_read_message=messages[2]
+    )
+
+    mark_messages_read(user, room.id, messages[0].id)
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message == messages[2]
+
+
+@pytest.mark.django_db
+def test_single_statement_with_existing_cursor(
+    django_assert_num_queries, user: User, room: ChatRoom
+):
+    messages = _create_messages(user, room, 3)
+    ReadState.objects.create(
+        user=user, room=room, last_read_message=messages[0]
+    )
+
+    with django_assert_num_queries(1):
+        mark_messages_read(user, room.id, messages[2].id)
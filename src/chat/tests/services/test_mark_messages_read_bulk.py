@@ -0,0 +1,78 @@
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom, Message, ReadState
+from chat.services import mark_messages_read_bulk
+from chat.tests.services import multiple_users_generator
+
+
+def _create_messages(user: User, room: ChatRoom, num: int) -> list[Message]:
+    return [
+        Message.objects.create(author=user, room=room, content=str(i))
+        for i in range(num)
+    ]
+
+
+@pytest.mark.django_db
+def test_moves_creates_and_keeps_cursors(
+    django_assert_max_num_queries, user: User, room: ChatRoom
+):
+    multiple_users = multiple_users_generator()
+    behind_user, ahead_user, new_user = [next(multiple_users) for _ in range(3)]
+    messages = _create_messages(user, room, 3)
+    ReadState.objects.create(
+        user=behind_user, room=room, last_read_message=messages[0]
+    )
+    ReadState.objects.create(
+        user=ahead_user, room=room, last_read_message=messages[2]
+    )
+    ReadState.objects.create(user=user, room=room)
+
+    # Savepoint, update, insert, release
+    with django_assert_max_num_queries(4):
+        mark_messages_read_bulk(
+            {
+                (behind_user.id, str(room.id)): messages[1].id,
+                (ahead_user.id, str(room.id)): messages[1].id,
+                (new_user.id, str(room.id)): messages[1].id,
+                (user.id, str(room.id)): messages[1].id,
+            }
+        )
+
+    cursors = dict(
+        ReadState.objects.values_list("user_id", "last_read_message_id")
+    )
+    assert cursors == {
+        behind_user.id: messages[1].id,
+        ahead_user.id: messages[2].id,
+        new_user.id: messages[1].id,
+        user.id: messages[1].id,
+    }
+
+
+@pytest.mark.django_db
+def test_empty(django_assert_num_queries):
+    with django_assert_num_queries(0):
+        mark_messages_read_bulk({})
+
+
+@pytest.mark.django_db
+def test_batch_size_of_cursors(user: User, room: ChatRoom):
+    (message,) = _create_messages(user, room, 1)
+    users = User.objects.bulk_create(
+        [
+            User(username=f"reader_{i}")
+            for i in range(settings.READ_RECEIPTS_BATCH_SIZE)
+        ]
+    )
+    read_messages = {(reader.id, str(room.id)): message.id for reader in users}
+
+    # Creates cursors, then moves them
+    mark_messages_read_bulk(read_messages)
+    mark_messages_read_bulk(read_messages)
+
+    assert (
+        ReadState.objects.filter(last_read_message=message).count()
+        == settings.READ_RECEIPTS_BATCH_SIZE
+    )
@@ -0,0 +1,87 @@
+from uuid import uuid4
+
+import pytest
+from django.contrib.auth.models import User
+from fakeredis import FakeStrictRedis
+
+from chat.models import ChatRoom, Message
+from chat.serializers import message_to_json
+from chat.services import post_message
+from chat.tests.services import multiple_users_generator
+from chat.utils import construct_name_of_redis_list_for_recent_messages
+
+
+@pytest.mark.django_db
+def test_message_posted(user: User, room: ChatRoom):
+    other_user = next(multiple_users_generator())
+    room.members.add(other_user)
+
+    message_json, members_ids = post_message(  # type: ignore
+        user, str(room.id), "test message content"
+    )
+
+    message = Message.objects.get(room=room)
+    assert message.author == user
+    assert message.room == room
+    assert message.content == "test message content"
+    assert message_json == message_to_json(message)
+    assert sorted(members_ids) == sorted([user.id, other_user.id])
+    room.refresh_from_db()
+    assert room.last_message == message
+    assert room.last_activity_at == message.timestamp
+
+
+@pytest.mark.django_db
+def test_user_not_member(room: ChatRoom):
+    other_user = next(multiple_users_generator())
+
+    posted = post_message(other_user, str(room.id), "test message content")
+
+    assert posted is None
+    assert not Message.objects.filter(room=room).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("room_id", (str(uuid4()), "not-uuid"))
+def test_room_doesnt_exist(user: User, room_id: str):
+    posted = post_message(user, room_id, "test message content")
+
+    assert posted is None
+    assert not Message.objects.filter(author=user).exists()
+
+
+@pytest.mark.django_db
+def test_num_queries(django_assert_num_queries, user: User, room: ChatRoom):
+    """
+    Tests that message is posted with members ids query, message insert and
+    room update, author and room aren't fetched.
+    """
+    multiple_users = multiple_users_generator()
+    room.members.add(*(next(multiple_users) for _ in range(5)))
+
+    # Plus savepoint and its release, since test runs in a transaction.
+    with django_assert_num_queries(5):
+        post_message(user, str(room.id), "test message content")
+
+
+@pytest.mark.django_db
+def test_message_cached_after_commit(
+    django_capture_on_commit_callbacks,
+    recent_messages_redis: FakeStrictRedis,
+    user: User,
+    room: ChatRoom,
+):
+    messages_key = construct_name_of_redis_list_for_recent_messages(
+        str(room.id)
+    )
+    recent_messages_redis.rpush(messages_key, "cached message")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        message_json, _ = post_message(  # type: ignore
+            user, str(room.id), "test message content"
+        )
+
+    assert recent_messages_redis.llen(messages_key) == 2
+    assert str(message_json["id"]).encode() in recent_messages_redis.lindex(
+        messages_key, 0
+    )  # type: ignore
@@ -1,4 +1,5 @@
 from datetime import datetime
+from uuid import uuid4
 
 import pytest
 from django.contrib.auth.models import User
@@ -6,7 +7,7 @@ from django.utils import timezone
 from django.utils.timezone import make_aware
 from pytest_mock import MockerFixture
 
-from chat.models import ChatRoom, Message
+from chat.models import ChatRoom, Message, ReadState
 from chat.services import read_by
 
 
@@ -19,7 +20,7 @@ def test_with_same_author(mocker: MockerFixture, user: User):
         "timestamp": str(make_aware(datetime(2023, 10, 17, 1, 1, 1, 1))),
     }
 
-    read_by(message, user)
+    read_by(message, user, str(uuid4()))
 
     parse_datetime_mocked.assert_not_called()
 
@@ -37,7 +38,7 @@ def test_invalid_date(mocker: MockerFixture, user: User):
         "timestamp": str(make_aware(datetime(2023, 10, 17))),
     }
 
-    read_by(message, user)
+    read_by(message, user, str(uuid4()))
 
     message_filter_mocked.assert_not_called()
 
@@ -54,8 +55,76 @@ def test_marked_read(mocker: MockerFixture, user: User, room: ChatRoom):
     message_obj = Message.objects.create(
         author=user, room=room, timestamp=date, content="test message content"
     )
-    message_obj.unread_by.add(user)
 
-    read_by(message, user)
+    read_by(message, user, str(room.id))
 
-    assert not message_obj.unread_by.all().exists()
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message == message_obj
+
+
+@pytest.mark.django_db
+def test_marked_read_by_id(
+    django_assert_num_queries, user: User, room: ChatRoom
+):
+    message_obj = Message.objects.create(
+        author=user, room=room, content="test message content"
+    )
+    ReadState.objects.create(user=user, room=room)
+    message = {
+        "id": message_obj.id,
+        "author": user.username + "f",
+        "content": message_obj.content,
+        "timestamp": str(message_obj.timestamp),
+    }
+
+    # Only read cursor update
+    with django_assert_num_queries(1):
+        read_by(message, user, str(room.id))
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message == message_obj
+
+
+@pytest.mark.django_db
+def test_same_content_and_timestamp(user: User, room: ChatRoom):
+    """
+    Tests if the right message is marked as read when other message has the
+    same content and timestamp.
+    """
+    message_objs = [
+        Message.objects.create(author=user, room=room, content="same")
+        for _ in range(2)
+    ]
+    Message.objects.update(timestamp=message_objs[0].timestamp)
+    message = {
+        "id": message_objs[1].id,
+        "author": user.username + "f",
+        "content": "same",
+        "timestamp": str(message_objs[0].timestamp),
+    }
+
+    read_by(message, user, str(room.id))
+
+    read_state = ReadState.objects.get(user=user, room=room)
+    assert read_state.last_read_message == message_objs[1]
+
+
+@pytest.mark.django_db
+def test_message_from_other_room_not_marked_read(
+    mocker: MockerFixture, user: User, room: ChatRoom
+):
+    date = make_aware(datetime(2023, 10, 17))
+    mocker.patch.object(timezone, "now", return_value=date)
+    other_room = ChatRoom.objects.create(admin=user)
+    Message.objects.create(
+        author=user, room=other_room, content="test message content"
+    )
+    message = {
+        "author": user.username + "f",
+        "content": "test message content",
+        "timestamp": str(date),
+    }
+
+    read_by(message, user, str(room.id))
+
+    assert not ReadState.objects.filter(user=user).exists()
@@ -0,0 +1,134 @@
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom, Message, ReadState
+from chat.serializers import messages_to_json
+from chat.services import create_message, read_last_20_messages
+from chat.utils import encode_messages_cursor
+
+
+@pytest.fixture(autouse=True)
+def _recent_messages_redis(recent_messages_redis):
+    return recent_messages_redis
+
+
+def _get_chat_room(user: User, num_messages: int) -> ChatRoom:
+    """
+    Creates room object, and appends room with specified number of messages.
+    """
+    room_obj = ChatRoom.objects.create(admin=user)
+    room_obj.members.add(user)
+    for i in range(num_messages):
+        Message.objects.create(author=user, room=room_obj, content=str(i))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+    return room_obj
+
+
+@pytest.mark.django_db
+def test_msgs_returned(user: User) -> None:
+    room_obj = _get_chat_room(user, 30)
+
+    messages = read_last_20_messages(str(room_obj.id), user, "0")
+
+    expected_messages = room_obj.message.order_by("-timestamp")[:20][::-1]
+    assert [message["id"] for message in messages] == [
+        message.id for message in expected_messages
+    ]
+
+
+@pytest.mark.django_db
+def test_msgs_mark_as_read(user: User) -> None:
+    room_obj = _get_chat_room(user, 20)
+
+    _ = read_last_20_messages(str(room_obj.id), user, "0")
+
+    read_state = ReadState.objects.get(user=user, room=room_obj)
+    assert read_state.last_read_message == room_obj.message.latest("timestamp")
+
+
+@pytest.mark.django_db
+def test_old_msgs_dont_move_cursor_back(user: User) -> None:
+    room_obj = _get_chat_room(user, 30)
+    _ = read_last_20_messages(str(room_obj.id), user, "0")
+
+    _ = read_last_20_messages(str(room_obj.id), user, "20")
+
+    read_state = ReadState.objects.get(user=user, room=room_obj)
+    assert read_state.last_read_message == room_obj.message.latest("timestamp")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_cursor", (False, True))
+def test_old_msgs_not_marked_as_read(
+    django_assert_num_queries, user: User, use_cursor: bool
+) -> None:
+    room_obj = _get_chat_room(user, 30)
+    offset, before = "20", None
+    if use_cursor:
+        oldest_message = room_obj.message.order_by("-timestamp")[19]
+        offset = "0"
+        before = encode_messages_cursor(
+            oldest_message.timestamp, oldest_message.id
+        )
+
+    # Messages only
+    with django_assert_num_queries(1):
+        messages = read_last_20_messages(
+            str(room_obj.id), user, offset, before
+        )
+
+    assert len(messages) == 10
+    assert not ReadState.objects.exists()
+
+
+@pytest.mark.django_db
+def test_no_msgs(django_assert_num_queries, user: User) -> None:
+    room_obj = _get_chat_room(user, 0)
+
+    # Messages
+    with django_assert_num_queries(1):
+        messages = read_last_20_messages(str(room_obj.id), user, "0")
+
+    assert messages == []
+    assert not ReadState.objects.exists()
+
+
+@pytest.mark.django_db
+def test_num_queries_with_serialization(
+    django_assert_num_queries, user: User
+) -> None:
+    """
+    Tests that serializing the page doesn't query authors of messages.
+    """
+    room_obj = _get_chat_room(user, 20)
+    _ = read_last_20_messages(str(room_obj.id), user, "0")
+    Message.objects.create(author=user, room=room_obj, content="new")
+
+    # Messages only, older page is behind the read cursor
+    with django_assert_num_queries(1):
+        messages = read_last_20_messages(str(room_obj.id), user, "20")
+        messages_json = messages_to_json(messages)
+
+    assert len(messages_json) == 1
+
+
+@pytest.mark.django_db
+def test_first_page_cached(
+    django_assert_num_queries, django_capture_on_commit_callbacks, user: User
+) -> None:
+    room_obj = _get_chat_room(user, 20)
+    _ = read_last_20_messages(str(room_obj.id), user, "0")
+    with django_capture_on_commit_callbacks(execute=True):
+        message = create_message(user, room_obj, "new")
+
+    # Cursor update
+    with django_assert_num_queries(1):
+        messages = read_last_20_messages(str(room_obj.id), user, "0")
+
+    assert len(messages) == 20
+    assert messages[-1]["id"] == message.id
+
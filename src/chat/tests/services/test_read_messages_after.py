@@ -0,0 +1,66 @@
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom, Message, ReadState
+from chat.services import read_messages_after
+from chat.utils import encode_messages_cursor
+
+
+def _get_chat_room(user: User, num_messages: int) -> ChatRoom:
+    """
+    Creates room object, and appends room with specified number of messages.
+    """
+    room_obj = ChatRoom.objects.create(admin=user)
+    room_obj.members.add(user)
+    for i in range(num_messages):
+        Message.objects.create(author=user, room=room_obj, content=str(i))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+    return room_obj
+
+
+def _cursor(message: Message) -> str:
+    return encode_messages_cursor(message.timestamp, message.id)
+
+
+@pytest.mark.django_db
+def test_msgs_returned(user: User) -> None:
+    room_obj = _get_chat_room(user, 5)
+    room_messages = list(room_obj.message.order_by("timestamp", "id"))
+
+    messages = read_messages_after(
+        str(room_obj.id), user, _cursor(room_messages[1])
+    )
+
+    assert [message["id"] for message in messages] == [
+        message.id for message in room_messages[2:]
+    ]
+
+
+@pytest.mark.django_db
+def test_msgs_mark_as_read(user: User) -> None:
+    room_obj = _get_chat_room(user, 5)
+    room_messages = list(room_obj.message.order_by("timestamp", "id"))
+
+    read_messages_after(
+        str(room_obj.id), user, _cursor(room_messages[0])
+    )
+
+    read_state = ReadState.objects.get(user=user, room=room_obj)
+    assert read_state.last_read_message == room_messages[-1]
+
+
+@pytest.mark.django_db
+def test_no_msgs_not_marked_as_read(user: User) -> None:
+    room_obj = _get_chat_room(user, 1)
+
+    messages = read_messages_after(
+        str(room_obj.id), user, _cursor(room_obj.message.get())
+    )
+
+    assert messages == []
+    assert not ReadState.objects.filter(user=user, room=room_obj).exists()
+
@@ -0,0 +1,70 @@
+from time import time
+
+import pytest
+from channels.layers import InMemoryChannelLayer
+from django.conf import settings
+from fakeredis import FakeServer, FakeStrictRedis
+from pytest_mock import MockerFixture
+
+from chat.services import sweep_stale_channels
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+)
+
+
+@pytest.fixture
+def fake_redis_con(mocker: MockerFixture) -> FakeStrictRedis:
+    fake_redis_con = FakeStrictRedis(server=FakeServer())
+    mocker.patch(
+        "chat.services.get_redis_connection", return_value=fake_redis_con
+    )
+    return fake_redis_con
+
+
+@pytest.fixture
+def channel_layer(mocker: MockerFixture) -> InMemoryChannelLayer:
+    channel_layer = InMemoryChannelLayer()
+    mocker.patch("chat.services.get_channel_layer", return_value=channel_layer)
+    return channel_layer
+
+
+def test_stale_channels_removed(
+    fake_redis_con: FakeStrictRedis, channel_layer: InMemoryChannelLayer
+):
+    dead_heartbeat = time() - settings.PRESENCE_TIMEOUT - 1
+    channels = [
+        (1, "live-1", time()),
+        (1, "dead-1", dead_heartbeat),
+        (2, "dead-2", dead_heartbeat),
+        (2, "dead-3", dead_heartbeat),
+    ]
+    for user_id, channel_name, heartbeat in channels:
+        fake_redis_con.zadd(
+            construct_name_of_redis_sorted_set_for_channels_names_test_method(
+                user_id
+            ),
+            {channel_name: heartbeat},
+        )
+        channel_layer.groups.setdefault(f"user_{user_id}", {})[
+            channel_name
+        ] = time()
+
+    num_removed = sweep_stale_channels()
+
+    assert num_removed == 3
+    assert fake_redis_con.zrange(
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(1),
+        0,
+        -1,
+    ) == [b"live-1"]
+    assert not fake_redis_con.exists(
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(2)
+    )
+    assert list(channel_layer.groups["user_1"]) == ["live-1"]
+    assert "user_2" not in channel_layer.groups
+
+
+def test_no_channels(
+    fake_redis_con: FakeStrictRedis, channel_layer: InMemoryChannelLayer
+):
+    assert sweep_stale_channels() == 0
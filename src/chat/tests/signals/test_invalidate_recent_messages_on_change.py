@@ -0,0 +1,54 @@
+import pytest
+from django.contrib.auth.models import User
+from pytest_mock import MockerFixture
+
+from chat.models import ChatRoom, Message
+
+
+@pytest.fixture
+def invalidate_patched(mocker: MockerFixture):
+    return mocker.patch("chat.signals.invalidate_recent_messages")
+
+
+@pytest.mark.django_db
+def test_not_invalidated_on_create(
+    django_capture_on_commit_callbacks,
+    invalidate_patched,
+    room: ChatRoom,
+    user: User,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        Message.objects.create(author=user, room=room, content="content")
+
+    invalidate_patched.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_invalidated_on_edit(
+    django_capture_on_commit_callbacks,
+    invalidate_patched,
+    room: ChatRoom,
+    user: User,
+):
+    message = Message.objects.create(author=user, room=room, content="content")
+    message.content = "edited content"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        message.save()
+
+    invalidate_patched.assert_called_once_with(str(room.id))
+
+
+@pytest.mark.django_db
+def test_invalidated_on_delete(
+    django_capture_on_commit_callbacks,
+    invalidate_patched,
+    room: ChatRoom,
+    user: User,
+):
+    message = Message.objects.create(author=user, room=room, content="content")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        message.delete()
+
+    invalidate_patched.assert_called_once_with(str(room.id))
@@ -0,0 +1,59 @@
+from time import sleep
+
+import pytest
+from django.contrib.auth.models import User
+
+from chat.models import ChatRoom, Message
+from chat.services import create_message
+
+
+def _create_messages(
+    user: User, room: ChatRoom, num_messages: int
+) -> list[Message]:
+    messages = []
+    for i in range(num_messages):
+        messages.append(create_message(user, room, str(i)))
+        # Necessary for difference in timestamps
+        sleep(0.0001)
+
+    return messages
+
+
+@pytest.mark.django_db
+def test_previous_message_becomes_last(user: User, room: ChatRoom):
+    messages = _create_messages(user, room, 3)
+
+    messages[-1].delete()
+
+    room.refresh_from_db()
+    assert room.last_message == messages[-2]
+
+
+@pytest.mark.django_db
+def test_last_message_kept(user: User, room: ChatRoom):
+    messages = _create_messages(user, room, 3)
+
+    messages[0].delete()
+
+    room.refresh_from_db()
+    assert room.last_message == messages[-1]
+
+
+@pytest.mark.django_db
+def test_only_message_deleted(user: User, room: ChatRoom):
+    (message,) = _create_messages(user, room, 1)
+
+    message.delete()
+
+    room.refresh_from_db()
+    assert room.last_message is None
+
+
+@pytest.mark.django_db
+def test_room_deleted(user: User, room: ChatRoom):
+    _create_messages(user, room, 2)
+
+    room_id = room.id
+    room.delete()
+
+    assert not Message.objects.filter(room_id=room_id).exists()
@@ -0,0 +1,28 @@
+import pytest
+from django.contrib.auth.models import User
+from django.test.client import Client
+from django.urls import reverse
+
+from chat.views import metrics
+
+
+@pytest.mark.django_db
+def test_url_pattern_and_view_used(user_client: Client, user: User):
+    """
+    Tests if url pattern resolved and what view was used.
+    """
+    user.is_staff = True
+    user.save()
+
+    response = user_client.get("/en/chat/metrics/")
+
+    assert response.status_code == 200
+    assert response.resolver_match.func == metrics
+    assert reverse("chat:metrics") == "/en/chat/metrics/"
+
+
+@pytest.mark.django_db
+def test_url_non_staff_redirect(user_client: Client):
+    response = user_client.get(reverse("chat:metrics"))
+
+    assert response.status_code == 302
@@ -0,0 +1,26 @@
+import pytest
+from django.test.client import Client
+from django.urls import reverse
+from pytest_mock import MockerFixture
+
+from chat.models import ChatRoom
+from chat.views import online_members
+
+
+@pytest.mark.django_db
+def test_url_pattern_and_view_used(
+    mocker: MockerFixture, user_client: Client, room: ChatRoom
+):
+    """
+    Tests if url pattern resolved and what view was used.
+    """
+    mocker.patch("chat.views.get_online_members", return_value=[])
+
+    response = user_client.get(f"/en/chat/{room.id}/online-members/")
+
+    assert response.status_code == 200
+    assert response.resolver_match.func == online_members
+    assert (
+        reverse("chat:online_members", args=(room.id,))
+        == f"/en/chat/{room.id}/online-members/"
+    )
@@ -1,4 +1,5 @@
 import pytest
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.test.client import Client
 from django.urls import reverse
@@ -47,6 +48,10 @@ def test_room_view(
     assert list(response.context["chat_rooms"]) == list(expected_user_rooms)
     assert response.context["chats_info"] == expected_chats_info
     assert response.context["room_name"] == expected_chats_info[0][1]
+    assert (
+        response.context["heartbeat_interval"]
+        == settings.PRESENCE_HEARTBEAT_INTERVAL
+    )
 
 
 @pytest.mark.parametrize(
@@ -0,0 +1,29 @@
+import pytest
+
+from chat.tests.services import (
+    construct_name_of_redis_sorted_set_for_channels_names_test_method,
+)
+from chat.utils import (
+    construct_name_of_redis_sorted_set_for_channels_names,
+    parse_user_id_from_redis_sorted_set_for_channels_names,
+)
+
+
+@pytest.mark.parametrize("user_id", ("21", 32))
+def test_return_values(user_id: str | int):
+    expected_name = (
+        construct_name_of_redis_sorted_set_for_channels_names_test_method(
+            user_id
+        )
+    )
+
+    name = construct_name_of_redis_sorted_set_for_channels_names(user_id)
+
+    assert name == expected_name
+
+
+@pytest.mark.parametrize("user_id", (1, 32))
+def test_user_id_parsed(user_id: int):
+    name = construct_name_of_redis_sorted_set_for_channels_names(user_id)
+
+    assert parse_user_id_from_redis_sorted_set_for_channels_names(name) == user_id
@@ -0,0 +1,10 @@
+import pytest
+
+from chat.utils import construct_user_group_name
+
+
+@pytest.mark.parametrize("user_id", ("21", 32))
+def test_return_values(user_id: str | int):
+    group_name = construct_user_group_name(user_id)
+
+    assert group_name == f"user_{user_id}"
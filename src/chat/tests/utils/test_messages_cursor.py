@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+from django.utils import timezone
+
+from chat.utils import decode_messages_cursor, encode_messages_cursor
+
+
+@pytest.mark.parametrize("message_id", (1, 42, 2**40))
+def test_encode_decode(message_id: int):
+    timestamp = timezone.make_aware(datetime(2023, 10, 17, 1, 1, 1, 123456))
+
+    cursor = encode_messages_cursor(timestamp, message_id)
+
+    assert decode_messages_cursor(cursor) == (timestamp, message_id)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ("", "invalid", "aW52YWxpZA==", "bm90LWEtZGF0ZXwx", "////", "MjAyMy0xMC0xN3x4"),
+)
+def test_decode_invalid(cursor: str):
+    assert decode_messages_cursor(cursor) is None
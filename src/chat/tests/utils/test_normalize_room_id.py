@@ -0,0 +1,24 @@
+import pytest
+
+from chat.utils import normalize_room_id
+
+ROOM_ID = "0000000a-0000-0000-0000-00000000000b"
+
+
+@pytest.mark.parametrize(
+    "room_id",
+    (
+        ROOM_ID,
+        ROOM_ID.upper(),
+        f"{{{ROOM_ID}}}",
+        f"urn:uuid:{ROOM_ID}",
+        ROOM_ID.replace("-", ""),
+    ),
+)
+def test_canonical_form_returned(room_id: str):
+    assert normalize_room_id(room_id) == ROOM_ID
+
+
+@pytest.mark.parametrize("room_id", (None, "", "not-uuid"))
+def test_invalid_room_id(room_id: str | None):
+    assert normalize_room_id(room_id) is None
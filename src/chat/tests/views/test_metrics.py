@@ -0,0 +1,40 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.test.client import RequestFactory
+from django.urls import reverse
+from pytest_mock import MockerFixture
+
+from chat.views import metrics
+
+
+@pytest.mark.django_db
+def test_access_allowed(rf: RequestFactory, mocker: MockerFixture, user: User):
+    """
+    Tests metrics view with staff user.
+    """
+    expected_metrics = {"counters": {"counter": 1}, "gauges": {}, "summaries": {}}
+    mocker.patch("chat.views.get_metrics", return_value=expected_metrics)
+    user.is_staff = True
+
+    request = rf.get(reverse("chat:metrics"))
+    request.user = user
+
+    response = metrics(request)
+
+    assert response.status_code == 200
+    assert json.loads(response.content) == expected_metrics
+
+
+@pytest.mark.django_db
+def test_access_denied(rf: RequestFactory, user: User):
+    """
+    Tests metrics view with non staff user.
+    """
+    request = rf.get(reverse("chat:metrics"))
+    request.user = user
+
+    response = metrics(request)
+
+    assert response.status_code == 302
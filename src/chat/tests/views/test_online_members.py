@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.test.client import Client
+from django.urls import reverse
+from pytest_mock import MockerFixture
+
+from chat.models import ChatRoom
+
+
+@pytest.mark.django_db
+def test_access_allowed(
+    mocker: MockerFixture, user_client: Client, user: User, room: ChatRoom
+):
+    get_online_members_patched = mocker.patch(
+        "chat.views.get_online_members", return_value=[user.username]
+    )
+
+    response = user_client.get(reverse("chat:online_members", args=(room.id,)))
+
+    assert response.status_code == 200
+    assert json.loads(response.content) == {"online_members": [user.username]}
+    get_online_members_patched.assert_called_once_with(room)
+
+
+@pytest.mark.django_db
+def test_no_chat_membership_redirect(
+    user_client: Client, room_no_members: ChatRoom
+):
+    response = user_client.get(
+        reverse("chat:online_members", args=(room_no_members.id,))
+    )
+
+    assert response.status_code == 302
+    assert response.url == reverse("chat:index")  # type: ignore
+
+
+@pytest.mark.django_db
+def test_anonymous_user_redirect(client: Client, room: ChatRoom):
+    response = client.get(reverse("chat:online_members", args=(room.id,)))
+
+    assert response.status_code == 302
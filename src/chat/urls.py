@@ -6,6 +6,12 @@ app_name = "chat"
 urlpatterns = [
     path("", views.index, name="index"),
     path("<uuid:room_id>/", views.room, name="room"),
+    path(
+        "<uuid:room_id>/online-members/",
+        views.online_members,
+        name="online_members",
+    ),
     path("create/", views.create_room, name="create_room"),
     path("add-members/<uuid:room_id>/", views.add_members, name="add_members"),
+    path("metrics/", views.metrics, name="metrics"),
 ]
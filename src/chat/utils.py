@@ -1,5 +1,132 @@
-def construct_name_of_redis_list_for_channel_name(user_id: str | int) -> str:
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+from django.utils.dateparse import parse_datetime
+
+
+def construct_name_of_redis_sorted_set_for_channels_names(
+    user_id: str | int,
+) -> str:
     """
-    Construct name for redis list that contains django-channels name.
+    Construct name for redis sorted set that contains django-channels names
+    scored by their last heartbeat.
     """
-    return f"asgi:users_channels_names:{user_id}"
\ No newline at end of file
+    return f"asgi:users_channels:{user_id}"
+
+
+def parse_user_id_from_redis_sorted_set_for_channels_names(name: str) -> int:
+    """
+    Returns id of the user that owns sorted set with channels names.
+    """
+    return int(name.rsplit(":", 1)[1])
+
+
+def construct_user_group_name(user_id: str | int) -> str:
+    """
+    Construct name of django-channels group that contains all user's channels.
+    """
+    return f"user_{user_id}"
+
+
+def construct_room_group_name(room_id: UUID | str) -> str:
+    """
+    Construct name of django-channels group that contains channels subscribed
+    to the room.
+    """
+    return f"chat_{room_id}"
+
+
+def construct_name_of_redis_list_for_recent_messages(room_id: str) -> str:
+    """
+    Construct name for redis list that contains last messages of the room.
+    """
+    return f"chat:recent_messages:{room_id}"
+
+
+def construct_name_of_redis_key_for_recent_messages_version(
+    room_id: str,
+) -> str:
+    """
+    Construct name for redis key with counter of the room last messages
+    changes.
+    """
+    return f"chat:recent_messages_version:{room_id}"
+
+
+def construct_name_of_redis_set_for_room_members(room_id: UUID | str) -> str:
+    """
+    Construct name for redis set that contains ids of the room members.
+    """
+    return f"chat:room_members:{room_id}"
+
+
+def construct_name_of_redis_key_for_room_members_version(
+    room_id: UUID | str,
+) -> str:
+    """
+    Construct name for redis key with counter of the room members changes.
+    """
+    return f"chat:room_members_version:{room_id}"
+
+
+def construct_name_of_redis_hash_for_user_rate_limit(
+    command: str, user_id: str | int
+) -> str:
+    """
+    Construct name for redis hash with token bucket of the user's command.
+    """
+    return f"chat:rate_limit:{command}:user:{user_id}"
+
+
+def construct_name_of_redis_hash_for_room_rate_limit(
+    command: str, room_id: UUID | str
+) -> str:
+    """
+    Construct name for redis hash with token bucket of the command sent to the
+    room.
+    """
+    return f"chat:rate_limit:{command}:room:{room_id}"
+
+
+def encode_messages_cursor(timestamp: datetime, message_id: int) -> str:
+    """
+    Encodes position of the message in room history to opaque cursor.
+    """
+    return urlsafe_b64encode(
+        f"{timestamp.isoformat()}|{message_id}".encode()
+    ).decode()
+
+
+def decode_messages_cursor(cursor: str) -> Tuple[datetime, int] | None:
+    """
+    Decodes cursor to message timestamp and id. Returns None if cursor is
+    invalid.
+    """
+    try:
+        timestamp_str, message_id_str = (
+            urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        timestamp = parse_datetime(timestamp_str)
+        message_id = int(message_id_str)
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        return None
+
+    if timestamp is None:
+        return None
+    return timestamp, message_id
+
+
+def normalize_room_id(room_id: str | None) -> str | None:
+    """
+    Returns canonical form of room id, e.g. lowercase UUID without braces.
+    Returns None if room id isn't a valid UUID.
+    """
+    if room_id is None:
+        return None
+    try:
+        return str(UUID(str(room_id)))
+    except ValueError:
+        return None
@@ -1,11 +1,15 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 
 from chat.decorators import chat_membership
 from chat.forms import ChatRoomForm, ChatRoomMembersForm
-from chat.selectors import get_room, get_user_chats
+from chat.metrics import get_metrics
+from chat.selectors import get_online_members, get_room, get_user_chats
 from chat.services import chats_list
 
 
@@ -42,10 +46,25 @@ def room(request, room_id: str):
             "chat_rooms": chat_rooms,
             "chats_info": chats_info,
             "room_name": room_name,
+            "heartbeat_interval": settings.PRESENCE_HEARTBEAT_INTERVAL,
         },
     )
 
 
+@require_http_methods(["GET"])
+@login_required
+@chat_membership
+def online_members(request, room_id: str):
+    """
+    Returns usernames of room members that are online.
+    """
+    room = get_room(room_id)
+    if room is None:
+        return redirect(reverse("chat:index"))
+
+    return JsonResponse({"online_members": get_online_members(room)})
+
+
 @require_http_methods(["GET", "POST"])
 @login_required
 def create_room(request):
@@ -88,3 +107,12 @@ def add_members(request, room_id: str):
         "chat/add_members.html",
         {"chat_room_members_form": chat_room_members_form},
     )
+
+
+@require_http_methods(["GET"])
+@staff_member_required
+def metrics(request):
+    """
+    Returns metrics of the worker that handled request.
+    """
+    return JsonResponse(get_metrics())
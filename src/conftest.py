@@ -3,7 +3,7 @@ import pytest
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 
-from chat.redis import get_redis_connection
+from chat.redis import get_async_redis_connection, get_redis_connection
 
 TEST_USERNAME = "test-user"
 TEST_PASSWORD = "test-password"
@@ -21,6 +21,13 @@ def clear_redis_connection_cache():
     get_redis_connection.cache_clear()
 
 
+@pytest.fixture
+def clear_async_redis_connection_cache():
+    get_async_redis_connection.cache_clear()
+    yield
+    get_async_redis_connection.cache_clear()
+
+
 @pytest.fixture
 def clear_redis_data():
     yield
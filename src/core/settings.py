@@ -94,9 +94,15 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": 60,
     }
 }
 
+# Number of threads that run database calls of consumers, each thread uses
+# its own database connection. Connections are kept between calls for
+# CONN_MAX_AGE seconds, with 0 every call would open a new connection.
+DB_EXECUTOR_POOL_SIZE = 8
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -170,6 +176,73 @@ LOGOUT_REDIRECT_URL = "users:login"
 ANONYMOUS_REDIRECT_URL = "chat:index"
 
 # Redis
-# Number of seconds that specifies for how long list with channels names per
-# user will be preserved after the most recent save_channel_name call
+# Number of seconds that specifies for how long sorted set with channels names
+# per user will be preserved after the most recent save_channel_name call
 USERS_CHANNELS_NAMES_TTL = 86400
+# Number of seconds between heartbeats sent by connected clients
+PRESENCE_HEARTBEAT_INTERVAL = 30
+# Number of seconds without heartbeat after which channel is considered dead.
+# Any other command of the client counts as heartbeat too. Pages loaded before
+# heartbeats were introduced, that send no command within this time, are
+# considered dead and stop receiving chats list updates until reloaded.
+PRESENCE_TIMEOUT = 90
+# Maximum number of connections in the pool of asyncio redis client
+REDIS_MAX_CONNECTIONS = 50
+# Number of seconds to wait for a free connection when all are in use
+REDIS_POOL_TIMEOUT = 5
+# Number of seconds after which idle connection is checked before use
+REDIS_HEALTH_CHECK_INTERVAL = 30
+# Number of last messages per room kept in redis, at least one page
+RECENT_MESSAGES_CACHE_SIZE = 50
+# Number of seconds for how long last messages of the room are kept in redis
+# after the most recent message
+RECENT_MESSAGES_CACHE_TTL = 3600
+# Number of seconds for how long ids of the room members are kept in redis
+ROOM_MEMBERS_CACHE_TTL = 3600
+
+# Outbound frames
+# Number of seconds for which group messages sent to a socket are buffered
+# and then sent in a single batch frame, 0 sends each message right away.
+# Applies only to clients that accept batch frames, see BATCH_FRAMES_PARAM.
+OUTBOUND_COALESCE_WINDOW = 0.02
+# Number of buffered messages that are sent right away, without waiting for
+# the end of the window
+OUTBOUND_COALESCE_MAX_FRAMES = 50
+# Number of frames sent to a client that acknowledges received frames, see
+# ACK_FRAMES_PARAM, that it hasn't acknowledged yet. Further frames wait in
+# the outbound queue until it does.
+OUTBOUND_UNACKED_FRAMES = 50
+# Number of frames of a single socket waiting for client's acknowledgement.
+# If the queue is full, the oldest chats list update is dropped, if there is
+# none, the client is disconnected with a token to resume from. ASGI server
+# takes sent frames without backpressure, so frames of clients that don't
+# acknowledge them are sent right away and aren't bounded.
+OUTBOUND_QUEUE_SIZE = 100
+
+# Rate limits
+# Token buckets of WebSocket commands, of each user and of each room. Bucket
+# holds up to capacity commands and is refilled with rate commands per second.
+# Commands that aren't listed aren't limited.
+WEBSOCKET_RATE_LIMITS = {
+    "new_message": {
+        "user": {"capacity": 10, "rate": 1},
+        "room": {"capacity": 100, "rate": 20},
+    },
+    "fetch_messages": {
+        "user": {"capacity": 20, "rate": 2},
+        "room": {"capacity": 200, "rate": 40},
+    },
+    # Membership of the room is checked by each subscription, rooms that
+    # don't exist aren't cached, so their checks always reach database
+    "subscribe": {
+        "user": {"capacity": 50, "rate": 5},
+    },
+}
+
+# Read receipts
+# Number of seconds after which buffered read receipts are written to database
+READ_RECEIPTS_FLUSH_INTERVAL = 0.5
+# Number of buffered read receipts that triggers immediate write to database,
+# also the max number of receipts written with a single query. SQLite fails
+# on about 1000 of them, because of the expression tree depth limit.
+READ_RECEIPTS_BATCH_SIZE = 500